@@ -1,8 +1,16 @@
 from NorenRestApiPy.NorenApi import  NorenApi
+import NorenRestApiPy.NorenApi as noren_module
 from threading import Timer
+import functools
+import json
 import pandas as pd
 import time
 import concurrent.futures
+from config import Config
+from logger import applicationLogger
+from utils.http_session import create_session, bound_session, install_session_router
+from utils.rate_limiter import PriorityRateLimiter, LANE_CANCEL, LANE_MODIFY, LANE_NEW, LANE_QUERY
+from utils.feed_capture import FeedRecorder, default_capture_path
 
 api = None
 class Order:
@@ -37,12 +45,143 @@ def get_time(time_string):
     return time.mktime(data)
 
 
+# NorenApi endpoints that go over REST, with the rate-limit lane each one uses.
+# Every call runs on the account's pooled session behind its rate limiter.
+REST_METHODS = {
+    'login': LANE_QUERY, 'forgot_password': LANE_QUERY, 'logout': LANE_QUERY,
+    'get_watch_list_names': LANE_QUERY, 'get_watch_list': LANE_QUERY,
+    'add_watch_list_scrip': LANE_QUERY, 'delete_watch_list_scrip': LANE_QUERY,
+    'place_order': LANE_NEW, 'modify_order': LANE_MODIFY,
+    'cancel_order': LANE_CANCEL, 'exit_order': LANE_CANCEL,
+    'position_product_conversion': LANE_MODIFY,
+    'single_order_history': LANE_QUERY, 'get_order_book': LANE_QUERY, 'get_trade_book': LANE_QUERY,
+    'searchscrip': LANE_QUERY, 'get_option_chain': LANE_QUERY, 'get_security_info': LANE_QUERY,
+    'get_quotes': LANE_QUERY, 'get_time_price_series': LANE_QUERY, 'get_daily_price_series': LANE_QUERY,
+    'get_holdings': LANE_QUERY, 'get_limits': LANE_QUERY, 'get_positions': LANE_QUERY,
+    'span_calculator': LANE_QUERY, 'option_greek': LANE_QUERY,
+}
+
+install_session_router(noren_module)
+
+def _rest_call(method, lane):
+    """Run a NorenApi REST method behind the instance's rate limiter on its pooled session"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.rate_limiter.acquire(lane)
+        with bound_session(self.http_session):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class ShoonyaApiPy(NorenApi):
-    def __init__(self):
-        NorenApi.__init__(self, host='https://api.shoonya.com/NorenWClientTP/', websocket='wss://api.shoonya.com/NorenWSTP/')        
+    def __init__(self, pool_size: int = None, host: str = None, websocket: str = None):
+        self.host = host or Config.API_HOST
+        NorenApi.__init__(self, host=self.host, websocket=websocket or Config.WEBSOCKET_URL)
+        self.http_session = create_session(pool_size=pool_size)
+        self.pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.rate_limiter = PriorityRateLimiter()
+        self._keepalive_timer = None
+        self.feed_recorder = None
         global api
         api = self
 
+    def prewarm_connections(self, connections: int = None, wait: bool = False):
+        """Open pooled connections ahead of the first order so it skips the TCP+TLS handshake"""
+        connections = min(connections or Config.HTTP_PREWARM_CONNECTIONS, self.pool_size)
+
+        def warm():
+            try:
+                self.http_session.head(self.host, timeout=Config.API_TIMEOUT)
+            except Exception as exc:
+                applicationLogger.warning(f"Connection prewarm failed: {exc}")
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, connections))
+        futures = [executor.submit(warm) for _ in range(connections)]
+        executor.shutdown(wait=wait)
+        if wait:
+            concurrent.futures.wait(futures)
+
+        if Config.HTTP_KEEPALIVE and Config.HTTP_KEEPALIVE_INTERVAL:
+            self._schedule_keepalive()
+
+    def _keepalive(self):
+        """One HEAD on the pooled session from the timer thread, then re-arm"""
+        try:
+            self.http_session.head(self.host, timeout=Config.API_TIMEOUT)
+        except Exception as exc:
+            applicationLogger.warning(f"Connection keep-alive failed: {exc}")
+        if self._keepalive_timer is not None:  # Not closed meanwhile
+            self._schedule_keepalive()
+
+    def _schedule_keepalive(self):
+        """Re-touch the pool periodically so idle connections are not dropped by the server"""
+        if self._keepalive_timer is not None:
+            self._keepalive_timer.cancel()
+        self._keepalive_timer = Timer(Config.HTTP_KEEPALIVE_INTERVAL, self._keepalive)
+        self._keepalive_timer.daemon = True
+        self._keepalive_timer.start()
+
+    @property
+    def user_id(self):
+        return getattr(self, '_NorenApi__username', None)
+
+    @property
+    def account_id(self):
+        return getattr(self, '_NorenApi__accountid', None)
+
+    @property
+    def session_token(self):
+        return getattr(self, '_NorenApi__susertoken', None)
+
+    def post_payload(self, route: str, payload: bytes, lane: int = LANE_QUERY):
+        """Post a pre-built request body to a NorenApi route on the pooled session"""
+        self.rate_limiter.acquire(lane)
+        config = NorenApi._NorenApi__service_config
+        url = f"{config['host']}{config['routes'][route]}"
+        res = self.http_session.post(url, data=payload, timeout=Config.API_TIMEOUT)
+
+        resDict = json.loads(res.text)
+        if resDict['stat'] != 'Ok':
+            return None
+
+        return resDict
+
+    def place_order_payload(self, payload: bytes):
+        """Place an order from a rendered OrderTemplate body"""
+        return self.post_payload('placeorder', payload, lane=LANE_NEW)
+
+    def start_capture(self, file_path: str = None) -> str:
+        """Record every raw WebSocket message (quotes and order updates) to a capture file"""
+        if self.feed_recorder is None:
+            self.feed_recorder = FeedRecorder(file_path or default_capture_path(self.user_id))
+        return self.feed_recorder.file_path
+
+    def stop_capture(self):
+        """Stop recording and close the capture file"""
+        if self.feed_recorder is not None:
+            self.feed_recorder.close()
+            self.feed_recorder = None
+
+    def start_websocket(self, *args, **kwargs):
+        if Config.FEED_CAPTURE_ENABLED:
+            self.start_capture()
+        return NorenApi.start_websocket(self, *args, **kwargs)
+
+    def _NorenApi__on_data_callback(self, ws=None, message=None, data_type=None, continue_flag=None):
+        # Overrides NorenApi's private handler so the raw frame is captured before parsing
+        recorder = self.feed_recorder
+        if recorder is not None:
+            recorder.record(message)
+        return NorenApi._NorenApi__on_data_callback(self, ws, message, data_type, continue_flag)
+
+    def close_session(self):
+        """Stop the keep-alive timer and close pooled connections"""
+        if self._keepalive_timer is not None:
+            self._keepalive_timer.cancel()
+            self._keepalive_timer = None
+        self.stop_capture()
+        self.http_session.close()
+
     def place_basket(self, orders):
 
         resp_err = 0
@@ -64,7 +203,7 @@ class ShoonyaApiPy(NorenApi):
         return result
                 
     def placeOrder(self,order: Order):
-        ret = NorenApi.place_order(self, buy_or_sell=order.buy_or_sell, product_type=order.product_type,
+        ret = self.place_order(buy_or_sell=order.buy_or_sell, product_type=order.product_type,
                             exchange=order.exchange, tradingsymbol=order.tradingsymbol, 
                             quantity=order.quantity, discloseqty=order.discloseqty, price_type=order.price_type, 
                             price=order.price, trigger_price=order.trigger_price,
@@ -72,3 +211,7 @@ class ShoonyaApiPy(NorenApi):
         #print(ret)
 
         return ret
+
+
+for _name, _lane in REST_METHODS.items():
+    setattr(ShoonyaApiPy, _name, _rest_call(getattr(NorenApi, _name), _lane))
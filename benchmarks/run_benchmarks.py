@@ -0,0 +1,298 @@
+"""
+Benchmark suite for the copy-trading hot paths
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --only fanout,ticks --compare benchmarks/results/<previous>.json
+
+Results are written as JSON to benchmarks/results/ so runs can be compared
+between versions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from config import Config
+from logger import applicationLogger
+from trading.latency_tracer import percentile
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) if samples else 0.0,
+        'p50': percentile(samples, 0.50),
+        'p95': percentile(samples, 0.95),
+        'max': samples[-1] if samples else 0.0
+    }
+
+def bench_fanout(args) -> Dict[str, Any]:
+    """OrderManager place fan-out latency vs number of accounts against the local stand-in"""
+    from api_helper import ShoonyaApiPy
+    from simulator.noren_server import NorenStandIn
+    from trading.order_manager import OrderManager
+
+    server = NorenStandIn(port=0, rest_latency_ms=args.rest_latency_ms, ws_latency_ms=0,
+                          jitter_ms=0, tick_interval=0).start()
+    sizes = [n for n in (1, 5, 10, 25, 50) if n <= args.accounts] or [args.accounts]
+    apis = []
+    for i in range(max(sizes)):
+        api = ShoonyaApiPy(host=server.rest_url, websocket=server.ws_url)
+        api.rate_limiter.enabled = False  # Measure dispatch, not the broker's throttle
+        api.login(userid=f'BENCH{i:03d}', password='pwd', twoFA='0', vendor_code='BENCH',
+                  api_secret='secret', imei='bench')
+        apis.append(api)
+
+    order_manager = OrderManager(file_path=os.path.join(tempfile.mkdtemp(), 'orders.csv'))
+    trading_symbol = 'NIFTY25SEP25C25000'
+    order_manager.prepare_order_templates(apis, trading_symbol)
+
+    by_size = {}
+    try:
+        for n in sizes:
+            subset = apis[:n]
+            samples = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                futures = order_manager.submit_buy_orders(subset, [75] * n, trading_symbol, 1.0, [True] * n)
+                order_numbers = order_manager._wait_all(futures)
+                samples.append((time.perf_counter() - start) * 1000)
+                order_manager._wait_all(order_manager.submit_cancel_orders(subset, order_numbers, [True] * n))
+            by_size[str(n)] = _summary(samples)
+    finally:
+        for api in apis:
+            api.close_session()
+        order_manager.dispatcher.shutdown()
+        server.stop()
+
+    largest = by_size[str(sizes[-1])]
+    return {'unit': 'ms', 'rest_latency_ms': args.rest_latency_ms, 'by_accounts': by_size,
+            'headline': largest['p50'], 'higher_is_better': False}
+
+def bench_symbol_lookup(args) -> Dict[str, Any]:
+    """SymbolManager.get_token lookups per second over real master-file symbols"""
+    from market_data.symbol_manager import SymbolManager
+
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # SymbolManager reads data/ relative to the working directory
+    try:
+        load_start = time.perf_counter()
+        manager = SymbolManager()
+        load_ms = (time.perf_counter() - load_start) * 1000
+    finally:
+        os.chdir(cwd)
+
+    symbols = [instrument.trading_symbol for instrument in manager.symbol_index]
+    if not symbols:
+        return {'error': 'no master files under data/'}
+
+    rng = random.Random(7)
+    sample = [rng.choice(symbols) for _ in range(args.lookups)]
+    start = time.perf_counter()
+    found = sum(1 for symbol in sample if manager.get_token(symbol))
+    elapsed = time.perf_counter() - start
+    return {'unit': 'lookups/s', 'lookups': len(sample), 'found': found, 'load_ms': load_ms,
+            'headline': len(sample) / elapsed, 'higher_is_better': True}
+
+def bench_order_updates(args) -> Dict[str, Any]:
+    """OrderManager.handle_order_update throughput"""
+    from trading.order_manager import OrderManager
+
+    order_manager = OrderManager(file_path=os.path.join(tempfile.mkdtemp(), 'orders.csv'))
+    lifecycle = [('PENDING', 'NewAck'), ('OPEN', 'New'), ('OPEN', 'Replaced'), ('COMPLETE', 'Fill')]
+    events = []
+    for i in range(args.events):
+        status, report_type = lifecycle[(i // 2500) % len(lifecycle)]
+        events.append({'norenordno': str(25000000 + i % 2500), 'uid': 'BENCH', 'actid': 'BENCH', 'exch': 'NFO',
+                       'tsym': 'NIFTY25SEP25C25000', 'trantype': 'B', 'qty': '75', 'prc': '101.5',
+                       'status': status, 'reporttype': report_type})
+
+    start = time.perf_counter()
+    for event in events:
+        order_manager.handle_order_update(event)
+    elapsed = time.perf_counter() - start
+    order_manager.journal.close()
+    return {'unit': 'events/s', 'events': len(events), 'elapsed_ms': elapsed * 1000,
+            'headline': len(events) / elapsed, 'higher_is_better': True}
+
+def bench_tick_ingestion(args) -> Dict[str, Any]:
+    """Quote ticks per second through WebSocketManager's subscribe callback"""
+    from trading.websocket_manager import WebSocketManager
+
+    manager = WebSocketManager(account_manager=None, order_manager=None)
+    _, quote_callback, _ = manager.setup_websocket_callbacks(1)
+
+    rng = random.Random(11)
+    tokens = [str(40000 + i) for i in range(50)]
+    ticks = [{'t': 'tk', 'e': 'NFO', 'tk': token, 'ts': f'SYM{token}', 'lp': '100.00', 'v': '0'} for token in tokens]
+    for i in range(args.ticks):
+        ticks.append({'t': 'tf', 'e': 'NFO', 'tk': rng.choice(tokens), 'lp': f"{100 + rng.random():.2f}",
+                      'v': str(i), 'bp1': '99.95', 'sp1': '100.05', 'ft': '1726040000'})
+
+    start = time.perf_counter()
+    for tick in ticks:
+        quote_callback(tick)
+    elapsed = time.perf_counter() - start
+    return {'unit': 'ticks/s', 'ticks': len(ticks), 'per_tick_us': elapsed / len(ticks) * 1e6,
+            'headline': len(ticks) / elapsed, 'higher_is_better': True}
+
+def bench_greeks(args) -> Dict[str, Any]:
+    """Implied volatility plus Greeks per second for a synthetic chain in one vectorized call"""
+    import numpy as np
+    from market_data.option_greeks import black76_price, implied_vol, greeks
+
+    rng = np.random.default_rng(5)
+    n = args.contracts
+    forward = np.full(n, 81000.0)
+    strikes = rng.uniform(76000, 86000, n).round(-2)
+    t = np.full(n, 7 / 365)
+    is_call = rng.random(n) < 0.5
+    prices = np.round(black76_price(forward, strikes, t, rng.uniform(0.1, 0.3, n), 0.065, is_call) / 0.05) * 0.05
+
+    samples = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        iv = implied_vol(prices, forward, strikes, t, 0.065, is_call)
+        greeks(forward, strikes, t, iv, 0.065, is_call)
+        samples.append((time.perf_counter() - start) * 1000)
+    summary = _summary(samples)
+    return {'unit': 'contracts/ms', 'contracts': n, 'ms': summary, 'solved': int(np.count_nonzero(~np.isnan(iv))),
+            'headline': n / summary['p50'], 'higher_is_better': True}
+
+def bench_startup(args) -> Dict[str, Any]:
+    """Cold import time of the application entry points (median of several runs)"""
+    results = {}
+    for module in ('main', 'run_pyqt6'):
+        samples = []
+        error = None
+        for _ in range(args.startup_runs):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, '-c', f'import {module}'], cwd=ROOT,
+                                  capture_output=True, text=True, timeout=args.startup_timeout)
+            elapsed = (time.perf_counter() - start) * 1000
+            if proc.returncode != 0:
+                error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f'exit {proc.returncode}'
+                break
+            samples.append(elapsed)
+        results[module] = _summary(samples) if samples else {'error': error}
+
+    headline = results['main'].get('p50') if 'p50' in results['main'] else None
+    return {'unit': 'ms', 'modules': results, 'headline': headline, 'higher_is_better': False}
+
+BENCHMARKS: Dict[str, Callable] = {
+    'fanout': bench_fanout,
+    'symbol_lookup': bench_symbol_lookup,
+    'order_updates': bench_order_updates,
+    'ticks': bench_tick_ingestion,
+    'greeks': bench_greeks,
+    'startup': bench_startup,
+}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ''
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare headline numbers with a previous run
+
+    Args:
+        current: Results of this run
+        previous: Results loaded from an earlier JSON file
+        threshold: Relative change treated as a regression (0.1 = 10%)
+
+    Returns:
+        List of regression descriptions
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name, {})
+        new, old = result.get('headline'), before.get('headline')
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        worse = change < -threshold if result.get('higher_is_better') else change > threshold
+        line = f"{name}: {old:.3f} -> {new:.3f} {result.get('unit', '')} ({change:+.1%})"
+        print(("REGRESSION " if worse else "           ") + line)
+        if worse:
+            regressions.append(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the copy-trading hot paths")
+    parser.add_argument('--only', help="Comma-separated subset of: " + ', '.join(BENCHMARKS))
+    parser.add_argument('--output', help="Result file (default benchmarks/results/<timestamp>_<commit>.json)")
+    parser.add_argument('--compare', help="Previous result file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Regression threshold (default 10%%)")
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--rest-latency-ms', type=float, default=Config.SIMULATOR_REST_LATENCY_MS)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=100000)
+    parser.add_argument('--contracts', type=int, default=4000)
+    parser.add_argument('--startup-runs', type=int, default=3)
+    parser.add_argument('--startup-timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    selected = args.only.split(',') if args.only else list(BENCHMARKS)
+    commit = _git_commit()
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': {}
+    }
+
+    for name in selected:
+        print(f"Running {name}...")
+        try:
+            report['results'][name] = BENCHMARKS[name](args)
+        except Exception as e:
+            applicationLogger.error(f"Benchmark {name} failed: {e}")
+            report['results'][name] = {'error': str(e)}
+        result = report['results'][name]
+        if result.get('headline') is not None:
+            print(f"  {name}: {result['headline']:.3f} {result.get('unit', '')}")
+        else:
+            print(f"  {name}: {result.get('error', 'no headline')}")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{commit or 'local'}.json")
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+        if compare(report, previous, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
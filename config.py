@@ -14,9 +14,86 @@ class Config:
     ACTIVE_CHILD_ACCOUNTS = [2]  # Child accounts to activate
     
     # API settings
+    API_HOST = "https://api.shoonya.com/NorenWClientTP/"
+    WEBSOCKET_URL = "wss://api.shoonya.com/NorenWSTP/"
     API_TIMEOUT = 30
     MAX_RETRIES = 3
     
+    # HTTP connection pool settings
+    HTTP_POOL_SIZE = 4  # Pooled connections per account session
+    HTTP_KEEPALIVE = True
+    HTTP_KEEPALIVE_INTERVAL = 25  # Seconds between pool refreshes, 0 to disable
+    HTTP_PREWARM_CONNECTIONS = 2  # Connections opened right after account setup
+    
+    # REST rate limiting (per account session)
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_PER_SECOND = 10  # Sustained requests per second
+    RATE_LIMIT_BURST = 10  # Bucket capacity
+    RATE_LIMIT_RESERVED_TOKENS = 2  # Tokens read-only queries may not consume
+    
+    # Order dispatch settings
+    ORDER_WORKERS_PER_ACCOUNT = 1  # Pinned worker threads per account session
+    ORDER_EVENT_QUEUE_SIZE = 1000  # Buffered WebSocket order updates per account
+    ORDER_EVENT_TERMINAL_GRACE = 300  # Seconds a finished order's version is kept to drop late replays
+    
+    # Account snapshot settings
+    ACCOUNT_SNAPSHOT_TTL = 2.0  # Seconds positions/limits/order books are served from cache
+    ACCOUNT_SNAPSHOT_WORKERS = 16  # Concurrent REST reads across accounts
+    
+    # Position engine settings
+    POSITION_SEED_ATTEMPTS = 3  # Position book reads while fills keep landing mid-read
+    
+    # Market data settings
+    TICK_HISTORY = 1024  # Ticks retained per subscribed token
+    INSTRUMENT_SNAPSHOT_ENABLED = True  # Compile masters into data/instruments_<date>.snap and mmap it
+    STRIKE_LADDER_WIDTH = 7  # Listed strikes offered on each side of ATM
+    OPTION_CHAIN_WIDTH = 10  # Strikes streamed on each side of ATM by an option chain
+    RISK_FREE_RATE = 0.065  # Continuously compounded rate for implied volatility and Greeks
+    EXPIRY_TIME = "15:30"  # Exchange close on expiry day (local time)
+    QUOTE_MAX_STALENESS = 2.0  # Seconds a streamed or REST quote is served before GetQuotes is called again
+    
+    # Master file download settings
+    MASTER_DOWNLOAD_ROOT = "https://api.shoonya.com/"
+    MASTER_DOWNLOAD_WORKERS = 4  # Parallel zip downloads
+    MASTER_DOWNLOAD_RETRIES = 3  # Attempts per file on connection errors and 5xx
+    MASTER_DOWNLOAD_BACKOFF = 0.5  # Seconds before the first retry, doubled each attempt
+    MASTER_DOWNLOAD_TIMEOUT = 30  # Seconds per request
+    
+    # Local Noren stand-in (simulator package)
+    SIMULATOR_HOST = "127.0.0.1"
+    SIMULATOR_PORT = 8910
+    SIMULATOR_REST_LATENCY_MS = 2.0
+    SIMULATOR_WS_LATENCY_MS = 5.0
+    SIMULATOR_JITTER_MS = 1.0
+    SIMULATOR_TICK_INTERVAL = 0.5  # Seconds between touchline updates (0 disables)
+    
+    # Feed capture settings
+    FEED_CAPTURE_ENABLED = False  # Record raw WebSocket messages for offline replay
+    FEED_CAPTURE_DIR = "captures"
+    FEED_CAPTURE_FLUSH_INTERVAL = 0.5  # Seconds between background flushes of the capture file
+    FEED_CAPTURE_FLUSH_FRAMES = 200  # Frames that force an immediate flush
+    
+    # Logging settings
+    LOG_QUEUE_SIZE = 10000  # Records buffered for the log writer thread; overflow is dropped
+    LOG_CATEGORY_LIMITS = {
+        'tick': 20  # Quote tick lines per second
+    }
+    
+    # Order journal settings
+    ORDER_JOURNAL_FILE = "orders.journal"
+    JOURNAL_FSYNC_INTERVAL = 0.2  # Seconds between background fsyncs
+    JOURNAL_FSYNC_BATCH = 50  # Records that force an immediate fsync
+    JOURNAL_COMPACT_EVERY = 5000  # Journal records before rewriting the CSV snapshot
+    
+    # Latency tracing settings
+    LATENCY_TRACING = True
+    LATENCY_TRACE_HISTORY = 5000  # Orders/samples retained per histogram
+    
+    # Replication settings
+    REPLICATION_ENABLED = False  # Mirror master orders to children from the order feed
+    REPLICATION_QTY_MULTIPLIERS = {}  # Child account -> multiple of master quantity (default 1.0)
+    REPLICATION_LATENCY_WINDOW = 1000  # Copy-latency samples kept for stats
+    
     # GUI settings
     WINDOW_WIDTH = 1400
     WINDOW_HEIGHT = 800
@@ -67,6 +144,11 @@ class Config:
         """Get default quantity for an instrument"""
         return cls.DEFAULT_QUANTITIES.get(instrument, 10)
     
+    @classmethod
+    def get_replication_multiplier(cls, account_num: int) -> float:
+        """Get master quantity multiplier for a child account"""
+        return cls.REPLICATION_QTY_MULTIPLIERS.get(account_num, 1.0)
+    
     @classmethod
     def get_index_info(cls, index_name: str) -> dict:
         """Get index information"""
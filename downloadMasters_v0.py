@@ -1,49 +1,11 @@
-import os
-import requests
-import zipfile
 from datetime import datetime
 
-root = 'https://api.shoonya.com/'
-masters = ['NSE_symbols.txt.zip', 'NFO_symbols.txt.zip', 'MCX_symbols.txt.zip', 'BFO_symbols.txt.zip']
-
-current_date = datetime.now().strftime("_%Y-%m-%d")
+from market_data.master_downloader import MasterDownloader
 
 
 def downloadFileMaster():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
-    for zip_file in masters:
-        base_name = zip_file.replace('.zip', '')
-        todays_file = f"data/{base_name}{current_date}.txt"
-
-        if os.path.exists(todays_file):
-            print(f"File for today already exists: {todays_file}. Skipping download.")
-            continue
-
-        print(f'Downloading {zip_file}')
-        url = root + zip_file
-        try:
-            r = requests.get(url, allow_redirects=True)
-            r.raise_for_status()  # Raise exception if response code is not 200
-            with open(zip_file, 'wb') as f:
-                f.write(r.content)
-
-            with zipfile.ZipFile(zip_file, 'r') as z:
-                z.extractall()
-                extracted_file = z.namelist()[0]  # Assume there's only one file in the zip
-                os.rename(extracted_file, todays_file)
-                print(f"Extracted and renamed to: {todays_file}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error downloading {zip_file}: {e}")
-        except zipfile.BadZipFile:
-            print(f"Error extracting {zip_file}: Invalid zip file")
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-        finally:
-            if os.path.exists(zip_file):
-                os.remove(zip_file)
-                print(f'Removed: {zip_file}')
+    # Parallel conditional download; no network when today's files already exist
+    return MasterDownloader().ensure_masters()
 
 
 def get_latest_expiry_date_from_file(file_path, instrument):
@@ -66,29 +28,26 @@ def get_latest_expiry_date_from_file(file_path, instrument):
         return None
 
 
-# Get the latest NFO symbols file
-downloadFileMaster()
-nfo_file = max(
-    (file for file in os.listdir('data') if file.startswith('NFO_symbols') and file.endswith('.txt')),
-    key=lambda f: datetime.strptime(f.split('_')[-1].replace('.txt', ''), '%Y-%m-%d')
-)
-nfo_file = os.path.join('data', nfo_file)  # Add data folder path
-
-global latest_expiry_NF
-global latest_expiry_BN
-
-latest_expiry_NF = get_latest_expiry_date_from_file(nfo_file, "NIFTY")
-latest_expiry_BN = get_latest_expiry_date_from_file(nfo_file, "BANKNIFTY")
+def _latest_expiries():
+    # Computed on first use rather than at import time
+    global latest_expiry_NF, latest_expiry_BN
+    if 'latest_expiry_NF' not in globals():
+        nfo_file = downloadFileMaster().get('NFO')
+        latest_expiry_NF = get_latest_expiry_date_from_file(nfo_file, "NIFTY") if nfo_file else None
+        latest_expiry_BN = get_latest_expiry_date_from_file(nfo_file, "BANKNIFTY") if nfo_file else None
+    return latest_expiry_NF, latest_expiry_BN
 
 
 # Functions to format expiry dates
 def getBNExpiry():
+    latest_expiry_BN = _latest_expiries()[1]
     date_object = datetime.strptime(str(latest_expiry_BN), "%Y-%m-%d %H:%M:%S")
     formatted_BN = date_object.strftime("%d%b%y").upper()
     return formatted_BN
 
 
 def getNFExpiry():
+    latest_expiry_NF = _latest_expiries()[0]
     date_object = datetime.strptime(str(latest_expiry_NF), "%Y-%m-%d %H:%M:%S")
     formatted_NF = date_object.strftime("%d%b%y").upper()
     return formatted_NF
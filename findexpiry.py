@@ -1,64 +1,27 @@
-import glob
 from datetime import datetime, timedelta
+from market_data.expiry_calendar import ExpiryCalendar
+from market_data.instrument_snapshot import load_or_build
+from market_data.symbol_manager import MASTER_EXCHANGES
 
 
 def find_exp():
-    # Find the latest files based on today's date
-    date_str = datetime.today().strftime('%Y-%m-%d')
+    # Expiries come from the calendar over the compiled snapshot of the latest masters
+    snapshot = load_or_build(MASTER_EXCHANGES)
+    calendar = ExpiryCalendar.from_index(snapshot) if snapshot is not None else None
 
-    nfo_files = glob.glob(f'data/NFO_symbols.txt_{date_str}.txt')
-    mcx_files = glob.glob(f'data/MCX_symbols.txt_{date_str}.txt')
-    bfo_files = glob.glob(f'data/BFO_symbols.txt_{date_str}.txt')
+    def expiries(symbol):
+        if calendar is None:
+            return []
+        return [datetime.combine(expiry, datetime.min.time())
+                for expiry in calendar.expiries(symbol, include_futures=True)]
 
-    # Initialize sets to hold expiry dates
-    finnifty_dates = set()
-    nifty_dates = set()
-    banknifty_dates = set()
-    midcpnifty_dates = set()
-    crude_dates = set()
-    sensex_dates = set()
-    bankex_dates = set()
-
-    # Process NFO files
-    for nfo_file in nfo_files:
-        with open(nfo_file, 'r') as file:
-            for line in file:
-                values = line.strip().split(',')
-                if values[3] == 'FINNIFTY':
-                    finnifty_dates.add(values[5])
-                elif values[3] == 'NIFTY':
-                    nifty_dates.add(values[5])
-                elif values[3] == 'BANKNIFTY':
-                    banknifty_dates.add(values[5])
-                elif values[3] == 'MIDCPNIFTY':
-                    midcpnifty_dates.add(values[5])
-
-    # Process MCX files
-    for mcx_file in mcx_files:
-        with open(mcx_file, 'r') as file:
-            for line in file:
-                values = line.strip().split(',')
-                if values[4] == 'CRUDEOIL':
-                    crude_dates.add(values[6])
-
-    # Process BFO files
-    for bfo_file in bfo_files:
-        with open(bfo_file, 'r') as file:
-            for line in file:
-                values = line.strip().split(',')
-                if values[3] == 'BSXOPT':
-                    sensex_dates.add(values[5])
-                elif values[3] == 'BKXOPT':
-                    bankex_dates.add(values[5])
-
-    # Convert dates to datetime objects
-    finnifty_dates = [datetime.strptime(date, '%d-%b-%Y') for date in finnifty_dates]
-    nifty_dates = [datetime.strptime(date, '%d-%b-%Y') for date in nifty_dates]
-    banknifty_dates = [datetime.strptime(date, '%d-%b-%Y') for date in banknifty_dates]
-    midcpnifty_dates = [datetime.strptime(date, '%d-%b-%Y') for date in midcpnifty_dates]
-    crude_dates = [datetime.strptime(date, '%d-%b-%Y') for date in crude_dates]
-    sensex_dates = [datetime.strptime(date, '%d-%b-%Y') for date in sensex_dates]
-    bankex_dates = [datetime.strptime(date, '%d-%b-%Y') for date in bankex_dates]
+    finnifty_dates = expiries('FINNIFTY')
+    nifty_dates = expiries('NIFTY')
+    banknifty_dates = expiries('BANKNIFTY')
+    midcpnifty_dates = expiries('MIDCPNIFTY')
+    crude_dates = expiries('CRUDEOIL')
+    sensex_dates = expiries('SENSEX')
+    bankex_dates = expiries('BANKEX')
 
     today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
     futdate = datetime.today() + timedelta(days=32)
@@ -375,6 +375,17 @@ class AccountCard(ModernCard):
         )
         self.status_indicator.pack(fill="x", pady=(0, 10))
         
+        # Live MTM
+        self.mtm_label = tk.Label(
+            self.content_frame,
+            text="MTM: -",
+            font=ModernFonts.BODY_BOLD,
+            bg=theme["card"],
+            fg=theme["text"],
+            anchor="w"
+        )
+        self.mtm_label.pack(fill="x", pady=(0, 10))
+        
         # Action buttons
         self.create_action_buttons()
     
@@ -429,6 +440,14 @@ class AccountCard(ModernCard):
         """Update account status"""
         self.status_indicator.update_status(status)
     
+    def update_mtm(self, mtm: float):
+        """Update the live MTM figure"""
+        theme = self.theme.get_theme()
+        self.mtm_label.configure(
+            text=f"MTM: ₹{mtm:,.2f}",
+            fg=theme["success"] if mtm > 0 else theme["danger"] if mtm < 0 else theme["text"]
+        )
+    
     def update_name(self, name: str):
         """Update account name"""
         self.account_name = name
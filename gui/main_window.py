@@ -4,13 +4,14 @@ Modern GUI window for Master-Child Trading System
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any, Optional
-from datetime import datetime
-import calendar
+import time
 # from config import Config  # Not currently used
 from trading.account_manager import AccountManager
 from trading.order_manager import OrderManager
 from trading.websocket_manager import WebSocketManager
 from trading.position_manager import PositionManager
+from trading.replication_engine import ReplicationEngine
+from trading.account_snapshot import AccountSnapshotService
 from market_data.symbol_manager import SymbolManager
 from market_data.expiry_manager import ExpiryManager
 from utils.telegram_notifications import send_sos_message
@@ -21,6 +22,10 @@ from .components import (
     ModernCombobox, StatusIndicator, ProgressBar, AccountCard
 )
 from .settings_window import SettingsWindow
+from .option_chain_window import OptionChainWindow
+
+MTM_REFRESH_MS = 500
+SNAPSHOT_POLL_MS = 50
 
 class MainWindow:
     """Modern main application window"""
@@ -42,9 +47,14 @@ class MainWindow:
         # Initialize managers
         self.account_manager = AccountManager()
         self.order_manager = OrderManager()
-        self.websocket_manager = WebSocketManager(self.account_manager, self.order_manager, self)
-        self.position_manager = PositionManager()
-        self.symbol_manager = SymbolManager()
+        self.replication_engine = ReplicationEngine(self.account_manager, self.order_manager)
+        self.snapshot_service = AccountSnapshotService(self.account_manager)
+        self.websocket_manager = WebSocketManager(self.account_manager, self.order_manager, self,
+                                                  replication_engine=self.replication_engine,
+                                                  snapshot_service=self.snapshot_service)
+        self.position_manager = PositionManager(self.websocket_manager.position_engine)
+        self.symbol_manager = SymbolManager(self.websocket_manager.tick_store)
+        self.websocket_manager.position_engine.instruments = self.symbol_manager
         self.expiry_manager = ExpiryManager()
         
         # GUI variables
@@ -53,6 +63,12 @@ class MainWindow:
         # Create modern GUI
         self.create_modern_layout()
         
+        # Live MTM from the position engine; its listener runs on the feed thread
+        self.latest_mtm = {}
+        self.latest_total_mtm = None
+        self.websocket_manager.position_engine.add_listener(self.on_mtm_change)
+        self.root.after(MTM_REFRESH_MS, self.refresh_mtm_display)
+        
         # Initialize with master account
         self.initialize_master_account()
     
@@ -77,7 +93,7 @@ class MainWindow:
         self.master1_value = tk.StringVar()
         self.child2_value = tk.StringVar()
         
-        # Order numbers
+        # Pending place futures per account (resolve to order numbers)
         self.order_numbers = {
             1: '', 2: ''
         }
@@ -257,6 +273,16 @@ class MainWindow:
             style="primary"
         )
         self.refresh_strikes_btn.grid(row=1, column=4, padx=(10, 0), pady=5)
+        
+        # Live option chain button
+        self.option_chain_btn = ModernButton(
+            grid_frame,
+            text="Option Chain",
+            icon=ModernIcons.CHART,
+            command=self.show_option_chain,
+            style="primary"
+        )
+        self.option_chain_btn.grid(row=1, column=5, padx=(10, 0), pady=5)
     
     def create_trading_controls_card(self, parent):
         """Create trading controls card"""
@@ -437,6 +463,14 @@ class MainWindow:
         self.order_status = StatusIndicator(status_frame, status="inactive")
         self.order_status.pack(side="left")
         
+        # Consolidated books across accounts
+        self.accounts_summary_label = ModernLabel(status_frame, text="", style="secondary")
+        self.accounts_summary_label.pack(side="left", padx=(20, 0))
+        
+        # Aggregate MTM across accounts
+        self.total_mtm_label = ModernLabel(status_frame, text="Total MTM: -", style="normal")
+        self.total_mtm_label.pack(side="right")
+        
         # Progress bar for operations
         self.progress_bar = ProgressBar(status_card.content_frame)
         self.progress_bar.pack(fill="x", pady=(10, 0))
@@ -467,6 +501,7 @@ class MainWindow:
             
             # Refresh account status
             self.update_account_status()
+            self.update_accounts_summary()
             
             self.progress_bar.set_progress(75)
             
@@ -494,6 +529,35 @@ class MainWindow:
         else:
             self.child_card.update_status("inactive")
     
+    def update_accounts_summary(self):
+        """Start one concurrent snapshot of every account; the Tk thread draws it when it lands"""
+        try:
+            future = self.snapshot_service.snapshot_async()
+            self.root.after(SNAPSHOT_POLL_MS, lambda: self._show_accounts_summary(future))
+        except Exception as e:
+            applicationLogger.error(f"Error updating accounts summary: {e}")
+    
+    def _show_accounts_summary(self, future):
+        """Show day M2M, margin and open orders summed over a finished snapshot"""
+        if not future.done():
+            self.root.after(SNAPSHOT_POLL_MS, lambda: self._show_accounts_summary(future))
+            return
+        try:
+            snapshot = future.result()
+            totals = snapshot['totals']
+            failed = [str(account_num) for account_num, entry in snapshot['accounts'].items() if entry['errors']]
+            
+            summary = (f"Accounts: {len(snapshot['accounts'])} | "
+                       f"Day M2M: ₹{totals.get('day_m2m', 0.0):,.2f} | "
+                       f"Margin Used: ₹{totals.get('margin_used', 0.0):,.2f} | "
+                       f"Open Orders: {totals.get('open_orders', 0)}")
+            if failed:
+                summary += f" | Not loaded: {', '.join(failed)}"
+            self.accounts_summary_label.configure(text=summary)
+            
+        except Exception as e:
+            applicationLogger.error(f"Error updating accounts summary: {e}")
+    
     def open_settings(self):
         """Open settings window"""
         settings_window = SettingsWindow(
@@ -591,78 +655,19 @@ class MainWindow:
         option = self.selected_option.get()
         
         if all([index, expiry, strike, option]):
-            if index == "SENSEX":
-                trading_symbol = self._generate_sensex_symbol(expiry, strike, option)
-            else:
-                trading_symbol = f"{index}{expiry}{option}{strike}"
+            trading_symbol = self.symbol_manager.option_symbol(index, expiry, strike, option)
             
             # Update account displays
             self.master1_value.set(trading_symbol)
             self.child2_value.set(trading_symbol)
             
+            # Pre-serialize order payloads so the click path only splices price/qty
+            apis = [self.account_manager.get_api(i) for i in self.account_manager.get_all_active_accounts()]
+            self.order_manager.prepare_order_templates(apis, trading_symbol)
+            
             return trading_symbol
         return ""
     
-    def _generate_sensex_symbol(self, expiry: str, strike: str, option: str) -> str:
-        """
-        Generate SENSEX symbol based on expiry type
-        
-        Args:
-            expiry: Expiry date in format like "11SEP25" or "25SEP25"
-            strike: Strike price as string
-            option: "CE" or "PE"
-            
-        Returns:
-            Formatted SENSEX symbol
-        """
-        try:
-            # Parse the expiry date
-            # Format: "11SEP25" or "25SEP25"
-            if len(expiry) == 7:  # Daily expiry like "11SEP25"
-                day = expiry[:2]
-                month = expiry[2:5]
-                year = expiry[5:]
-                
-                # Convert to datetime to check if it's monthly expiry
-                month_num = datetime.strptime(month, '%b').month
-                year_full = 2000 + int(year)
-                day_num = int(day)
-                
-                # Check if it's the last Friday of the month (monthly expiry)
-                last_day = calendar.monthrange(year_full, month_num)[1]
-                last_friday = self._get_last_friday(year_full, month_num)
-                
-                if day_num == last_friday.day:
-                    # Monthly expiry format: SENSEX25SEP87200CE
-                    return f"SENSEX{year}{month}{strike}{option}"
-                else:
-                    # Daily expiry format: SENSEX2591187200CE
-                    return f"SENSEX{year}{month_num:d}{day_num:02d}{strike}{option}"
-            else:
-                # Fallback to original format
-                return f"SENSEX{expiry}{strike}{option}"
-                
-        except Exception as e:
-            applicationLogger.error(f"Error generating SENSEX symbol: {e}")
-            # Fallback to original format
-            return f"SENSEX{expiry}{strike}{option}"
-    
-    def _get_last_friday(self, year: int, month: int) -> datetime:
-        """Get the last Friday of the month"""
-        from datetime import timedelta
-        
-        # Get the last day of the month
-        last_day = calendar.monthrange(year, month)[1]
-        last_date = datetime(year, month, last_day)
-        
-        # Find the last Friday
-        days_back = (last_date.weekday() - 4) % 7
-        if days_back == 0 and last_date.weekday() != 4:
-            days_back = 7
-        last_friday = last_date - timedelta(days=days_back)
-        
-        return last_friday
-    
     def fetch_price(self):
         """Fetch current price for selected symbol"""
         try:
@@ -693,6 +698,8 @@ class MainWindow:
     def place_buy_orders(self):
         """Place buy orders across all active accounts"""
         try:
+            click_ts = time.perf_counter()
+            
             if not self.qty1_var.get():
                 messagebox.showerror("Error", "Please select quantity")
                 return
@@ -715,7 +722,7 @@ class MainWindow:
                 self.quantities[2] = 20
             
             # Get active accounts
-            active_accounts = self.account_manager.get_all_active_accounts()
+            active_accounts = self._order_accounts()
             applicationLogger.info(f"Active accounts: {active_accounts}")
             
             if not active_accounts:
@@ -730,17 +737,15 @@ class MainWindow:
             applicationLogger.info(f"Trading symbol: {trading_symbol}, Price: {price}")
             applicationLogger.info(f"Quantities: {quantities}")
             
-            # Place orders
-            order_numbers = self.order_manager.place_buy_orders(
-                apis, quantities, trading_symbol, price, active_flags
+            # Submit orders to the per-account workers without blocking the UI
+            futures = self.order_manager.submit_buy_orders(
+                apis, quantities, trading_symbol, price, active_flags, click_ts=click_ts
             )
             
-            # Update order numbers
-            for i, order_num in enumerate(order_numbers):
-                if order_num:
-                    self.order_numbers[active_accounts[i]] = order_num
+            # Keep the place futures; cancels and modifies chain on them
+            self._track_order_numbers(futures, active_accounts, self.order_numbers)
             
-            messagebox.showinfo("Success", "Buy orders placed successfully")
+            messagebox.showinfo("Success", "Buy orders submitted")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error placing buy orders: {e}")
@@ -748,6 +753,8 @@ class MainWindow:
     def place_sell_orders(self):
         """Place sell orders across all active accounts"""
         try:
+            click_ts = time.perf_counter()
+            
             if not self.qty1_var.get():
                 messagebox.showerror("Error", "Please select quantity")
                 return
@@ -770,7 +777,7 @@ class MainWindow:
                 self.quantities[2] = 20
             
             # Get active accounts
-            active_accounts = self.account_manager.get_all_active_accounts()
+            active_accounts = self._order_accounts()
             applicationLogger.info(f"Active accounts for sell: {active_accounts}")
             
             if not active_accounts:
@@ -785,31 +792,65 @@ class MainWindow:
             applicationLogger.info(f"Trading symbol: {trading_symbol}, Price: {price}")
             applicationLogger.info(f"Quantities: {quantities}")
             
-            # Place orders
-            order_numbers = self.order_manager.place_sell_orders(
-                apis, quantities, trading_symbol, price, active_flags
+            # Submit orders to the per-account workers without blocking the UI
+            futures = self.order_manager.submit_sell_orders(
+                apis, quantities, trading_symbol, price, active_flags, click_ts=click_ts
             )
             
-            # Update sell order numbers
-            for i, order_num in enumerate(order_numbers):
-                if order_num:
-                    self.sell_order_numbers[active_accounts[i]] = order_num
+            # Keep the place futures; cancels and modifies chain on them
+            self._track_order_numbers(futures, active_accounts, self.sell_order_numbers)
             
-            messagebox.showinfo("Success", "Sell orders placed successfully")
+            messagebox.showinfo("Success", "Sell orders submitted")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error placing sell orders: {e}")
     
+    def _order_accounts(self) -> list:
+        """Accounts the UI sends orders to (master only when replication mirrors children)"""
+        active_accounts = self.account_manager.get_all_active_accounts()
+        if self.replication_engine.enabled:
+            return [num for num in active_accounts if num == 1]
+        return active_accounts
+    
+    def _track_order_numbers(self, futures, active_accounts, order_store):
+        """
+        Keep each account's pending place future as its order to cancel or modify
+        
+        The future itself is stored from the Tk thread; OrderManager chains
+        cancels and modifies on it, so a click right after placing targets the
+        new order rather than the previous one.
+        
+        Args:
+            futures: Futures returned by OrderManager.submit_*_orders
+            active_accounts: Account numbers matching the futures
+            order_store: Dictionary of account number -> place future to update
+        """
+        def make_callback(account_num):
+            def on_done(future):
+                try:
+                    order_num = future.result()
+                except Exception as e:
+                    applicationLogger.error(f"Order for account {account_num} failed: {e}")
+                    return
+                if order_num:
+                    applicationLogger.info(f"Account {account_num} order number: {order_num}")
+            return on_done
+        
+        for account_num, future in zip(active_accounts, futures):
+            if future is not None:
+                order_store[account_num] = future
+                future.add_done_callback(make_callback(account_num))
+    
     def cancel_buy_orders(self):
         """Cancel buy orders across all active accounts"""
         try:
-            active_accounts = self.account_manager.get_all_active_accounts()
+            active_accounts = self._order_accounts()
             apis = [self.account_manager.get_api(i) for i in active_accounts]
             order_numbers = [self.order_numbers[i] for i in active_accounts]
             active_flags = [True] * len(active_accounts)
             
-            self.order_manager.cancel_orders(apis, order_numbers, active_flags)
-            messagebox.showinfo("Success", "Buy orders cancelled")
+            self.order_manager.submit_cancel_orders(apis, order_numbers, active_flags)
+            messagebox.showinfo("Success", "Buy order cancels submitted")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error cancelling buy orders: {e}")
@@ -817,13 +858,13 @@ class MainWindow:
     def cancel_sell_orders(self):
         """Cancel sell orders across all active accounts"""
         try:
-            active_accounts = self.account_manager.get_all_active_accounts()
+            active_accounts = self._order_accounts()
             apis = [self.account_manager.get_api(i) for i in active_accounts]
             order_numbers = [self.sell_order_numbers[i] for i in active_accounts]
             active_flags = [True] * len(active_accounts)
             
-            self.order_manager.cancel_orders(apis, order_numbers, active_flags)
-            messagebox.showinfo("Success", "Sell orders cancelled")
+            self.order_manager.submit_cancel_orders(apis, order_numbers, active_flags)
+            messagebox.showinfo("Success", "Sell order cancels submitted")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error cancelling sell orders: {e}")
@@ -849,16 +890,16 @@ class MainWindow:
                 self.quantities[2] = 20
             
             # Get active accounts
-            active_accounts = self.account_manager.get_all_active_accounts()
+            active_accounts = self._order_accounts()
             apis = [self.account_manager.get_api(i) for i in active_accounts]
             order_numbers = [self.order_numbers[i] for i in active_accounts]
             quantities = [self.quantities[i] for i in active_accounts]
             active_flags = [True] * len(active_accounts)
             
-            self.order_manager.modify_orders(
+            self.order_manager.submit_modify_orders(
                 apis, order_numbers, quantities, trading_symbol, price, active_flags
             )
-            messagebox.showinfo("Success", "Buy orders modified")
+            messagebox.showinfo("Success", "Buy order modifications submitted")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error modifying buy orders: {e}")
@@ -884,16 +925,16 @@ class MainWindow:
                 self.quantities[2] = 20
             
             # Get active accounts
-            active_accounts = self.account_manager.get_all_active_accounts()
+            active_accounts = self._order_accounts()
             apis = [self.account_manager.get_api(i) for i in active_accounts]
             order_numbers = [self.sell_order_numbers[i] for i in active_accounts]
             quantities = [self.quantities[i] for i in active_accounts]
             active_flags = [True] * len(active_accounts)
             
-            self.order_manager.modify_orders(
+            self.order_manager.submit_modify_orders(
                 apis, order_numbers, quantities, trading_symbol, price, active_flags
             )
-            messagebox.showinfo("Success", "Sell orders modified")
+            messagebox.showinfo("Success", "Sell order modifications submitted")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error modifying sell orders: {e}")
@@ -906,12 +947,30 @@ class MainWindow:
                 messagebox.showerror("Error", f"Account {account_num} not available")
                 return
             
-            mtm = self.position_manager.calculate_mtm(api)
+            mtm = self.position_manager.calculate_mtm(api, account_num)
             messagebox.showinfo("MTM", f"Account {account_num} MTM: {mtm}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Error calculating MTM: {e}")
     
+    def on_mtm_change(self, account_num: int, account_mtm: float, total_mtm: float):
+        """Position engine listener; only records the figures, the Tk thread draws them"""
+        self.latest_mtm[account_num] = account_mtm
+        self.latest_total_mtm = total_mtm
+    
+    def refresh_mtm_display(self):
+        """Draw the latest MTM figures on the account cards and status panel"""
+        try:
+            cards = {1: self.master_card, 2: self.child_card}
+            for account_num, mtm in list(self.latest_mtm.items()):
+                if account_num in cards:
+                    cards[account_num].update_mtm(mtm)
+            if self.latest_total_mtm is not None:
+                self.total_mtm_label.configure(text=f"Total MTM: ₹{self.latest_total_mtm:,.2f}")
+        except Exception as e:
+            applicationLogger.error(f"Error refreshing MTM display: {e}")
+        self.root.after(MTM_REFRESH_MS, self.refresh_mtm_display)
+    
     def show_order_details(self, account_num: int):
         """Show order details for an account"""
         try:
@@ -920,7 +979,7 @@ class MainWindow:
                 messagebox.showerror("Error", f"Account {account_num} not available")
                 return
             
-            orders = self.order_manager.get_order_book(api)
+            orders = self.snapshot_service.fetch(account_num, 'orders')
             if not orders:
                 messagebox.showinfo("Order Details", "No orders found")
                 return
@@ -1077,6 +1136,31 @@ class MainWindow:
             messagebox.showerror("Error", f"Error refreshing strikes: {e}")
             applicationLogger.error(f"Error in refresh_strikes: {e}")
     
+    def show_option_chain(self):
+        """Open a live option chain for the selected index's nearest expiry"""
+        try:
+            index = self.selected_index.get()
+            if index not in ["NIFTY", "BANKNIFTY", "SENSEX"]:
+                messagebox.showwarning("Warning", "Please select an index first")
+                return
+            
+            calendar = self.expiry_manager.calendar
+            expiry = calendar.next_expiry(index) if calendar else None
+            if not expiry:
+                messagebox.showerror("Error", f"No upcoming expiry found for {index}")
+                return
+            
+            chain = self.websocket_manager.open_option_chain(1, self.symbol_manager, index, expiry)
+            if chain is None:
+                messagebox.showerror("Error", f"Could not open the {index} option chain")
+                return
+            
+            OptionChainWindow(self.root, self.websocket_manager, chain)
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Error opening option chain: {e}")
+            applicationLogger.error(f"Error in show_option_chain: {e}")
+    
     def run(self):
         """Run the application"""
         self.root.mainloop()
@@ -0,0 +1,137 @@
+"""
+Live option chain window for Master-Child Trading GUI
+"""
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+from logger import applicationLogger
+from market_data.option_chain import CHAIN_FIELDS
+from .theme import ModernTheme, ModernIcons
+from .components import ModernButton, ModernLabel
+
+REFRESH_MS = 500
+
+# Columns on each side of the strike: (heading, CHAIN_FIELDS name or greek)
+SIDE_COLUMNS = (
+    ("LTP", 'lp'), ("Bid", 'bp1'), ("Ask", 'sp1'), ("OI", 'oi'), ("Volume", 'v'),
+    ("IV", 'iv'), ("Delta", 'delta')
+)
+
+class OptionChainWindow:
+    """Option chain table refreshed from a streaming OptionChain"""
+
+    def __init__(self, parent, websocket_manager, chain):
+        """
+        Args:
+            parent: Parent window
+            websocket_manager: WebSocketManager that opened the chain
+            chain: OptionChain to display; closed with the window
+        """
+        self.parent = parent
+        self.websocket_manager = websocket_manager
+        self.chain = chain
+        self.theme = ModernTheme()
+        self.theme.set_theme("light")  # Set light theme as default
+        self.shown_version = None
+        self.create_window()
+        self.refresh()
+
+    def create_window(self):
+        """Create option chain window"""
+        self.window = tk.Toplevel(self.parent)
+        self.window.title(f"Option Chain - {self.chain.underlying} {self.chain.expiry:%d%b%y}".upper())
+        self.window.geometry("1300x600")
+        self.window.configure(bg=self.theme.get_theme()["primary"])
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Header
+        header_frame = tk.Frame(self.window, bg=self.theme.get_theme()["primary"])
+        header_frame.pack(fill="x", padx=20, pady=(20, 10))
+
+        title_label = ModernLabel(
+            header_frame,
+            text=f"{ModernIcons.CHART} {self.chain.underlying} Option Chain",
+            style="title"
+        )
+        title_label.pack(side="left")
+
+        close_btn = ModernButton(
+            header_frame,
+            text="Close",
+            command=self.close,
+            style="primary"
+        )
+        close_btn.pack(side="right")
+
+        self.spot_label = ModernLabel(header_frame, text="Spot: -", style="secondary")
+        self.spot_label.pack(side="right", padx=20)
+
+        # Calls | Strike | Puts
+        columns = ([f"ce_{field}" for _, field in reversed(SIDE_COLUMNS)] + ["strike"] +
+                   [f"pe_{field}" for _, field in SIDE_COLUMNS])
+        table_frame = tk.Frame(self.window, bg=self.theme.get_theme()["primary"])
+        table_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for heading, field in SIDE_COLUMNS:
+            for side in ("ce", "pe"):
+                self.tree.heading(f"{side}_{field}", text=f"{side.upper()} {heading}")
+                self.tree.column(f"{side}_{field}", width=80, anchor="e")
+        self.tree.heading("strike", text="Strike")
+        self.tree.column("strike", width=90, anchor="center")
+        self.tree.tag_configure("atm", background=self.theme.get_theme()["secondary"])
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+    @staticmethod
+    def _format(value, decimals: int = 2) -> str:
+        return "" if value is None or np.isnan(value) else f"{value:,.{decimals}f}"
+
+    def refresh(self):
+        """Redraw the table if the chain ticked since the last draw"""
+        if self.chain is None:
+            return
+        try:
+            view = self.chain.view()
+            if view['version'] != self.shown_version:
+                self.shown_version = view['version']
+                self.draw(view, self.chain.greeks())
+        except Exception as e:
+            applicationLogger.error(f"Error refreshing option chain: {e}")
+        self.window.after(REFRESH_MS, self.refresh)
+
+    def draw(self, view, greeks):
+        """Fill the table from a chain view and its greeks"""
+        table = view['table']
+        rows = []
+        for row, strike in enumerate(view['strikes']):
+            cells = {}
+            for side_index, side in enumerate(("ce", "pe")):
+                for column, field in enumerate(CHAIN_FIELDS):
+                    decimals = 0 if field in ('oi', 'v') else 2
+                    cells[f"{side}_{field}"] = self._format(table[row, side_index, column], decimals)
+                for field in ('iv', 'delta'):
+                    value = greeks[field][row, side_index] if field in greeks else None
+                    if field == 'iv' and value is not None:
+                        value = value * 100
+                    cells[f"{side}_{field}"] = self._format(value)
+            cells["strike"] = str(strike)
+            rows.append((cells, "atm" if strike == view['atm'] else ""))
+
+        self.tree.delete(*self.tree.get_children())
+        columns = self.tree["columns"]
+        for cells, tag in rows:
+            self.tree.insert("", "end", values=[cells[column] for column in columns], tags=(tag,))
+
+        if view['spot']:
+            self.spot_label.configure(text=f"Spot: {view['spot']:,.2f}")
+
+    def close(self):
+        """Unsubscribe the chain and close the window"""
+        if self.chain is not None:
+            self.websocket_manager.close_option_chain(self.chain)
+            self.chain = None
+        self.window.destroy()
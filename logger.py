@@ -1,6 +1,120 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from config import Config
+
+# Categories passed as extra={'category': ...}; see Config.LOG_CATEGORY_LIMITS
+TICK = {'category': 'tick'}
+
+# Tick fields written on the single-line tick format, in order
+TICK_FIELDS = ('e', 'tk', 'ts', 'lp', 'pc', 'v', 'ltq', 'bp1', 'sp1', 'oi', 'ft')
+
+def format_tick(tick_data, account_num=None) -> str:
+    """
+    Structured single-line representation of a quote tick
+
+    Args:
+        tick_data: Tick dictionary from the WebSocket
+        account_num: Account the tick arrived on
+
+    Returns:
+        str like "TICK acct=1 t=tf e=NFO tk=43512 lp=101.5 v=1200"
+    """
+    if not isinstance(tick_data, dict):
+        return f"TICK acct={account_num} raw={tick_data!r}"
+    parts = [f"TICK acct={account_num}" if account_num is not None else "TICK",
+             f"t={tick_data.get('t', '-')}"]
+    for field in TICK_FIELDS:
+        value = tick_data.get(field)
+        if value is not None:
+            parts.append(f"{field}={value}")
+    return ' '.join(parts)
+
+class TickLine:
+    """Log argument that defers format_tick until the record is written"""
+
+    __slots__ = ('tick_data', 'account_num')
+
+    def __init__(self, tick_data, account_num=None):
+        self.tick_data = tick_data
+        self.account_num = account_num
+
+    def __str__(self):
+        return format_tick(self.tick_data, self.account_num)
+
+class CategoryRateLimitFilter(logging.Filter):
+    """
+    Per-category token bucket applied on the calling thread
+
+    Records without a category always pass. Suppressed records are counted
+    and the count is appended to the next record that gets through.
+    """
+
+    def __init__(self, limits=None):
+        super().__init__()
+        self.limits = Config.LOG_CATEGORY_LIMITS if limits is None else limits
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record) -> bool:
+        category = getattr(record, 'category', None)
+        rate = self.limits.get(category) if category else None
+        if not rate:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, suppressed = self._buckets.get(category, (rate, now, 0))
+            tokens = min(rate, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[category] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[category] = (tokens - 1, now, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} {category} suppressed)"
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks or formats on the calling thread"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Same-process queue: message formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _RoutingHandler(logging.Handler):
+    """Sends records from the shared queue to the handlers of their own logger"""
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+
+    def handle(self, record):
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+_log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+_router = _RoutingHandler()
+_listener = logging.handlers.QueueListener(_log_queue, _router)
+_listener.start()
+atexit.register(_listener.stop)
 
 def setup_logger(name, level=logging.INFO):
     """To set up as many loggers as you want"""
@@ -20,18 +134,29 @@ def setup_logger(name, level=logging.INFO):
     handler = logging.FileHandler(log_file)
     handler.setFormatter(formatter)
 
-    # Get or create the logger
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(handler)
-
     # Add a stream handler for console output
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    # File and console writes happen on the listener thread
+    _router.routes[name] = [handler, console_handler]
+
+    # Get or create the logger; callers only pay for the filter and a queue put
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    queue_handler = NonBlockingQueueHandler(_log_queue)
+    queue_handler.addFilter(CategoryRateLimitFilter())
+    logger.addHandler(queue_handler)
 
     return logger
 
+def dropped_log_records() -> int:
+    """Records dropped because the log queue was full"""
+    return sum(handler.dropped for logger_name in _router.routes
+               for handler in logging.getLogger(logger_name).handlers
+               if isinstance(handler, NonBlockingQueueHandler))
+
 # Setup loggers
 child2WSLogger = setup_logger('Log_Child2_WS', level=logging.INFO)
 child3WSLogger = setup_logger('Log_Child3_WS', level=logging.INFO)
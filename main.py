@@ -3,7 +3,6 @@ Main entry point for Master-Child Trading GUI System
 """
 import sys
 import os
-from findexpiry import find_exp
 from downloadMasters_v0 import downloadFileMaster
 from gui.main_window import MainWindow
 from gui.splash_screen import SplashScreen
@@ -16,10 +15,6 @@ def initialize_system():
         applicationLogger.info("Downloading master files...")
         downloadFileMaster()
         
-        # Find expiry dates
-        applicationLogger.info("Finding expiry dates...")
-        find_exp()
-        
         applicationLogger.info("System initialization completed successfully")
         return True
         
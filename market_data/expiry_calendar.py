@@ -0,0 +1,153 @@
+"""
+Expiry calendar built from the instrument master
+"""
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from config import Config
+from market_data.instrument_snapshot import InstrumentSnapshot
+
+# GUI index names whose options are listed under a different master symbol
+UNDERLYING_ALIASES = {
+    'SENSEX': 'BSXOPT',
+    'BANKEX': 'BKXOPT',
+}
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+
+class ExpiryCalendar:
+    """Sorted option and futures expiries per underlying (master 'Symbol' column)"""
+
+    def __init__(self, option_expiries: Dict[str, List[date]], future_expiries: Dict[str, List[date]]):
+        self._options = {symbol: sorted(dates) for symbol, dates in option_expiries.items()}
+        self._futures = {symbol: sorted(dates) for symbol, dates in future_expiries.items()}
+        self._monthly: Dict[str, Set[date]] = {
+            symbol: self._last_per_month(dates) for symbol, dates in self._options.items()
+        }
+        self._all_monthly: Set[date] = set().union(*self._monthly.values()) if self._monthly else set()
+
+    @classmethod
+    def from_index(cls, index) -> 'ExpiryCalendar':
+        """
+        Build the calendar in one pass over an instrument index
+
+        Args:
+            index: InstrumentSnapshot (vectorized over the mmap) or SymbolIndex
+
+        Returns:
+            ExpiryCalendar
+        """
+        pairs: Set[Tuple[str, date, bool]] = set()
+        if isinstance(index, InstrumentSnapshot):
+            c = index.columns
+            listed = c['expiry'] > 0
+            # One int64 per (symbol, expiry, is_option) so np.unique dedupes all of them at once
+            keys = ((c['symbol'][listed].astype(np.int64) << 32) |
+                    (c['expiry'][listed].astype(np.int64) << 1) |
+                    (c['option_type'][listed] > 0))
+            for key in np.unique(keys).tolist():
+                pairs.add((index.string(key >> 32), date.fromordinal((key & 0xFFFFFFFF) >> 1), bool(key & 1)))
+        else:
+            pairs = {(inst.symbol, inst.expiry, inst.is_option) for inst in index if inst.expiry}
+
+        options: Dict[str, List[date]] = {}
+        futures: Dict[str, List[date]] = {}
+        for symbol, expiry, is_option in pairs:
+            (options if is_option else futures).setdefault(symbol, []).append(expiry)
+        return cls(options, futures)
+
+    @staticmethod
+    def _last_per_month(dates: List[date]) -> Set[date]:
+        last: Dict[Tuple[int, int], date] = {}
+        for expiry in dates:
+            last[(expiry.year, expiry.month)] = expiry  # dates are sorted
+        return set(last.values())
+
+    @staticmethod
+    def _symbol(underlying: str) -> str:
+        return UNDERLYING_ALIASES.get(underlying, underlying)
+
+    @property
+    def underlyings(self) -> List[str]:
+        return sorted(set(self._options) | set(self._futures))
+
+    def expiries(self, underlying: str, include_futures: bool = False) -> List[date]:
+        """
+        All listed expiries of an underlying
+
+        Args:
+            underlying: Master symbol or GUI index name (NIFTY, SENSEX, CRUDEOIL...)
+            include_futures: Also include futures-only expiry dates
+
+        Returns:
+            Sorted list of dates
+        """
+        symbol = self._symbol(underlying)
+        dates = self._options.get(symbol, [])
+        if include_futures or not dates:
+            dates = sorted(set(dates) | set(self._futures.get(symbol, [])))
+        return dates
+
+    def next_expiries(self, underlying: str, n: int = 1, on_or_after: date = None,
+                      include_futures: bool = False) -> List[date]:
+        """
+        Upcoming expiries of an underlying
+
+        Args:
+            underlying: Master symbol or GUI index name
+            n: Number of expiries to return
+            on_or_after: Reference date (default today)
+            include_futures: Also include futures-only expiry dates
+
+        Returns:
+            Up to n sorted dates
+        """
+        dates = self.expiries(underlying, include_futures)
+        start = bisect_left(dates, on_or_after or date.today())
+        return dates[start:start + n]
+
+    def next_expiry(self, underlying: str, on_or_after: date = None) -> Optional[date]:
+        """Nearest upcoming option expiry, or None"""
+        upcoming = self.next_expiries(underlying, 1, on_or_after)
+        return upcoming[0] if upcoming else None
+
+    @staticmethod
+    def time_to_expiry(expiry: date, now: datetime = None) -> float:
+        """
+        Years from now to the exchange close on the expiry date
+
+        Args:
+            expiry: Expiry date
+            now: Reference time (default now)
+
+        Returns:
+            Year fraction (calendar-day basis), 0 once the contract has expired
+        """
+        hour, minute = (int(part) for part in Config.EXPIRY_TIME.split(':'))
+        close = datetime(expiry.year, expiry.month, expiry.day, hour, minute)
+        return max((close - (now or datetime.now())).total_seconds(), 0.0) / SECONDS_PER_YEAR
+
+    def is_monthly(self, expiry: date, underlying: str = None) -> bool:
+        """
+        True if expiry is the last listed expiry of its month
+
+        Args:
+            expiry: Expiry date
+            underlying: Restrict to one underlying's contracts (default: any underlying)
+
+        Returns:
+            bool
+        """
+        if underlying is None:
+            return expiry in self._all_monthly
+        return expiry in self._monthly.get(self._symbol(underlying), ())
+
+    def weekly_expiries(self, underlying: str) -> List[date]:
+        """Option expiries that are not the month's last"""
+        monthly = self._monthly.get(self._symbol(underlying), set())
+        return [expiry for expiry in self.expiries(underlying) if expiry not in monthly]
+
+    def monthly_expiries(self, underlying: str) -> List[date]:
+        """Option expiries that are the month's last"""
+        return sorted(self._monthly.get(self._symbol(underlying), set()))
@@ -1,48 +1,42 @@
 """
 Expiry date management for options
 """
-import glob
-from datetime import datetime, timedelta
+from datetime import date
 from typing import Optional, Dict, Any
 from logger import applicationLogger
+from market_data.expiry_calendar import ExpiryCalendar
+from market_data.instrument_snapshot import load_or_build
+from market_data.strike_ladder import StrikeLadder
+from market_data.symbol_manager import MASTER_EXCHANGES
 
 class ExpiryManager:
     """Manages expiry dates for different instruments"""
     
-    def __init__(self):
+    def __init__(self, calendar: ExpiryCalendar = None, strike_ladder: StrikeLadder = None):
         self.expiry_dates = {}
+        self.calendar = calendar
+        self.strike_ladder = strike_ladder
         self._load_expiry_dates()
     
     def _load_expiry_dates(self):
-        """Load expiry dates from files"""
+        """Load the nearest expiries and listed strikes from the instrument master"""
         try:
-            # Load NIFTY expiry
-            with open('data/nf_expiry_dates.txt', 'r') as file:
-                nf_exp_date = file.read().strip()
-                self.expiry_dates['NIFTY'] = self._format_expiry_date(nf_exp_date)
+            if self.calendar is None or self.strike_ladder is None:
+                snapshot = load_or_build(MASTER_EXCHANGES)
+                if snapshot is None:
+                    applicationLogger.error("No master files available for expiry dates")
+                    return
+                self.calendar = self.calendar or ExpiryCalendar.from_index(snapshot)
+                self.strike_ladder = self.strike_ladder or StrikeLadder.from_index(snapshot)
             
-            # Load BANKNIFTY expiry
-            with open('data/bn_expiry_dates.txt', 'r') as file:
-                bn_exp_date = file.read().strip()
-                self.expiry_dates['BANKNIFTY'] = self._format_expiry_date(bn_exp_date)
-            
-            # Load SENSEX expiry
-            with open('data/sx_expiry_dates.txt', 'r') as file:
-                sx_exp_date = file.read().strip()
-                self.expiry_dates['SENSEX'] = self._format_expiry_date(sx_exp_date)
+            for instrument in ('NIFTY', 'BANKNIFTY', 'SENSEX'):
+                expiry = self.calendar.next_expiry(instrument)
+                if expiry:
+                    self.expiry_dates[instrument] = expiry.strftime('%d%b%y').upper()
                 
         except Exception as e:
             applicationLogger.error(f"Error loading expiry dates: {e}")
     
-    def _format_expiry_date(self, date_str: str) -> str:
-        """Format expiry date to required format"""
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            return date_obj.strftime('%d%b%y').upper()
-        except Exception as e:
-            applicationLogger.error(f"Error formatting date {date_str}: {e}")
-            return ""
-    
     def get_expiry_date(self, instrument: str) -> str:
         """
         Get expiry date for an instrument
@@ -53,20 +47,32 @@ class ExpiryManager:
         Returns:
             Formatted expiry date
         """
+        if instrument not in self.expiry_dates and self.calendar is not None:
+            expiry = self.calendar.next_expiry(instrument)
+            if expiry:
+                self.expiry_dates[instrument] = expiry.strftime('%d%b%y').upper()
         return self.expiry_dates.get(instrument, "")
     
-    def get_strike_list(self, instrument: str, current_price: float) -> list:
+    def get_strike_list(self, instrument: str, current_price: float, expiry: date = None) -> list:
         """
         Get strike price list for an instrument
         
         Args:
             instrument: Instrument name
             current_price: Current price
+            expiry: Expiry date (default the nearest expiry)
             
         Returns:
-            List of strike prices around the current price
+            Listed strikes around the current price
         """
         try:
+            if self.calendar is not None and self.strike_ladder is not None:
+                expiry = expiry or self.calendar.next_expiry(instrument)
+                strikes = self.strike_ladder.ladder(instrument, expiry, current_price) if expiry else []
+                if strikes:
+                    return strikes
+                applicationLogger.warning(f"No listed strikes for {instrument} {expiry}, using fixed intervals")
+            
             if instrument == "NIFTY":
                 # NIFTY strikes with 50 point intervals
                 # Round to nearest 50
@@ -0,0 +1,398 @@
+"""
+Compiled, memory-mapped instrument master snapshot
+
+The day's master files are compiled once into a single binary file:
+columnar NumPy arrays, a string table and two open-addressing hash tables
+(by trading symbol and by exchange|token). Readers mmap it read-only, so
+the GUI and worker processes share the same pages and open it in
+milliseconds instead of re-parsing the CSVs.
+
+Build: python -m market_data.instrument_snapshot
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import zlib
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from logger import applicationLogger
+from market_data.instruments import Instrument, SymbolIndex, EXCHANGE_PRIORITY
+
+MAGIC = b'MCSNAP01'
+VERSION = 2
+ALIGN = 64
+OPTION_TYPES = [None, 'CE', 'PE']
+
+def _hash(text: str) -> int:
+    return zlib.crc32(text.encode('utf-8'))
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def _build_table(keys: List[str]) -> np.ndarray:
+    """Open-addressing table of row numbers (-1 empty), insertion order preserved along probe chains"""
+    size = 1
+    while size < len(keys) * 2:
+        size <<= 1
+    table = np.full(size, -1, dtype=np.int32)
+    mask = size - 1
+    for row, key in enumerate(keys):
+        slot = _hash(key) & mask
+        while table[slot] != -1:
+            slot = (slot + 1) & mask
+        table[slot] = row
+    return table
+
+def compile_snapshot(master_files: Dict[str, str], out_path: str, index: SymbolIndex = None) -> int:
+    """
+    Compile master files into a snapshot
+
+    Args:
+        master_files: {exchange: master .txt path}
+        out_path: Snapshot file to write (replaced atomically)
+        index: Already-parsed instruments of master_files (skips re-reading them)
+
+    Returns:
+        Number of instruments written
+    """
+    if index is None:
+        index = SymbolIndex()
+        for exchange, file_path in master_files.items():
+            index.load_file(exchange, file_path)
+
+    # Preferred exchanges first so a bare trading symbol resolves like SymbolIndex.get
+    rows = sorted(index, key=lambda inst: EXCHANGE_PRIORITY.index(inst.exchange)
+                  if inst.exchange in EXCHANGE_PRIORITY else len(EXCHANGE_PRIORITY))
+
+    strings: Dict[str, int] = {}
+    def intern(text: str) -> int:
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    count = len(rows)
+    columns = {
+        'exchange': np.empty(count, dtype=np.uint32),
+        'token': np.empty(count, dtype=np.uint32),
+        'trading_symbol': np.empty(count, dtype=np.uint32),
+        'symbol': np.empty(count, dtype=np.uint32),
+        'instrument': np.empty(count, dtype=np.uint32),
+        'lot_size': np.empty(count, dtype=np.int32),
+        'tick_size': np.empty(count, dtype=np.float64),
+        'expiry': np.zeros(count, dtype=np.int32),  # date ordinal, 0 = none
+        'strike': np.full(count, np.nan, dtype=np.float64),
+        'option_type': np.zeros(count, dtype=np.uint8),
+        'price_factor': np.ones(count, dtype=np.float64),
+    }
+    for row, inst in enumerate(rows):
+        columns['exchange'][row] = intern(inst.exchange)
+        columns['token'][row] = intern(inst.token)
+        columns['trading_symbol'][row] = intern(inst.trading_symbol)
+        columns['symbol'][row] = intern(inst.symbol)
+        columns['instrument'][row] = intern(inst.instrument)
+        columns['lot_size'][row] = inst.lot_size
+        columns['tick_size'][row] = inst.tick_size
+        if inst.expiry:
+            columns['expiry'][row] = inst.expiry.toordinal()
+        if inst.strike is not None:
+            columns['strike'][row] = inst.strike
+        columns['option_type'][row] = OPTION_TYPES.index(inst.option_type)
+        columns['price_factor'][row] = inst.price_factor
+
+    encoded = [text.encode('utf-8') for text in strings]
+    columns['string_offsets'] = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    columns['string_offsets'][1:] = np.cumsum([len(item) for item in encoded])
+    columns['string_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    columns['symbol_table'] = _build_table([inst.trading_symbol for inst in rows])
+    columns['token_table'] = _build_table([f"{inst.exchange}|{inst.token}" for inst in rows])
+
+    sources = {exchange: {'path': os.path.basename(path), 'size': os.path.getsize(path)}
+               for exchange, path in master_files.items()}
+    layout = {}
+    header = {'version': VERSION, 'count': count, 'sources': sources, 'built': datetime.now().isoformat(timespec='seconds')}
+
+    # Header size depends on the layout offsets, so reserve a fixed page for it
+    offset = 4096
+    for name, array in columns.items():
+        offset = _align(offset)
+        layout[name] = {'dtype': array.dtype.str, 'count': int(array.size), 'offset': offset}
+        offset += array.nbytes
+    header['columns'] = layout
+    header_bytes = json.dumps(header).encode('utf-8')
+    if len(MAGIC) + 4 + len(header_bytes) > 4096:
+        raise ValueError("Snapshot header does not fit in its page")
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+        for name, array in columns.items():
+            file.seek(layout[name]['offset'])
+            file.write(array.tobytes())
+    os.replace(tmp_path, out_path)
+    applicationLogger.info(f"Compiled {count} instruments into {out_path}")
+    return count
+
+class InstrumentSnapshot:
+    """Read-only view over a compiled snapshot (same lookup interface as SymbolIndex)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = None
+        self.columns: Dict[str, np.ndarray] = {}
+        self._views: Dict[str, memoryview] = {}
+        try:
+            self._map_columns()
+        except Exception:
+            self.close()
+            raise
+        self._cache: Dict[tuple, Optional[Instrument]] = {}
+        self._decoded: Dict[int, str] = {}
+        self._dates: Dict[int, date] = {}
+        self.exchanges = list(self.header['sources'])
+
+    def _map_columns(self):
+        """Validate the header and map the column arrays"""
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not an instrument snapshot")
+        (header_len,) = struct.unpack('<I', self._mmap[len(MAGIC):len(MAGIC) + 4])
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + header_len])
+        if self.header.get('version') != VERSION:
+            raise ValueError(f"{self.path} has snapshot version {self.header.get('version')}, expected {VERSION}")
+
+        # NumPy arrays for vectorized queries; memoryviews of the same pages for scalar lookups,
+        # which avoid NumPy's per-element overhead on the hot path
+        buffer = self._buffer = memoryview(self._mmap)
+        for name, spec in self.header['columns'].items():
+            dtype = np.dtype(spec['dtype'])
+            self.columns[name] = np.frombuffer(self._mmap, dtype=dtype, count=spec['count'], offset=spec['offset'])
+            self._views[name] = buffer[spec['offset']:spec['offset'] + dtype.itemsize * spec['count']].cast(dtype.char)
+        self._offsets = self._views['string_offsets']
+        self._blob = self._views['string_blob']
+        self._symbol_table = self._views['symbol_table']
+        self._token_table = self._views['token_table']
+
+    def close(self):
+        """
+        Unmap the snapshot
+
+        Arrays a caller still holds from columns keep the pages mapped until
+        they are released; the file is left mapped in that case.
+        """
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self.columns = {}
+        self._offsets = self._blob = self._symbol_table = self._token_table = None
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            applicationLogger.warning(f"Snapshot {self.path} still referenced, left mapped")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.header['count']
+
+    def __iter__(self) -> Iterator[Instrument]:
+        for row in range(len(self)):
+            yield self.instrument(row)
+
+    def __contains__(self, trading_symbol: str) -> bool:
+        return self.get(trading_symbol) is not None
+
+    def string(self, string_id: int) -> str:
+        """Decode an entry of the string table"""
+        text = self._decoded.get(string_id)
+        if text is None:
+            text = str(self._blob[self._offsets[string_id]:self._offsets[string_id + 1]], 'utf-8')
+            self._decoded[string_id] = text
+        return text
+
+    def instrument(self, row: int) -> Instrument:
+        """Build the Instrument record for a row"""
+        c = self._views
+        string = self.string
+        expiry = c['expiry'][row]
+        if expiry:
+            expiry = self._dates.get(expiry) or self._dates.setdefault(expiry, date.fromordinal(expiry))
+        strike = c['strike'][row]
+        return Instrument(
+            string(c['exchange'][row]),
+            string(c['token'][row]),
+            string(c['trading_symbol'][row]),
+            string(c['symbol'][row]),
+            c['lot_size'][row],
+            c['tick_size'][row],
+            string(c['instrument'][row]),
+            expiry or None,
+            None if strike != strike else strike,  # NaN marks no strike
+            OPTION_TYPES[c['option_type'][row]],
+            c['price_factor'][row]
+        )
+
+    def _probe(self, table: memoryview, key: str, matches) -> Optional[int]:
+        mask = len(table) - 1
+        slot = _hash(key) & mask
+        while True:
+            row = table[slot]
+            if row == -1:
+                return None
+            if matches(row):
+                return row
+            slot = (slot + 1) & mask
+
+    def get(self, trading_symbol: str, exchange: str = None) -> Optional[Instrument]:
+        """Look up by trading symbol (optionally restricted to an exchange)"""
+        cache_key = (trading_symbol, exchange)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        c = self._views
+        def matches(row):
+            return (self.string(c['trading_symbol'][row]) == trading_symbol and
+                    (exchange is None or self.string(c['exchange'][row]) == exchange))
+        row = self._probe(self._symbol_table, trading_symbol, matches)
+        result = self.instrument(row) if row is not None else None
+        self._cache[cache_key] = result
+        return result
+
+    def by_token(self, exchange: str, token) -> Optional[Instrument]:
+        """Look up by exchange and token"""
+        key = f"{exchange}|{token}"
+        cache_key = ('#token', key)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        c = self._views
+        def matches(row):
+            return f"{self.string(c['exchange'][row])}|{self.string(c['token'][row])}" == key
+        row = self._probe(self._token_table, key, matches)
+        result = self.instrument(row) if row is not None else None
+        self._cache[cache_key] = result
+        return result
+
+    def _string_ids(self, column: str) -> Dict[str, int]:
+        """{text: string id} for a low-cardinality column (exchange, symbol), decoded once"""
+        cache_key = ('#ids', column)
+        if cache_key not in self._cache:
+            self._cache[cache_key] = {self.string(i): int(i) for i in np.unique(self.columns[column])}
+        return self._cache[cache_key]
+
+    def expiries(self, symbol: str, exchange: str = None) -> List[date]:
+        """
+        Distinct expiries of an underlying, vectorized over the mmap
+
+        Args:
+            symbol: Master 'Symbol' column value (e.g. NIFTY, BSXOPT, CRUDEOIL)
+            exchange: Optional exchange filter
+
+        Returns:
+            Sorted list of expiry dates (futures and options)
+        """
+        c = self.columns
+        symbol_id = self._string_ids('symbol').get(symbol)
+        if symbol_id is None:
+            return []
+        mask = c['symbol'] == symbol_id
+        if exchange:
+            exchange_id = self._string_ids('exchange').get(exchange)
+            if exchange_id is None:
+                return []
+            mask &= c['exchange'] == exchange_id
+        return [date.fromordinal(int(day)) for day in np.unique(c['expiry'][mask]) if day]
+
+    def matches_sources(self, master_files: Dict[str, str]) -> bool:
+        """True if the snapshot was compiled from exactly these master files"""
+        sources = self.header['sources']
+        if set(sources) != set(master_files):
+            return False
+        return all(sources[exchange]['path'] == os.path.basename(path) and
+                   sources[exchange]['size'] == os.path.getsize(path)
+                   for exchange, path in master_files.items())
+
+def snapshot_path_for(master_files: Dict[str, str], data_dir: str = 'data') -> str:
+    """
+    data/instruments_<latest master date>_<source fingerprint>.snap
+
+    Each set of master files gets its own file, so a rebuild never replaces a
+    snapshot another reader still has mapped (os.replace onto a mapped file
+    fails on Windows).
+    """
+    dates = sorted(os.path.basename(path).split('_')[-1].split('.txt')[0] for path in master_files.values())
+    sources = sorted(f"{exchange}|{os.path.basename(path)}|{os.path.getsize(path)}"
+                     for exchange, path in master_files.items())
+    fingerprint = zlib.crc32('\n'.join(sources).encode('utf-8'))
+    return os.path.join(data_dir, f"instruments_{dates[-1] if dates else 'empty'}_{fingerprint:08x}.snap")
+
+def prune_snapshots(keep_path: str):
+    """Delete older snapshots next to keep_path; ones still mapped elsewhere are left for a later run"""
+    for path in glob.glob(os.path.join(os.path.dirname(keep_path), 'instruments_*.snap')):
+        if os.path.abspath(path) == os.path.abspath(keep_path):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def latest_master_files(exchanges: List[str], data_dir: str = 'data') -> Dict[str, str]:
+    """Most recent data/<EXCH>_symbols.txt_<date>.txt for each exchange"""
+    files = {}
+    for exchange in exchanges:
+        candidates = glob.glob(os.path.join(data_dir, f"{exchange}_symbols.txt_*.txt"))
+        if candidates:
+            files[exchange] = max(candidates, key=lambda path: datetime.strptime(
+                path.split('_')[-1].split('.txt')[0], "%Y-%m-%d"))
+    return files
+
+def load_or_build(exchanges: List[str], data_dir: str = 'data') -> Optional[InstrumentSnapshot]:
+    """
+    Open today's snapshot, compiling it first if it is missing or stale
+
+    Args:
+        exchanges: Exchanges whose masters go into the snapshot
+        data_dir: Directory with the master files
+
+    Returns:
+        InstrumentSnapshot, or None when there are no master files
+    """
+    master_files = latest_master_files(exchanges, data_dir)
+    if not master_files:
+        return None
+
+    path = snapshot_path_for(master_files, data_dir)
+    if os.path.exists(path):
+        try:
+            snapshot = InstrumentSnapshot(path)
+            if snapshot.matches_sources(master_files):
+                return snapshot
+            snapshot.close()
+        except (ValueError, OSError) as e:
+            applicationLogger.warning(f"Rebuilding unreadable snapshot {path}: {e}")
+
+    compile_snapshot(master_files, path)
+    prune_snapshots(path)
+    return InstrumentSnapshot(path)
+
+if __name__ == '__main__':
+    import time
+    from market_data.symbol_manager import MASTER_EXCHANGES
+
+    start = time.perf_counter()
+    snapshot = load_or_build(MASTER_EXCHANGES)
+    if snapshot is None:
+        print("No master files found under data/")
+    else:
+        print(f"{snapshot.path}: {len(snapshot)} instruments ({(time.perf_counter() - start) * 1000:.0f} ms)")
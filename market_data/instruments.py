@@ -0,0 +1,155 @@
+"""
+Instrument records and the hashed symbol index built from the master files
+"""
+import csv
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Lookup order when a trading symbol is given without an exchange
+EXCHANGE_PRIORITY = ['NFO', 'BFO', 'NSE', 'MCX']
+
+# Exchanges whose order quantity is in lots rather than units
+LOT_QUANTITY_EXCHANGES = ('MCX', 'CDS', 'BCD')
+
+class Instrument(NamedTuple):
+    """One row of an instrument master"""
+    exchange: str
+    token: str
+    trading_symbol: str
+    symbol: str
+    lot_size: int
+    tick_size: float
+    instrument: str
+    expiry: Optional[date] = None
+    strike: Optional[float] = None
+    option_type: Optional[str] = None  # CE, PE or None for futures/cash
+    price_factor: float = 1.0  # GNGD column of the MCX master (quoted unit per traded unit)
+
+    @property
+    def key(self) -> str:
+        """WebSocket subscription key (exchange|token)"""
+        return f"{self.exchange}|{self.token}"
+
+    @property
+    def is_option(self) -> bool:
+        return self.option_type in ('CE', 'PE')
+
+    @property
+    def multiplier(self) -> float:
+        """Rupees per point per unit of order quantity (lot size x price factor where quantity is in lots)"""
+        return self.lot_size * self.price_factor if self.exchange in LOT_QUANTITY_EXCHANGES else 1.0
+
+def _parse_expiry(value: str, cache: Dict[str, Optional[date]]) -> Optional[date]:
+    """Parse 25-SEP-2025 style expiries; a handful of distinct values, so memoize"""
+    if value not in cache:
+        try:
+            cache[value] = datetime.strptime(value, '%d-%b-%Y').date() if value else None
+        except ValueError:
+            cache[value] = None
+    return cache[value]
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+class SymbolIndex:
+    """Instrument lookup by trading symbol or token in O(1)"""
+
+    def __init__(self):
+        self._by_symbol: Dict[Tuple[str, str], Instrument] = {}
+        self._by_token: Dict[Tuple[str, str], Instrument] = {}
+        self._by_tsym: Dict[str, Instrument] = {}
+        self.exchanges: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._by_symbol)
+
+    def __iter__(self) -> Iterator[Instrument]:
+        return iter(self._by_symbol.values())
+
+    def __contains__(self, trading_symbol: str) -> bool:
+        return trading_symbol in self._by_tsym
+
+    def add(self, instrument: Instrument) -> None:
+        """Index one instrument"""
+        self._by_symbol[(instrument.exchange, instrument.trading_symbol)] = instrument
+        self._by_token[(instrument.exchange, instrument.token)] = instrument
+        current = self._by_tsym.get(instrument.trading_symbol)
+        if current is None or self._priority(instrument.exchange) < self._priority(current.exchange):
+            self._by_tsym[instrument.trading_symbol] = instrument
+
+    @staticmethod
+    def _priority(exchange: str) -> int:
+        return EXCHANGE_PRIORITY.index(exchange) if exchange in EXCHANGE_PRIORITY else len(EXCHANGE_PRIORITY)
+
+    def load_file(self, exchange: str, file_path: str) -> int:
+        """
+        Index a Shoonya master file (NSE/NFO/BFO/MCX layouts)
+
+        Args:
+            exchange: Exchange the file belongs to
+            file_path: Path to the extracted master .txt file
+
+        Returns:
+            Number of instruments indexed
+        """
+        with open(file_path, newline='') as file:
+            return self.load_rows(exchange, file)
+
+    def load_rows(self, exchange: str, lines: Iterable[str]) -> int:
+        """
+        Index master-file lines (header first), e.g. straight from an in-memory zip member
+
+        Args:
+            exchange: Exchange the lines belong to
+            lines: CSV lines of a master file
+
+        Returns:
+            Number of instruments indexed
+        """
+        expiries: Dict[str, Optional[date]] = {}
+        count = 0
+        for row in csv.DictReader(lines):
+            trading_symbol = row.get('TradingSymbol')
+            if not trading_symbol:
+                continue
+            option_type = row.get('OptionType') or None
+            instrument = Instrument(
+                exchange=row.get('Exchange') or exchange,
+                token=row['Token'],
+                trading_symbol=trading_symbol,
+                symbol=row.get('Symbol', ''),
+                lot_size=int(row.get('LotSize') or 1),
+                tick_size=_to_float(row.get('TickSize')) or 0.0,
+                instrument=row.get('Instrument', ''),
+                expiry=_parse_expiry(row.get('Expiry', ''), expiries),
+                strike=_to_float(row.get('StrikePrice')) if option_type in ('CE', 'PE') else None,
+                option_type=option_type if option_type in ('CE', 'PE') else None,
+                price_factor=_to_float(row.get('GNGD')) or 1.0
+            )
+            self.add(instrument)
+            count += 1
+        if exchange not in self.exchanges:
+            self.exchanges.append(exchange)
+        return count
+
+    def get(self, trading_symbol: str, exchange: str = None) -> Optional[Instrument]:
+        """
+        Look up an instrument by trading symbol
+
+        Args:
+            trading_symbol: Trading symbol, e.g. NIFTY25SEP25C25000
+            exchange: Optional exchange; otherwise NFO, BFO, NSE, MCX are preferred in that order
+
+        Returns:
+            Instrument or None
+        """
+        if exchange:
+            return self._by_symbol.get((exchange, trading_symbol))
+        return self._by_tsym.get(trading_symbol)
+
+    def by_token(self, exchange: str, token) -> Optional[Instrument]:
+        """Look up an instrument by exchange and token"""
+        return self._by_token.get((exchange, str(token)))
@@ -0,0 +1,156 @@
+"""
+Parallel, conditional download of the Shoonya instrument masters
+"""
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+import requests
+from config import Config
+from logger import applicationLogger
+from market_data.instruments import SymbolIndex
+from market_data.instrument_snapshot import compile_snapshot, latest_master_files, prune_snapshots, snapshot_path_for
+from market_data.symbol_manager import MASTER_EXCHANGES
+
+STATE_FILE = "masters_state.json"
+
+class MasterDownloader:
+    """
+    Keeps data/<EXCH>_symbols.txt_<date>.txt current
+
+    Nothing touches the network when today's files exist (or the server already
+    answered 304 today). Otherwise the zips are fetched in parallel with
+    If-None-Match/If-Modified-Since, unzipped in memory and parsed straight into
+    the instrument snapshot.
+    """
+
+    def __init__(self, root: str = None, data_dir: str = "data", exchanges: List[str] = None):
+        self.root = root or Config.MASTER_DOWNLOAD_ROOT
+        self.data_dir = data_dir
+        self.exchanges = exchanges or MASTER_EXCHANGES
+        self.state_path = os.path.join(data_dir, STATE_FILE)
+        self.state = self._load_state()
+        self.today = datetime.now().strftime("%Y-%m-%d")
+
+    def _load_state(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.state_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def todays_file(self, exchange: str) -> str:
+        return os.path.join(self.data_dir, f"{exchange}_symbols.txt_{self.today}.txt")
+
+    def pending(self) -> List[str]:
+        """Exchanges that still need a request today"""
+        return [exchange for exchange in self.exchanges
+                if not os.path.exists(self.todays_file(exchange))
+                and self.state.get(exchange, {}).get("checked") != self.today]
+
+    def _get(self, exchange: str) -> Optional[requests.Response]:
+        """Conditional GET with retry/backoff; None when the server reports 304"""
+        url = f"{self.root}{exchange}_symbols.txt.zip"
+        cached = self.state.get(exchange, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        delay = Config.MASTER_DOWNLOAD_BACKOFF
+        for attempt in range(1, Config.MASTER_DOWNLOAD_RETRIES + 1):
+            try:
+                response = requests.get(url, headers=headers, timeout=Config.MASTER_DOWNLOAD_TIMEOUT)
+                if response.status_code == 304:
+                    return None
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            if attempt < Config.MASTER_DOWNLOAD_RETRIES:
+                applicationLogger.warning(f"Download of {url} failed ({error}), retry {attempt} in {delay:.1f}s")
+                time.sleep(delay)
+                delay *= 2
+        raise requests.RequestException(f"Giving up on {url}: {error}")
+
+    def _download(self, exchange: str) -> Optional[bytes]:
+        """
+        Fetch one master and write today's file
+
+        Args:
+            exchange: Exchange code
+
+        Returns:
+            Master file contents, or None if unchanged or failed
+        """
+        try:
+            response = self._get(exchange)
+            entry = self.state.setdefault(exchange, {})
+            entry["checked"] = self.today
+            if response is None:
+                applicationLogger.info(f"{exchange} master not modified, keeping previous file")
+                return None
+
+            with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+                content = archive.read(archive.namelist()[0])  # One master per zip
+
+            target = self.todays_file(exchange)
+            with open(target + ".tmp", "wb") as file:
+                file.write(content)
+            os.replace(target + ".tmp", target)
+            entry["etag"] = response.headers.get("ETag", "")
+            entry["last_modified"] = response.headers.get("Last-Modified", "")
+            applicationLogger.info(f"Downloaded {exchange} master to {target} ({len(content)} bytes)")
+            return content
+        except zipfile.BadZipFile:
+            applicationLogger.error(f"Error extracting {exchange} master: invalid zip file")
+        except Exception as e:
+            applicationLogger.error(f"Error downloading {exchange} master: {e}")
+        return None
+
+    def ensure_masters(self) -> Dict[str, str]:
+        """
+        Bring the master files and the instrument snapshot up to date
+
+        Returns:
+            {exchange: latest master file path}
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        pending = self.pending()
+        if not pending:
+            return latest_master_files(self.exchanges, self.data_dir)
+
+        workers = max(1, min(Config.MASTER_DOWNLOAD_WORKERS, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MasterDownload") as pool:
+            downloaded = dict(zip(pending, pool.map(self._download, pending)))
+        self._save_state()
+
+        master_files = latest_master_files(self.exchanges, self.data_dir)
+        fresh = {exchange: content for exchange, content in downloaded.items() if content is not None}
+        snapshot_path = snapshot_path_for(master_files, self.data_dir) if master_files else None
+        if fresh and snapshot_path and not os.path.exists(snapshot_path) and Config.INSTRUMENT_SNAPSHOT_ENABLED:
+            try:
+                index = SymbolIndex()
+                for exchange, file_path in master_files.items():
+                    if exchange in fresh:
+                        index.load_rows(exchange, io.StringIO(fresh[exchange].decode("utf-8"), newline=""))
+                    else:
+                        index.load_file(exchange, file_path)
+                compile_snapshot(master_files, snapshot_path, index)
+                prune_snapshots(snapshot_path)
+            except Exception as e:
+                applicationLogger.error(f"Error compiling instrument snapshot: {e}")
+        return master_files
@@ -0,0 +1,212 @@
+"""
+Live option chain for one underlying and expiry, fed by the quote WebSocket
+"""
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from logger import applicationLogger
+from market_data.expiry_calendar import ExpiryCalendar
+from market_data.instruments import Instrument
+from market_data.option_greeks import chain_greeks
+from market_data.strike_ladder import Strike, atm_position
+
+# Columns of the chain table, in order
+CHAIN_FIELDS = ('lp', 'bp1', 'sp1', 'oi', 'v')
+SIDES = ('CE', 'PE')
+
+class OptionChain:
+    """
+    Columnar chain table (strike x CE/PE x CHAIN_FIELDS) updated in place per tick
+
+    Every listed strike of the expiry has a row; only the ATM +/- width window is
+    subscribed, and the window follows the underlying's spot tick.
+    """
+
+    def __init__(self, underlying: str, expiry: date, strikes: List[Strike],
+                 resolve: Callable[[Strike, str], Optional[Instrument]],
+                 subscribe: Callable[[List[str]], object], unsubscribe: Callable[[List[str]], object],
+                 spot_key: str = None, width: int = None):
+        """
+        Args:
+            underlying: Index name (NIFTY, BANKNIFTY, SENSEX...)
+            expiry: Expiry date
+            strikes: Sorted listed strikes of the expiry
+            resolve: (strike, 'CE'/'PE') -> Instrument
+            subscribe: Subscribes a batch of exchange|token keys on one WebSocket
+            unsubscribe: Unsubscribes a batch of keys
+            spot_key: exchange|token of the underlying index
+            width: Strikes on each side of ATM (default Config.OPTION_CHAIN_WIDTH)
+        """
+        self.underlying = underlying
+        self.expiry = expiry
+        self.strikes = list(strikes)
+        self.width = Config.OPTION_CHAIN_WIDTH if width is None else width
+        self.spot_key = spot_key
+        self.spot: Optional[float] = None
+        self._subscribe = subscribe
+        self._unsubscribe = unsubscribe
+
+        self.table = np.full((len(self.strikes), len(SIDES), len(CHAIN_FIELDS)), np.nan)
+        self.keys: List[List[Optional[str]]] = [[None] * len(SIDES) for _ in self.strikes]
+        self._cells: Dict[str, Tuple[int, int]] = {}
+        for row, strike in enumerate(self.strikes):
+            for side, option_type in enumerate(SIDES):
+                instrument = resolve(strike, option_type)
+                if instrument is not None:
+                    self.keys[row][side] = instrument.key
+                    self._cells[instrument.key] = (row, side)
+
+        self.atm_index: Optional[int] = None
+        self.window: Tuple[int, int] = (0, 0)  # Subscribed rows [start, end)
+        self.version = 0  # Incremented on every applied tick
+        self._lock = threading.Lock()
+
+    def _window_keys(self, window: Tuple[int, int]) -> List[str]:
+        return [key for row in range(*window) for key in self.keys[row] if key]
+
+    def start(self, spot_price: float = None) -> None:
+        """
+        Subscribe the spot and the initial window
+
+        Args:
+            spot_price: Known spot price to centre on; otherwise the middle strike until the first spot tick
+        """
+        if self.spot_key:
+            self._subscribe([self.spot_key])
+        if spot_price:
+            self.recenter(spot_price)
+        elif self.strikes:
+            self.recenter(self.strikes[len(self.strikes) // 2])
+
+    def stop(self) -> None:
+        """Unsubscribe everything this chain subscribed"""
+        with self._lock:
+            keys = self._window_keys(self.window)
+            self.window = (0, 0)
+        if self.spot_key:
+            keys.append(self.spot_key)
+        if keys:
+            self._unsubscribe(keys)
+
+    def recenter(self, price: float) -> bool:
+        """
+        Move the subscribed window to ATM +/- width for a spot price
+
+        Args:
+            price: Underlying price
+
+        Returns:
+            bool: True if the window moved
+        """
+        if not self.strikes:
+            return False
+        atm = atm_position(self.strikes, price)
+        if atm == self.atm_index:
+            return False
+
+        window = (max(0, atm - self.width), min(len(self.strikes), atm + self.width + 1))
+        with self._lock:
+            old = set(self._window_keys(self.window))
+            new = set(self._window_keys(window))
+            self.atm_index = atm
+            self.window = window
+            # Rows leaving the window stop updating; blank them rather than show stale quotes
+            for row in range(len(self.strikes)):
+                if not window[0] <= row < window[1]:
+                    self.table[row] = np.nan
+
+        removed = sorted(old - new)
+        added = sorted(new - old)
+        if removed:
+            self._unsubscribe(removed)
+        if added:
+            self._subscribe(added)
+        applicationLogger.info(f"{self.underlying} {self.expiry} chain centred on {self.strikes[atm]} "
+                               f"(+{len(added)} -{len(removed)} subscriptions)")
+        return True
+
+    def on_tick(self, tick_data: Dict[str, str]) -> bool:
+        """
+        Apply a quote tick if it belongs to this chain
+
+        Args:
+            tick_data: WebSocket touchline tick
+
+        Returns:
+            bool: True if the tick updated the chain or its spot
+        """
+        key = f"{tick_data.get('e')}|{tick_data.get('tk')}"
+        if key == self.spot_key:
+            price = tick_data.get('lp')
+            if price:
+                self.spot = float(price)
+                self.recenter(self.spot)
+            return True
+
+        cell = self._cells.get(key)
+        if cell is None:
+            return False
+        with self._lock:
+            # A late tick for a key recenter just dropped must not refill its blanked row
+            if not self.window[0] <= cell[0] < self.window[1]:
+                return False
+            row = self.table[cell]
+            for column, field in enumerate(CHAIN_FIELDS):
+                value = tick_data.get(field)
+                if value:
+                    try:
+                        row[column] = float(value)
+                    except ValueError:
+                        pass
+            self.version += 1
+        return True
+
+    def view(self) -> Dict[str, object]:
+        """
+        Consistent copy of the subscribed window for display (ticks apply under the same lock)
+
+        Returns:
+            Dict with strikes, table (rows x CE/PE x CHAIN_FIELDS), atm strike, spot and version
+        """
+        with self._lock:
+            start, end = self.window
+            return {
+                'strikes': self.strikes[start:end],
+                'table': self.table[start:end].copy(),
+                'atm': self.strikes[self.atm_index] if self.atm_index is not None else None,
+                'spot': self.spot,
+                'version': self.version
+            }
+
+    def column(self, option_type: str, field: str) -> np.ndarray:
+        """Live view of one field for CE or PE across all strikes"""
+        return self.table[:, SIDES.index(option_type), CHAIN_FIELDS.index(field)]
+
+    def greeks(self, rate: float = None, now: datetime = None) -> Dict[str, object]:
+        """
+        Implied volatility and Greeks for the subscribed window in one vectorized call
+
+        Prices are the bid/ask mid where both sides are quoted, otherwise the last price.
+
+        Args:
+            rate: Risk-free rate (default Config.RISK_FREE_RATE)
+            now: Valuation time (default now)
+
+        Returns:
+            Dict with strikes and (rows x CE/PE) arrays iv, delta, gamma, theta, vega;
+            empty until the spot price is known
+        """
+        view = self.view()
+        if not self.spot or not view['strikes']:
+            return {}
+        table = view['table']
+        lp, bid, ask = (table[:, :, CHAIN_FIELDS.index(field)] for field in ('lp', 'bp1', 'sp1'))
+        quoted = (bid > 0) & (ask > 0)
+        prices = np.where(quoted, 0.5 * (bid + ask), lp)
+        result = chain_greeks(self.spot, np.asarray(view['strikes'], dtype=float), prices,
+                              ExpiryCalendar.time_to_expiry(self.expiry, now),
+                              Config.RISK_FREE_RATE if rate is None else rate)
+        result['strikes'] = view['strikes']
+        return result
@@ -0,0 +1,227 @@
+"""
+Vectorized Black-76 / Black-Scholes implied volatility and Greeks
+
+Every function takes NumPy arrays (or scalars that broadcast) so a whole
+chain is priced in one call. Prices and implied volatility are the same in
+both models once the forward is F = S * exp(r * T), but the Greeks are not:
+greeks() differentiates with respect to the forward with F held fixed, while
+spot_greeks() differentiates with respect to the spot, which is what an
+index option chain quotes against.
+"""
+from typing import Dict, Union
+import numpy as np
+
+ArrayLike = Union[float, np.ndarray]
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF via the Numerical Recipes erfc (relative error < 1.2e-7, including the tails)"""
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.5 * z)
+    erfc = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+    tail = 0.5 * erfc  # N(-|x|)
+    return np.where(x < 0, tail, 1.0 - tail)
+
+def _d1_d2(forward, strike, t, sigma):
+    vol_t = sigma * np.sqrt(t)
+    d1 = (np.log(forward / strike) + 0.5 * vol_t * vol_t) / vol_t
+    return d1, d1 - vol_t
+
+def black76_price(forward: ArrayLike, strike: ArrayLike, t: ArrayLike, sigma: ArrayLike,
+                  rate: ArrayLike, is_call: ArrayLike) -> np.ndarray:
+    """
+    Black-76 option prices
+
+    Args:
+        forward: Forward (or S * exp(r * T))
+        strike: Strike prices
+        t: Years to expiry
+        sigma: Volatilities (0.15 = 15%)
+        rate: Continuously compounded risk-free rate
+        is_call: True for CE, False for PE
+
+    Returns:
+        Array of prices
+    """
+    forward, strike, t, sigma, rate, is_call = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (forward, strike, t, sigma, rate)), np.asarray(is_call, dtype=bool))
+    d1, d2 = _d1_d2(forward, strike, t, sigma)
+    discount = np.exp(-rate * t)
+    call = discount * (forward * norm_cdf(d1) - strike * norm_cdf(d2))
+    put = discount * (strike * norm_cdf(-d2) - forward * norm_cdf(-d1))
+    return np.where(is_call, call, put)
+
+def implied_vol(price: ArrayLike, forward: ArrayLike, strike: ArrayLike, t: ArrayLike,
+                rate: ArrayLike, is_call: ArrayLike, tol: float = 1e-6, max_iter: int = 50) -> np.ndarray:
+    """
+    Implied volatility by vectorized Newton steps inside a per-contract bisection bracket
+
+    A Newton step that leaves the bracket, or has no vega to work with, is
+    replaced by bisection, so every element converges even deep in/out of
+    the money.
+
+    Args:
+        price: Option prices
+        forward: Forward (or S * exp(r * T))
+        strike: Strike prices
+        t: Years to expiry
+        rate: Continuously compounded risk-free rate
+        is_call: True for CE, False for PE
+        tol: Price tolerance
+        max_iter: Iteration cap
+
+    Returns:
+        Array of volatilities; NaN where the price has no time value or breaks no-arbitrage bounds
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (price, forward, strike, t, rate)),
+                                 np.asarray(is_call, dtype=bool))
+    shape = arrays[0].shape
+    price, forward, strike, t, rate, is_call = (a.ravel() for a in arrays)  # Flat copies, solved in 1-D
+    discount = np.exp(-rate * t)
+    intrinsic = discount * np.where(is_call, np.maximum(forward - strike, 0.0), np.maximum(strike - forward, 0.0))
+    upper = discount * np.where(is_call, forward, strike)
+    valid = (price - intrinsic > tol) & (price < upper) & (t > 0) & (forward > 0) & (strike > 0)
+
+    # Solve every contract on its out-of-the-money twin (put-call parity): the
+    # target is then pure time value, which keeps Newton well conditioned
+    otm_call = strike >= forward
+    target = price - intrinsic
+    low = np.full(price.shape, MIN_VOL)
+    high = np.full(price.shape, MAX_VOL)
+    # Corrado-Miller starting point on the undiscounted call price
+    with np.errstate(divide='ignore', invalid='ignore'):
+        call = target / discount + np.maximum(forward - strike, 0.0)
+        half_gap = call - 0.5 * (forward - strike)
+        root = np.sqrt(np.maximum(half_gap * half_gap - (forward - strike) ** 2 / np.pi, 0.0))
+        sigma = SQRT_2PI / (forward + strike) * (half_gap + root) / np.sqrt(t)
+        sigma = np.clip(np.nan_to_num(sigma, nan=0.2), 0.01, 2.0)
+    sigma[~valid] = np.nan
+    active = np.nonzero(valid)[0]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            s, f, k, tt, disc = sigma[active], forward[active], strike[active], t[active], discount[active]
+            d1, d2 = _d1_d2(f, k, tt, s)
+            model = np.where(otm_call[active], disc * (f * norm_cdf(d1) - k * norm_cdf(d2)),
+                             disc * (k * norm_cdf(-d2) - f * norm_cdf(-d1)))
+            diff = model - target[active]
+            vega = disc * f * norm_pdf(d1) * np.sqrt(tt)
+
+            # Price increases with volatility, so the sign of diff tightens the bracket
+            lo = np.where(diff < 0, s, low[active])
+            hi = np.where(diff > 0, s, high[active])
+            # Newton on log price: OTM price is convex in volatility, its log much less so
+            newton = s - np.log(model / target[active]) * model / vega
+            step = np.where((vega > 1e-12) & (newton > lo) & (newton < hi), newton, 0.5 * (lo + hi))
+
+            done = (np.abs(diff) < tol) | (np.abs(step - s) < 1e-8)
+            low[active], high[active] = lo, hi
+            sigma[active] = np.where(np.abs(diff) < tol, s, step)
+            active = active[~done]
+    return sigma.reshape(shape)
+
+def greeks(forward: ArrayLike, strike: ArrayLike, t: ArrayLike, sigma: ArrayLike,
+           rate: ArrayLike, is_call: ArrayLike) -> Dict[str, np.ndarray]:
+    """
+    Black-76 Greeks (forward held fixed; spot_greeks() for a spot underlying)
+
+    Args:
+        forward: Forward prices
+        strike: Strike prices
+        t: Years to expiry
+        sigma: Volatilities
+        rate: Continuously compounded risk-free rate
+        is_call: True for CE, False for PE
+
+    Returns:
+        Dict of arrays: delta (per unit of forward), gamma, theta (per calendar day),
+        vega (per 1 volatility point)
+    """
+    forward, strike, t, sigma, rate, is_call = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (forward, strike, t, sigma, rate)), np.asarray(is_call, dtype=bool))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1, d2 = _d1_d2(forward, strike, t, sigma)
+        discount = np.exp(-rate * t)
+        pdf = norm_pdf(d1)
+        sqrt_t = np.sqrt(t)
+        call_delta = discount * norm_cdf(d1)
+        delta = np.where(is_call, call_delta, call_delta - discount)
+        gamma = discount * pdf / (forward * sigma * sqrt_t)
+        vega = discount * forward * pdf * sqrt_t
+        price = np.where(is_call, discount * (forward * norm_cdf(d1) - strike * norm_cdf(d2)),
+                         discount * (strike * norm_cdf(-d2) - forward * norm_cdf(-d1)))
+        theta = -discount * forward * pdf * sigma / (2.0 * sqrt_t) + rate * price
+    return {
+        'delta': delta,
+        'gamma': gamma,
+        'theta': theta / 365.0,
+        'vega': vega / 100.0
+    }
+
+def spot_greeks(spot: ArrayLike, strike: ArrayLike, t: ArrayLike, sigma: ArrayLike,
+                rate: ArrayLike, is_call: ArrayLike) -> Dict[str, np.ndarray]:
+    """
+    Black-Scholes Greeks on a non-dividend spot underlying
+
+    Args:
+        spot: Underlying prices
+        strike: Strike prices
+        t: Years to expiry
+        sigma: Volatilities
+        rate: Continuously compounded risk-free rate
+        is_call: True for CE, False for PE
+
+    Returns:
+        Dict of arrays: delta (per unit of spot), gamma, theta (per calendar day),
+        vega (per 1 volatility point)
+    """
+    spot, strike, t, sigma, rate, is_call = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (spot, strike, t, sigma, rate)), np.asarray(is_call, dtype=bool))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        d1, d2 = _d1_d2(spot * np.exp(rate * t), strike, t, sigma)
+        pdf = norm_pdf(d1)
+        sqrt_t = np.sqrt(t)
+        discounted_strike = strike * np.exp(-rate * t)
+        decay = -spot * pdf * sigma / (2.0 * sqrt_t)
+        delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+        gamma = pdf / (spot * sigma * sqrt_t)
+        vega = spot * pdf * sqrt_t
+        theta = np.where(is_call, decay - rate * discounted_strike * norm_cdf(d2),
+                         decay + rate * discounted_strike * norm_cdf(-d2))
+    return {
+        'delta': delta,
+        'gamma': gamma,
+        'theta': theta / 365.0,
+        'vega': vega / 100.0
+    }
+
+def chain_greeks(spot: float, strikes: np.ndarray, prices: np.ndarray, t: float, rate: float) -> Dict[str, np.ndarray]:
+    """
+    IV and Greeks for a strike x (CE, PE) price table in one pass
+
+    Args:
+        spot: Underlying index price
+        strikes: Strike array (n)
+        prices: Option prices (n x 2, CE then PE); NaN where unknown
+        t: Years to expiry
+        rate: Continuously compounded risk-free rate
+
+    Returns:
+        Dict of (n x 2) arrays: iv and the spot Black-Scholes delta, gamma, theta, vega
+    """
+    strikes = np.asarray(strikes, dtype=float)[:, None]
+    is_call = np.array([True, False])[None, :]
+    forward = spot * np.exp(rate * t)
+    iv = implied_vol(np.nan_to_num(prices, nan=0.0), forward, strikes, t, rate, is_call)
+    result = spot_greeks(spot, strikes, t, iv, rate, is_call)
+    result['iv'] = iv
+    return result
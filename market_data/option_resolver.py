@@ -0,0 +1,84 @@
+"""
+(underlying, expiry, strike, CE/PE) -> Instrument resolution
+"""
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple, Union
+from market_data.expiry_calendar import UNDERLYING_ALIASES
+from market_data.instrument_snapshot import InstrumentSnapshot
+from market_data.instruments import Instrument
+
+OptionKey = Tuple[str, int, float, str]  # master symbol, expiry ordinal, strike, CE/PE
+
+def parse_expiry(expiry: Union[date, str]) -> date:
+    """Accept a date or the GUI's 11SEP25 format"""
+    if isinstance(expiry, date):
+        return expiry
+    return datetime.strptime(expiry.strip().upper(), '%d%b%y').date()
+
+class OptionResolver:
+    """
+    Option contracts keyed by their terms rather than by trading symbol
+
+    Weekly and monthly contracts use different trading-symbol layouts
+    (SENSEX2591187200CE vs SENSEX25SEP87200CE); keying on the contract terms
+    avoids reconstructing either.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._rows: Dict[OptionKey, Union[int, Instrument]] = {}
+        self._cache: Dict[tuple, Optional[Instrument]] = {}
+        self._build()
+
+    def _build(self):
+        """One pass over the index; snapshot rows are kept as row numbers and decoded on demand"""
+        if isinstance(self.index, InstrumentSnapshot):
+            c = self.index.columns
+            rows = (c['option_type'] > 0).nonzero()[0]
+            symbol_ids = c['symbol'][rows].tolist()
+            names = {symbol_id: self.index.string(symbol_id) for symbol_id in set(symbol_ids)}
+            option_types = [None, 'CE', 'PE']
+            self._rows = {
+                (names[symbol_id], expiry, strike, option_types[option_type]): row
+                for row, symbol_id, expiry, strike, option_type in zip(
+                    rows.tolist(), symbol_ids, c['expiry'][rows].tolist(),
+                    c['strike'][rows].tolist(), c['option_type'][rows].tolist())
+            }
+        else:
+            self._rows = {
+                (inst.symbol, inst.expiry.toordinal(), inst.strike, inst.option_type): inst
+                for inst in self.index if inst.is_option and inst.expiry
+            }
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def resolve(self, underlying: str, expiry: Union[date, str], strike: Union[float, str],
+                option_type: str) -> Optional[Instrument]:
+        """
+        Look up an option contract
+
+        Args:
+            underlying: Master symbol or GUI index name (NIFTY, SENSEX...)
+            expiry: Expiry date, or the GUI's 11SEP25 format
+            strike: Strike price
+            option_type: CE or PE
+
+        Returns:
+            Instrument or None
+        """
+        # Memoized on the arguments as given, so repeat GUI lookups skip the date parsing too
+        request = (underlying, expiry, strike, option_type)
+        if request in self._cache:
+            return self._cache[request]
+        try:
+            key = (UNDERLYING_ALIASES.get(underlying, underlying), parse_expiry(expiry).toordinal(),
+                   float(strike), option_type.upper())
+        except (ValueError, TypeError, AttributeError):
+            return None
+
+        found = self._rows.get(key)
+        if isinstance(found, int):
+            found = self.index.instrument(found)
+        self._cache[request] = found
+        return found
@@ -0,0 +1,109 @@
+"""
+Read-through quote cache over the tick store and REST GetQuotes
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Tuple
+from config import Config
+from logger import applicationLogger
+from market_data.tick_store import TICK_FIELDS, tick_key
+
+class QuoteCache:
+    """
+    Quotes served from the live feed when it is ticking, otherwise from one shared REST call
+
+    A token that ticked within the staleness bound is answered from the tick
+    store without a round trip. Otherwise the first caller fetches GetQuotes
+    and concurrent callers for the same token wait on that call (single
+    flight); the answer is then reused until it is older than the bound.
+    """
+
+    def __init__(self, tick_store=None, max_staleness: float = None):
+        """
+        Args:
+            tick_store: TickStore fed by the quote WebSocket
+            max_staleness: Oldest quote served in seconds (default Config.QUOTE_MAX_STALENESS)
+        """
+        self.tick_store = tick_store
+        self.max_staleness = Config.QUOTE_MAX_STALENESS if max_staleness is None else max_staleness
+        self._rest: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'feed': 0, 'cached': 0, 'rest': 0, 'coalesced': 0}
+
+    def _from_feed(self, key: str, exchange: str, token: str, max_age: float) -> Optional[Dict[str, Any]]:
+        """Quote in REST shape built from the tick store, if the token ticked recently enough"""
+        if self.tick_store is None:
+            return None
+        age = self.tick_store.age(key)
+        if age is None or age > max_age:
+            return None
+        ticks = self.tick_store.get(key)
+        quote = {'stat': 'Ok', 'exch': exchange, 'token': token}
+        if ticks.tsym:
+            quote['tsym'] = ticks.tsym
+        for field in TICK_FIELDS:
+            value = ticks.get(field)
+            if value is not None:
+                quote[field] = str(value)
+        return quote if 'lp' in quote else None
+
+    def get(self, api, exchange: str, token: str, max_age: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Quote for a token
+
+        Args:
+            api: API instance used when the feed cannot answer
+            exchange: Exchange name
+            token: Symbol token
+            max_age: Oldest acceptable quote in seconds (default max_staleness, 0 forces REST)
+
+        Returns:
+            Quote dictionary (GetQuotes fields) or None
+        """
+        key = tick_key(exchange, token)
+        max_age = self.max_staleness if max_age is None else max_age
+
+        quote = self._from_feed(key, exchange, token, max_age)
+        if quote is not None:
+            self.stats['feed'] += 1
+            return quote
+
+        with self._lock:
+            cached = self._rest.get(key)
+            if cached is not None and time.monotonic() - cached[0] <= max_age:
+                self.stats['cached'] += 1
+                return cached[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats['rest'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        quote = None
+        try:
+            quote = api.get_quotes(exchange=exchange, token=token)
+        except Exception as e:
+            applicationLogger.error(f"Error getting quotes for {key}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if quote:
+                    self._rest[key] = (time.monotonic(), quote)
+            future.set_result(quote)
+        return quote
+
+    def invalidate(self, exchange: str = None, token: str = None):
+        """Drop cached REST quotes (one token, or all)"""
+        with self._lock:
+            if exchange is None:
+                self._rest.clear()
+            else:
+                self._rest.pop(tick_key(exchange, token), None)
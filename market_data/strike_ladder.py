@@ -0,0 +1,107 @@
+"""
+Listed option strikes per underlying and expiry
+"""
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from config import Config
+from market_data.expiry_calendar import UNDERLYING_ALIASES
+from market_data.instrument_snapshot import InstrumentSnapshot
+
+Strike = Union[int, float]
+
+def _as_strike(value: float) -> Strike:
+    """25000.0 -> 25000 so strikes format like the trading symbols; 82.5 stays a float"""
+    return int(value) if value == int(value) else value
+
+def atm_position(strikes: List[Strike], price: float) -> int:
+    """Index of the strike nearest to price in a sorted, non-empty strike list (ties go lower)"""
+    position = bisect_left(strikes, price)
+    if position == len(strikes):
+        return position - 1
+    if position > 0 and price - strikes[position - 1] <= strikes[position] - price:
+        return position - 1
+    return position
+
+class StrikeLadder:
+    """Sorted listed strikes for each (underlying, expiry)"""
+
+    def __init__(self, strikes: Dict[Tuple[str, date], List[Strike]]):
+        self._strikes = strikes
+
+    @classmethod
+    def from_index(cls, index) -> 'StrikeLadder':
+        """
+        Build every ladder in one pass over an instrument index
+
+        Args:
+            index: InstrumentSnapshot (vectorized over the mmap) or SymbolIndex
+
+        Returns:
+            StrikeLadder
+        """
+        strikes: Dict[Tuple[str, date], List[Strike]] = {}
+        if isinstance(index, InstrumentSnapshot):
+            c = index.columns
+            options = c['option_type'] > 0
+            groups = (c['symbol'][options].astype(np.int64) << 32) | c['expiry'][options].astype(np.int64)
+            values = c['strike'][options]
+            order = np.lexsort((values, groups))
+            groups, values = groups[order], values[order]
+            bounds = np.flatnonzero(np.diff(groups)) + 1
+            for start, end in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(groups)]))):
+                if start == end:
+                    continue
+                group = int(groups[start])
+                key = (index.string(group >> 32), date.fromordinal(group & 0xFFFFFFFF))
+                strikes[key] = [_as_strike(value) for value in np.unique(values[start:end]).tolist()]
+        else:
+            listed: Dict[Tuple[str, date], set] = {}
+            for inst in index:
+                if inst.is_option and inst.expiry and inst.strike is not None:
+                    listed.setdefault((inst.symbol, inst.expiry), set()).add(inst.strike)
+            strikes = {key: [_as_strike(value) for value in sorted(values)] for key, values in listed.items()}
+        return cls(strikes)
+
+    def strikes(self, underlying: str, expiry: date) -> List[Strike]:
+        """All listed strikes (sorted) for an underlying and expiry"""
+        return self._strikes.get((UNDERLYING_ALIASES.get(underlying, underlying), expiry), [])
+
+    def atm(self, underlying: str, expiry: date, price: float) -> Optional[Strike]:
+        """
+        Listed strike nearest to a price
+
+        Args:
+            underlying: Master symbol or GUI index name
+            expiry: Expiry date
+            price: Underlying price
+
+        Returns:
+            Strike, or None if nothing is listed
+        """
+        strikes = self.strikes(underlying, expiry)
+        if not strikes:
+            return None
+        position = atm_position(strikes, price)
+        return strikes[position]
+
+    def ladder(self, underlying: str, expiry: date, price: float, width: int = None) -> List[Strike]:
+        """
+        Listed strikes centred on the ATM strike
+
+        Args:
+            underlying: Master symbol or GUI index name
+            expiry: Expiry date
+            price: Underlying price
+            width: Strikes on each side of ATM (default Config.STRIKE_LADDER_WIDTH)
+
+        Returns:
+            Up to 2 * width + 1 sorted strikes
+        """
+        strikes = self.strikes(underlying, expiry)
+        if not strikes:
+            return []
+        width = Config.STRIKE_LADDER_WIDTH if width is None else width
+        position = atm_position(strikes, price)
+        return strikes[max(0, position - width):position + width + 1]
@@ -1,158 +1,151 @@
 """
 Symbol and market data management
 """
-import pandas as pd
-import glob
-from datetime import datetime
 from typing import Optional, List, Dict, Any
+from config import Config
 from logger import applicationLogger
+from market_data.instruments import Instrument, SymbolIndex
+from market_data.instrument_snapshot import latest_master_files, load_or_build
+from market_data.option_resolver import OptionResolver
+from market_data.quote_cache import QuoteCache
+from market_data.strike_ladder import StrikeLadder
+
+MASTER_EXCHANGES = ['NFO', 'BFO', 'NSE', 'MCX']
 
 class SymbolManager:
     """Manages symbol data and market information"""
     
-    def __init__(self):
-        self.symbol_data = {}
+    def __init__(self, tick_store=None):
+        """
+        Args:
+            tick_store: TickStore of the quote WebSocket; streamed tokens are quoted from it
+        """
+        self.symbol_index = SymbolIndex()
+        self.quote_cache = QuoteCache(tick_store)
         self.latest_files = {}
+        self.option_resolver = None  # Built on first resolve_option call
+        self.strike_ladder = None  # Built on first get_strike_ladder call
         self._load_latest_symbol_files()
     
     def _load_latest_symbol_files(self):
-        """Load the latest symbol files"""
-        try:
-            # Find latest NFO file
-            nfo_files = glob.glob("data/NFO_symbols.txt_*.txt")
-            if nfo_files:
-                files_with_dates = [(file, datetime.strptime(file.split('_')[-1].split('.txt')[0], "%Y-%m-%d")) 
-                                  for file in nfo_files]
-                latest_nfo = sorted(files_with_dates, key=lambda x: x[1], reverse=True)[0][0]
-                self.latest_files['NFO'] = latest_nfo
-                self.symbol_data['NFO'] = pd.read_csv(latest_nfo)
-            
-            # Find latest BFO file
-            bfo_files = glob.glob("data/BFO_symbols.txt_*.txt")
-            if bfo_files:
-                files_with_dates = [(file, datetime.strptime(file.split('_')[-1].split('.txt')[0], "%Y-%m-%d")) 
-                                  for file in bfo_files]
-                latest_bfo = sorted(files_with_dates, key=lambda x: x[1], reverse=True)[0][0]
-                self.latest_files['BFO'] = latest_bfo
-                self.symbol_data['BFO'] = pd.read_csv(latest_bfo)
-                
-        except Exception as e:
-            applicationLogger.error(f"Error loading symbol files: {e}")
+        """Open the compiled snapshot of the latest masters, or index the master files directly"""
+        self.latest_files = latest_master_files(MASTER_EXCHANGES)
+        if Config.INSTRUMENT_SNAPSHOT_ENABLED:
+            try:
+                snapshot = load_or_build(MASTER_EXCHANGES)
+                if snapshot is not None:
+                    self.symbol_index = snapshot
+                    applicationLogger.info(f"Mapped {len(snapshot)} instruments from {snapshot.path}")
+                    return
+            except Exception as e:
+                applicationLogger.error(f"Error opening instrument snapshot, reading master files: {e}")
+        
+        for exchange, latest in self.latest_files.items():
+            try:
+                count = self.symbol_index.load_file(exchange, latest)
+                applicationLogger.info(f"Indexed {count} {exchange} instruments from {latest}")
+            except Exception as e:
+                applicationLogger.error(f"Error loading {exchange} symbol file: {e}")
     
-    def get_token(self, trading_symbol: str) -> Optional[str]:
+    def get_instrument(self, trading_symbol: str, exchange: str = None) -> Optional[Instrument]:
         """
-        Get token for a trading symbol
+        Get the instrument record for a trading symbol
         
         Args:
             trading_symbol: Trading symbol
+            exchange: Optional exchange to restrict the lookup
             
         Returns:
-            Token string or None
+            Instrument or None
         """
-        try:
-            applicationLogger.info(f"Getting token for trading symbol: {trading_symbol}")
-            
-            # Check if it's a SENSEX symbol
-            if "SENSEX" in trading_symbol:
-                # For new format symbols, use them directly
-                if 'BFO' in self.symbol_data:
-                    row = self.symbol_data['BFO'][self.symbol_data['BFO']['TradingSymbol'] == trading_symbol]
-                    if not row.empty:
-                        token = str(row.iloc[0]['Token'])
-                        applicationLogger.info(f"Found token for {trading_symbol}: {token}")
-                        return token
-                    else:
-                        applicationLogger.error(f"No token found for {trading_symbol}")
-                        # Try to find similar symbols for debugging
-                        similar_symbols = self.symbol_data['BFO'][self.symbol_data['BFO']['TradingSymbol'].str.contains('SENSEX')]['TradingSymbol'].unique()
-                        applicationLogger.info(f"Available SENSEX symbols (first 10): {similar_symbols[:10]}")
-                        
-                        # Fallback to old conversion method for backward compatibility
-                        try:
-                            bfo_trading_symbol = self._convert_sensex_format(trading_symbol)
-                            applicationLogger.info(f"Trying converted SENSEX symbol: {trading_symbol} -> {bfo_trading_symbol}")
-                            
-                            row = self.symbol_data['BFO'][self.symbol_data['BFO']['TradingSymbol'] == bfo_trading_symbol]
-                            if not row.empty:
-                                token = str(row.iloc[0]['Token'])
-                                applicationLogger.info(f"Found token for converted symbol {bfo_trading_symbol}: {token}")
-                                return token
-                        except Exception as e:
-                            applicationLogger.error(f"Error in fallback conversion: {e}")
-            else:
-                # Check NFO symbols
-                if 'NFO' in self.symbol_data:
-                    row = self.symbol_data['NFO'][self.symbol_data['NFO']['TradingSymbol'] == trading_symbol]
-                    if not row.empty:
-                        token = str(row.iloc[0]['Token'])
-                        applicationLogger.info(f"Found NFO token for {trading_symbol}: {token}")
-                        return token
-                    else:
-                        applicationLogger.error(f"No token found for {trading_symbol}")
-                        # Let's check what symbols are available
-                        available_symbols = self.symbol_data['NFO']['TradingSymbol'].unique()
-                        applicationLogger.info(f"Available NFO symbols (first 10): {available_symbols[:10]}")
-            
-            return None
-            
-        except Exception as e:
-            applicationLogger.error(f"Error getting token for {trading_symbol}: {e}")
-            import traceback
-            applicationLogger.error(f"Traceback: {traceback.format_exc()}")
-            return None
+        return self.symbol_index.get(trading_symbol, exchange)
     
-    def _convert_sensex_format(self, input_str: str) -> str:
-        """Convert SENSEX symbol format"""
-        import calendar
-        from datetime import datetime, timedelta
-        
-        def is_last_friday(date):
-            """Check if the given date is the last Friday of the month."""
-            year = date.year
-            month = date.month
-            last_day = calendar.monthrange(year, month)[1]
-            last_date = datetime(year, month, last_day)
-            last_friday = last_date - timedelta(days=(last_date.weekday() - 4) % 7)
-            return date == last_friday
-        
-        parts = input_str.split('SENSEX')
-        if len(parts) < 2:
-            raise ValueError("Invalid input format")
-        
-        details = parts[1]
-        date_part = details[:7]  # e.g., 27DEC24 or 03JAN25
-        strike_price = details[7:-2]  # e.g., 78000
-        ce_pe = details[-2:]  # CE or PE
+    def by_token(self, exchange: str, token) -> Optional[Instrument]:
+        """
+        Get the instrument record for an exchange token
         
-        day = int(date_part[:2])
-        month_str = date_part[2:5].upper()
-        year = int(date_part[5:])
+        Args:
+            exchange: Exchange name
+            token: Symbol token
+            
+        Returns:
+            Instrument or None
+        """
+        return self.symbol_index.by_token(exchange, token)
+    
+    def resolve_option(self, underlying: str, expiry, strike, option_type: str) -> Optional[Instrument]:
+        """
+        Get the option contract for its terms, whatever its trading-symbol layout
         
-        month = datetime.strptime(month_str, "%b").month
-        date_obj = datetime(2000 + year, month, day)
+        Args:
+            underlying: Index name (NIFTY, BANKNIFTY, SENSEX...)
+            expiry: Expiry date or 11SEP25 style string
+            strike: Strike price
+            option_type: CE or PE
+            
+        Returns:
+            Instrument or None
+        """
+        if self.option_resolver is None:
+            self.option_resolver = OptionResolver(self.symbol_index)
+        return self.option_resolver.resolve(underlying, expiry, strike, option_type)
+    
+    def get_strike_ladder(self) -> StrikeLadder:
+        """Listed strikes per underlying and expiry, built on first use"""
+        if self.strike_ladder is None:
+            self.strike_ladder = StrikeLadder.from_index(self.symbol_index)
+        return self.strike_ladder
+    
+    def option_symbol(self, underlying: str, expiry: str, strike: str, option_type: str) -> str:
+        """
+        Trading symbol for the GUI's index/expiry/strike/option selection
         
-        if is_last_friday(date_obj):
-            output = f"SENSEX{year}{month_str}{strike_price}{ce_pe}"
-        else:
-            output = f"SENSEX{year}{month}{day:02d}{strike_price}{ce_pe}"
+        Args:
+            underlying: Index name
+            expiry: Expiry in 11SEP25 format
+            strike: Strike price
+            option_type: CE or PE
+            
+        Returns:
+            Listed trading symbol, or the plain concatenation if the contract is not in the master
+        """
+        instrument = self.resolve_option(underlying, expiry, strike, option_type)
+        if instrument is None:
+            applicationLogger.warning(f"No listed contract for {underlying} {expiry} {strike} {option_type}")
+            return f"{underlying}{expiry}{option_type}{strike}"
+        return instrument.trading_symbol
+    
+    def get_token(self, trading_symbol: str) -> Optional[str]:
+        """
+        Get token for a trading symbol
         
-        return output
+        Args:
+            trading_symbol: Trading symbol
+            
+        Returns:
+            Token string or None
+        """
+        instrument = self.get_instrument(trading_symbol)
+        if instrument is None:
+            applicationLogger.error(f"No token found for {trading_symbol}")
+            return None
+        return instrument.token
     
-    def get_quotes(self, api, exchange: str, token: str) -> Optional[Dict[str, Any]]:
+    def get_quotes(self, api, exchange: str, token: str, max_age: float = None) -> Optional[Dict[str, Any]]:
         """
-        Get quotes for a symbol
+        Get quotes for a symbol, from the live feed when it is streaming
         
         Args:
             api: API instance
             exchange: Exchange name
             token: Symbol token
+            max_age: Oldest acceptable quote in seconds (default Config.QUOTE_MAX_STALENESS)
             
         Returns:
             Quote data or None
         """
         try:
-            result = api.get_quotes(exchange=exchange, token=token)
-            return result
+            return self.quote_cache.get(api, exchange, token, max_age)
         except Exception as e:
             applicationLogger.error(f"Error getting quotes for {exchange}|{token}: {e}")
             return None
@@ -169,19 +162,13 @@ class SymbolManager:
             Latest price or None
         """
         try:
-            # Determine exchange
-            if 'SENSEX' in trading_symbol:
-                exchange = 'BFO'
-            else:
-                exchange = 'NFO'
-            
-            # Get token
-            token = self.get_token(trading_symbol)
-            if not token:
+            instrument = self.get_instrument(trading_symbol)
+            if not instrument:
+                applicationLogger.error(f"No token found for {trading_symbol}")
                 return None
             
             # Get quotes
-            quotes = self.get_quotes(api, exchange, token)
+            quotes = self.get_quotes(api, instrument.exchange, instrument.token)
             if quotes:
                 return float(quotes.get('lp', 0))
             
@@ -203,19 +190,11 @@ class SymbolManager:
             Latest index price or None
         """
         try:
-            # Index tokens mapping
-            index_tokens = {
-                'SENSEX': {'token': '1', 'exchange': 'BSE', 'name': 'BSE SENSEX'},
-                'NIFTY': {'token': '26000', 'exchange': 'NSE', 'name': 'NIFTY 50'},
-                'BANKNIFTY': {'token': '26009', 'exchange': 'NSE', 'name': 'NIFTY BANK'}
-            }
-            
-            if index_name not in index_tokens:
+            index_info = Config.get_index_info(index_name)
+            if not index_info:
                 applicationLogger.error(f"Unknown index: {index_name}")
                 return None
             
-            index_info = index_tokens[index_name]
-            
             # Get quotes for the index
             quotes = self.get_quotes(api, index_info['exchange'], index_info['token'])
             if quotes:
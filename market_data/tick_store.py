@@ -0,0 +1,189 @@
+"""
+Array-backed tick store for subscribed tokens
+"""
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from config import Config
+
+# Numeric touchline fields kept per tick
+TICK_FIELDS = ('ft', 'lp', 'ltq', 'v', 'bp1', 'sp1', 'oi')
+
+TICK_DTYPE = np.dtype([
+    ('ft', np.int64),  # Feed time (epoch seconds)
+    ('lp', np.float64),
+    ('ltq', np.int64),
+    ('v', np.int64),
+    ('bp1', np.float64),
+    ('sp1', np.float64),
+    ('oi', np.int64),
+])
+
+def tick_key(exchange: str, token) -> str:
+    """Store key in the WebSocket subscription format (exchange|token)"""
+    return f"{exchange}|{token}"
+
+class TokenTicks:
+    """
+    Ring buffer and latest snapshot for one token
+
+    Every account's feed thread writes the shared store, so merges and the
+    copying reads (get, history) take the token's lock.
+    """
+
+    def __init__(self, key: str, capacity: int):
+        self.key = key
+        self.tsym: Optional[str] = None
+        self.buffer = np.zeros(capacity, dtype=TICK_DTYPE)
+        # One-element array so latest is always a live view, never a copy
+        self.snapshot = np.zeros(1, dtype=TICK_DTYPE)
+        self.latest = self.snapshot[0]
+        self.head = 0  # Next write position
+        self.count = 0
+        self.version = 0  # Incremented on every merged tick
+        self.received = 0.0  # time.monotonic() of the last merged tick
+        self.has_field = dict.fromkeys(TICK_FIELDS, False)
+        self._values = [0] * len(TICK_FIELDS)
+        self._lock = threading.Lock()
+
+    def merge(self, tick_data: Dict[str, Any]) -> bool:
+        """
+        Merge a full or partial touchline tick and append it to the ring
+
+        Args:
+            tick_data: Tick dictionary (string values as sent by the feed)
+
+        Returns:
+            bool: True if any tracked field was present
+        """
+        # Parse outside the lock; only the merge into shared state is serialized
+        parsed = []
+        for i, field in enumerate(TICK_FIELDS):
+            value = tick_data.get(field)
+            if value is None or value == '':
+                continue
+            try:
+                parsed.append((i, field, float(value)))
+            except (TypeError, ValueError):
+                continue
+
+        tsym = tick_data.get('ts') or tick_data.get('tsym')
+        with self._lock:
+            if tsym:
+                self.tsym = tsym
+            if not parsed:
+                return False
+
+            values = self._values
+            for i, field, value in parsed:
+                values[i] = value
+                self.has_field[field] = True
+            # Whole-row writes are much cheaper than per-field NumPy scalar writes
+            row = tuple(values)
+            self.snapshot[0] = row
+            self.buffer[self.head] = row
+            self.head = (self.head + 1) % len(self.buffer)
+            self.count = min(self.count + 1, len(self.buffer))
+            self.version += 1
+            self.received = time.monotonic()
+        return True
+
+    def views(self) -> Tuple[np.ndarray, ...]:
+        """
+        Zero-copy views of the retained ticks in chronological order
+
+        The views are not locked; a concurrent merge can overwrite the oldest
+        rows. Use history() for a consistent copy.
+
+        Returns:
+            One view, or two when the ring has wrapped (older part first)
+        """
+        if self.count < len(self.buffer):
+            return (self.buffer[:self.count],)
+        return (self.buffer[self.head:], self.buffer[:self.head])
+
+    def history(self, field: str = None) -> np.ndarray:
+        """
+        Retained ticks as one contiguous array, copied under the token lock
+
+        Args:
+            field: Optional single field to return
+
+        Returns:
+            Structured array of ticks, or a 1-D array of one field
+        """
+        with self._lock:
+            parts = self.views()
+            ticks = parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+        return ticks[field] if field else ticks
+
+    def get(self, field: str) -> Optional[float]:
+        """Latest value of a field, or None if the feed never sent it"""
+        with self._lock:
+            if not self.has_field.get(field):
+                return None
+            return self.latest[field].item()
+
+class TickStore:
+    """Tick buffers keyed by exchange|token"""
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or Config.TICK_HISTORY
+        self._tokens: Dict[str, TokenTicks] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tokens
+
+    def update(self, tick_data: Dict[str, Any]) -> Optional[TokenTicks]:
+        """
+        Merge a WebSocket tick into its token buffer
+
+        Args:
+            tick_data: Tick dictionary with 'e' and 'tk'
+
+        Returns:
+            TokenTicks for the token, or None if the tick has no key
+        """
+        exchange = tick_data.get('e')
+        token = tick_data.get('tk')
+        if not exchange or not token:
+            return None
+
+        key = tick_key(exchange, token)
+        ticks = self._tokens.get(key)
+        if ticks is None:
+            with self._lock:
+                ticks = self._tokens.setdefault(key, TokenTicks(key, self.capacity))
+        ticks.merge(tick_data)
+        return ticks
+
+    def get(self, key: str) -> Optional[TokenTicks]:
+        """Token buffer for an exchange|token key"""
+        return self._tokens.get(key)
+
+    def latest(self, key: str) -> Optional[np.void]:
+        """Live view of the latest snapshot record"""
+        ticks = self._tokens.get(key)
+        return ticks.latest if ticks else None
+
+    def last_price(self, key: str) -> Optional[float]:
+        """Latest traded price for a key"""
+        ticks = self._tokens.get(key)
+        return ticks.get('lp') if ticks else None
+
+    def age(self, key: str) -> Optional[float]:
+        """Seconds since the last tick for a key, or None if it never ticked"""
+        ticks = self._tokens.get(key)
+        if ticks is None or not ticks.count:
+            return None
+        return time.monotonic() - ticks.received
+
+    def remove(self, key: str) -> None:
+        """Drop a token (e.g. after unsubscribing)"""
+        with self._lock:
+            self._tokens.pop(key, None)
@@ -21,7 +21,8 @@ from trading.websocket_manager import WebSocketManager
 from trading.position_manager import PositionManager
 from market_data.symbol_manager import SymbolManager
 from market_data.expiry_manager import ExpiryManager
-from logger import applicationLogger
+from market_data.tick_store import TickStore
+from logger import applicationLogger, TICK, TickLine
 
 class WebSocketPriceHandler(QObject):
     """Handles WebSocket price updates for PyQt6"""
@@ -29,40 +30,27 @@ class WebSocketPriceHandler(QObject):
     price_updated = pyqtSignal(str, float)  # symbol, price
     quote_updated = pyqtSignal(dict)  # full quote data
     
-    def __init__(self):
+    def __init__(self, tick_store=None, update_tick=None):
         super().__init__()
         self.subscribed_symbols = {}
-        self.current_prices = {}
+        self.tick_store = tick_store or TickStore()
+        # Merges a tick into the store and everything fed from it (positions, option chains)
+        self.update_tick = update_tick or self.tick_store.update
     
     def handle_quote_update(self, tick_data):
         """Handle quote updates from WebSocket"""
         try:
-            # Debug: Log all tick data received
-            applicationLogger.info(f"🔍 WebSocket Tick Data Received: {tick_data}")
-            applicationLogger.info(f"🔍 Tick Data Type: {type(tick_data)}")
-            applicationLogger.info(f"🔍 Tick Data Keys: {list(tick_data.keys()) if isinstance(tick_data, dict) else 'Not a dict'}")
+            applicationLogger.info("%s", TickLine(tick_data), extra=TICK)
             
             if isinstance(tick_data, dict):
-                # Log specific fields
-                applicationLogger.info(f"🔍 Message Type (t): {tick_data.get('t', 'Not found')}")
-                applicationLogger.info(f"🔍 Symbol (tsym): {tick_data.get('tsym', 'Not found')}")
-                applicationLogger.info(f"🔍 Last Price (lp): {tick_data.get('lp', 'Not found')}")
-                applicationLogger.info(f"🔍 Exchange (e): {tick_data.get('e', 'Not found')}")
-                applicationLogger.info(f"🔍 Token (tk): {tick_data.get('tk', 'Not found')}")
-                
-                if 'lp' in tick_data:  # Last price
-                    symbol = tick_data.get('tsym', 'Unknown')
-                    price = float(tick_data.get('lp', 0))
-                    
-                    applicationLogger.info(f"✅ Processing price update: {symbol} = {price}")
+                ticks = self.update_tick(tick_data)
+                if ticks and 'lp' in tick_data:  # Last price
+                    # Partial touchline updates omit the symbol; the store remembers it
+                    symbol = ticks.tsym or tick_data.get('tsym', 'Unknown')
+                    price = ticks.get('lp')
                     
-                    self.current_prices[symbol] = price
                     self.price_updated.emit(symbol, price)
                     self.quote_updated.emit(tick_data)
-                    
-                    applicationLogger.info(f"✅ Price update emitted: {symbol} = {price}")
-                else:
-                    applicationLogger.warning(f"⚠️ No 'lp' field in tick data: {tick_data}")
             else:
                 applicationLogger.warning(f"⚠️ Tick data is not a dictionary: {tick_data}")
                 
@@ -84,12 +72,14 @@ class ModernTradingApp(QMainWindow):
         self.account_manager = AccountManager()
         self.order_manager = OrderManager()
         self.websocket_manager = WebSocketManager(self.account_manager, self.order_manager, self)
-        self.position_manager = PositionManager()
-        self.symbol_manager = SymbolManager()
+        self.position_manager = PositionManager(self.websocket_manager.position_engine)
+        self.symbol_manager = SymbolManager(self.websocket_manager.tick_store)
+        self.websocket_manager.position_engine.instruments = self.symbol_manager
         self.expiry_manager = ExpiryManager()
         
         # Initialize WebSocket price handler
-        self.price_handler = WebSocketPriceHandler()
+        self.price_handler = WebSocketPriceHandler(self.websocket_manager.tick_store,
+                                                   self.websocket_manager.handle_quote)
         self.price_handler.price_updated.connect(self.update_live_price)
         self.price_handler.quote_updated.connect(self.update_quote_display)
         
@@ -747,8 +737,6 @@ class ModernTradingApp(QMainWindow):
             
             def quote_update_callback(tick_data):
                 """Handle quote updates with price display"""
-                applicationLogger.info(f"📊 Quote update received: {tick_data}")
-                applicationLogger.info(f"📊 Quote update type: {type(tick_data)}")
                 # Handle price updates for PyQt6
                 self.price_handler.handle_quote_update(tick_data)
             
@@ -831,59 +819,17 @@ class ModernTradingApp(QMainWindow):
         applicationLogger.info(f"🔗 Concatenate values - Index: {index}, Expiry: {expiry}, Strike: {strike}, Option: {option}")
         
         if all([index, expiry, strike, option]):
-            if index == "SENSEX":
-                trading_symbol = self._generate_sensex_symbol(expiry, strike, option)
-                applicationLogger.info(f"🔗 Generated SENSEX symbol: {trading_symbol}")
-            else:
-                trading_symbol = f"{index}{expiry}{option}{strike}"
-                applicationLogger.info(f"🔗 Generated symbol: {trading_symbol}")
+            trading_symbol = self.symbol_manager.option_symbol(index, expiry, strike, option)
+            applicationLogger.info(f"🔗 Generated symbol: {trading_symbol}")
+            
+            # Pre-serialize order payloads so the click path only splices price/qty
+            apis = [self.account_manager.get_api(i) for i in self.account_manager.get_all_active_accounts()]
+            self.order_manager.prepare_order_templates(apis, trading_symbol)
             return trading_symbol
         else:
             applicationLogger.warning(f"⚠️ Missing values for symbol generation - Index: {index}, Expiry: {expiry}, Strike: {strike}, Option: {option}")
         return ""
     
-    def _generate_sensex_symbol(self, expiry, strike, option):
-        """Generate SENSEX symbol"""
-        try:
-            if len(expiry) == 7:  # Daily expiry like "11SEP25"
-                day = expiry[:2]
-                month = expiry[2:5]
-                year = expiry[5:]
-                
-                month_num = datetime.strptime(month, '%b').month
-                year_full = 2000 + int(year)
-                day_num = int(day)
-                
-                # Check if it's the last Friday of the month
-                import calendar
-                last_day = calendar.monthrange(year_full, month_num)[1]
-                last_friday = self._get_last_friday(year_full, month_num)
-                
-                if day_num == last_friday.day:
-                    return f"SENSEX{year}{month}{strike}{option}"
-                else:
-                    return f"SENSEX{year}{month_num:d}{day_num:02d}{strike}{option}"
-            else:
-                return f"SENSEX{expiry}{strike}{option}"
-        except Exception as e:
-            applicationLogger.error(f"Error generating SENSEX symbol: {e}")
-            return f"SENSEX{expiry}{strike}{option}"
-    
-    def _get_last_friday(self, year, month):
-        """Get the last Friday of the month"""
-        import calendar
-        from datetime import timedelta
-        
-        last_day = calendar.monthrange(year, month)[1]
-        last_date = datetime(year, month, last_day)
-        
-        days_back = (last_date.weekday() - 4) % 7
-        if days_back == 0 and last_date.weekday() != 4:
-            days_back = 7
-        last_friday = last_date - timedelta(days=days_back)
-        
-        return last_friday
-    
     def fetch_price(self):
         """Fetch current price for selected symbol"""
         try:
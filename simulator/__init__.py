@@ -0,0 +1,3 @@
+"""
+Local Noren stand-in (REST + WebSocket) for offline load testing
+"""
@@ -0,0 +1,276 @@
+"""
+Simple order matching engine behind the Noren stand-in
+"""
+import itertools
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from config import Config
+
+TICK_SIZE = 0.05
+STARTING_CASH = 1000000.0  # Opening cash of every simulated account
+
+# Seed prices so index quotes look plausible
+INDEX_PRICES = {'SENSEX': 81000.0, 'NIFTY': 25000.0, 'BANKNIFTY': 55000.0}
+
+def _round_tick(price: float) -> float:
+    return round(round(price / TICK_SIZE) * TICK_SIZE, 2)
+
+def _fmt(value: float) -> str:
+    return f"{value:.2f}"
+
+class MatchingEngine:
+    """
+    Instruments, orders and positions for simulated accounts
+
+    Every mutating call returns the order-update events ('om' messages) it
+    produced, in order; the server decides when to deliver them.
+    """
+
+    def __init__(self, seed: int = None, volatility: float = 0.0005):
+        self.random = random.Random(seed)
+        self.volatility = volatility
+        self.instruments: Dict[str, Dict[str, Any]] = {}  # exch|token -> instrument
+        self._by_symbol: Dict[Tuple[str, str], str] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self._open: Dict[str, Dict[str, Dict[str, Any]]] = {}  # exch|token -> open orders
+        self.positions: Dict[Tuple[str, str, str, str], Dict[str, float]] = {}
+        self._order_seq = itertools.count(int(time.strftime('%y%m%d')) * 10 ** 8 + 1)
+        self._token_seq = itertools.count(900000)
+        self._lock = threading.RLock()
+
+        for name, index in Config.INDEX_TOKENS.items():
+            self.add_instrument(index['exchange'], index['token'], index['name'], INDEX_PRICES.get(name, 1000.0))
+
+    # ----- instruments -----
+
+    def add_instrument(self, exchange: str, token: str, tsym: str, price: float, lot_size: int = 1) -> Dict[str, Any]:
+        """Register an instrument with a starting price"""
+        key = f"{exchange}|{token}"
+        with self._lock:
+            price = _round_tick(price)
+            instrument = {
+                'exch': exchange, 'token': str(token), 'tsym': tsym, 'ls': lot_size,
+                'lp': price, 'c': price, 'o': price, 'h': price, 'l': price, 'v': 0, 'ltq': 0, 'oi': 0,
+                'ft': int(time.time())
+            }
+            self._set_touch(instrument)
+            self.instruments[key] = instrument
+            self._by_symbol[(exchange, tsym)] = key
+        return instrument
+
+    def resolve(self, exchange: str, tsym: str) -> Dict[str, Any]:
+        """Instrument for a trading symbol, created on first use with a made-up price"""
+        with self._lock:
+            key = self._by_symbol.get((exchange, tsym))
+            if key:
+                return self.instruments[key]
+            price = 50 + (sum(map(ord, tsym)) % 400)
+            return self.add_instrument(exchange, str(next(self._token_seq)), tsym, price)
+
+    def instrument(self, exchange: str, token: str) -> Dict[str, Any]:
+        """Instrument by token, created on first use"""
+        with self._lock:
+            instrument = self.instruments.get(f"{exchange}|{token}")
+            if instrument is None:
+                instrument = self.add_instrument(exchange, token, str(token), 100.0)
+            return instrument
+
+    @staticmethod
+    def _set_touch(instrument: Dict[str, Any]):
+        instrument['bp1'] = _round_tick(instrument['lp'] - TICK_SIZE)
+        instrument['sp1'] = _round_tick(instrument['lp'] + TICK_SIZE)
+
+    def quote(self, instrument: Dict[str, Any]) -> Dict[str, Any]:
+        """GetQuotes / touchline acknowledgement fields"""
+        lp = instrument['lp']
+        close = instrument['c']
+        return {
+            'exch': instrument['exch'], 'e': instrument['exch'], 'tk': instrument['token'], 'token': instrument['token'],
+            'tsym': instrument['tsym'], 'ts': instrument['tsym'], 'ls': str(instrument['ls']), 'ti': _fmt(TICK_SIZE),
+            'lp': _fmt(lp), 'c': _fmt(close), 'o': _fmt(instrument['o']), 'h': _fmt(instrument['h']),
+            'l': _fmt(instrument['l']), 'pc': _fmt((lp - close) / close * 100 if close else 0.0),
+            'v': str(instrument['v']), 'ltq': str(instrument['ltq']), 'oi': str(instrument['oi']),
+            'bp1': _fmt(instrument['bp1']), 'sp1': _fmt(instrument['sp1']), 'bq1': '500', 'sq1': '500',
+            'ft': str(instrument['ft'])
+        }
+
+    def step(self, keys) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Random-walk instruments and match resting orders against the new touch
+
+        Args:
+            keys: exch|token keys to move
+
+        Returns:
+            (touchline 'tf' updates, order events)
+        """
+        ticks, events = [], []
+        with self._lock:
+            for key in keys:
+                instrument = self.instruments.get(key)
+                if instrument is None:
+                    continue
+                move = instrument['lp'] * self.volatility * self.random.gauss(0, 1)
+                lp = max(TICK_SIZE, _round_tick(instrument['lp'] + move))
+                ltq = self.random.randint(1, 20) * instrument['ls']
+                instrument.update(lp=lp, ltq=ltq, v=instrument['v'] + ltq, ft=int(time.time()),
+                                  h=max(instrument['h'], lp), l=min(instrument['l'], lp))
+                self._set_touch(instrument)
+                close = instrument['c']
+                ticks.append({
+                    't': 'tf', 'e': instrument['exch'], 'tk': instrument['token'], 'lp': _fmt(lp),
+                    'pc': _fmt((lp - close) / close * 100 if close else 0.0), 'v': str(instrument['v']),
+                    'ltq': str(ltq), 'bp1': _fmt(instrument['bp1']), 'sp1': _fmt(instrument['sp1']),
+                    'ft': str(instrument['ft'])
+                })
+                for order in list(self._open.get(key, {}).values()):
+                    events.extend(self._try_fill(order, instrument))
+        return ticks, events
+
+    # ----- orders -----
+
+    def _event(self, order: Dict[str, Any], report_type: str, **extra) -> Dict[str, Any]:
+        event = dict(order)
+        event.update(t='om', reporttype=report_type, norentm=time.strftime('%H:%M:%S %d-%m-%Y'), **extra)
+        return event
+
+    def _try_fill(self, order: Dict[str, Any], instrument: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fill an open order in full if it crosses the touch"""
+        price = float(order['prc'] or 0)
+        if order['trantype'] == 'B':
+            touch = instrument['sp1']
+            crosses = order['prctyp'] == 'MKT' or price >= touch
+        else:
+            touch = instrument['bp1']
+            crosses = order['prctyp'] == 'MKT' or price <= touch
+        if not crosses:
+            return []
+
+        qty = int(order['qty'])
+        order.update(status='COMPLETE', flqty=str(qty), fillshares=str(qty), flprc=_fmt(touch), avgprc=_fmt(touch))
+        self._open.get(f"{order['exch']}|{order['token']}", {}).pop(order['norenordno'], None)
+        self._book_fill(order, qty, touch)
+        return [self._event(order, 'Fill', flid=str(next(self._token_seq)))]
+
+    def _book_fill(self, order: Dict[str, Any], qty: int, price: float):
+        key = (order['actid'], order['exch'], order['tsym'], order['pcode'])
+        position = self.positions.setdefault(key, {'token': order['token'], 'buyqty': 0, 'buyamt': 0.0,
+                                                   'sellqty': 0, 'sellamt': 0.0})
+        if order['trantype'] == 'B':
+            position['buyqty'] += qty
+            position['buyamt'] += qty * price
+        else:
+            position['sellqty'] += qty
+            position['sellamt'] += qty * price
+
+    def place(self, session: Dict[str, str], params: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]], str]:
+        """
+        Accept a PlaceOrder request
+
+        Returns:
+            (norenordno or None, events, error message)
+        """
+        try:
+            qty = int(params.get('qty', 0))
+        except ValueError:
+            qty = 0
+        if qty <= 0 or params.get('trantype') not in ('B', 'S'):
+            return None, [], 'Invalid Input : qty/trantype'
+
+        with self._lock:
+            instrument = self.resolve(params.get('exch', 'NFO'), params.get('tsym', ''))
+            norenordno = str(next(self._order_seq))
+            order = {
+                'norenordno': norenordno, 'uid': session['uid'], 'actid': params.get('actid') or session['uid'],
+                'exch': instrument['exch'], 'tsym': instrument['tsym'], 'token': instrument['token'],
+                'trantype': params['trantype'], 'qty': str(qty), 'prc': params.get('prc', '0'),
+                'prctyp': params.get('prctyp', 'LMT'), 'pcode': params.get('prd', 'I'), 'ret': params.get('ret', 'DAY'),
+                'remarks': params.get('remarks') or '', 'dscqty': params.get('dscqty', '0'), 'exchordid': '',
+                'rejreason': '', 'status': 'PENDING'
+            }
+            self.orders[norenordno] = order
+            events = [self._event(order, 'NewAck')]
+            order.update(status='OPEN', exchordid=str(10 ** 15 + int(norenordno) % 10 ** 9))
+            events.append(self._event(order, 'New'))
+            self._open.setdefault(f"{instrument['exch']}|{instrument['token']}", {})[norenordno] = order
+            events.extend(self._try_fill(order, instrument))
+        return norenordno, events, ''
+
+    def _owned_open(self, session: Dict[str, str], norenordno: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        order = self.orders.get(str(norenordno))
+        if order is None or order['uid'] != session['uid']:
+            return None, 'Order not found'
+        if order['status'] != 'OPEN':
+            return None, f"Order is {order['status']}"
+        return order, ''
+
+    def modify(self, session: Dict[str, str], params: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]], str]:
+        """Accept a ModifyOrder request"""
+        with self._lock:
+            order, error = self._owned_open(session, params.get('norenordno'))
+            if order is None:
+                return None, [], error
+            events = [self._event(order, 'ModAck', status='PENDING')]
+            if params.get('qty'):
+                order['qty'] = str(params['qty'])
+            if params.get('prc') is not None:
+                order['prc'] = str(params['prc'])
+            if params.get('prctyp'):
+                order['prctyp'] = params['prctyp']
+            events.append(self._event(order, 'Replaced'))
+            events.extend(self._try_fill(order, self.instruments[f"{order['exch']}|{order['token']}"]))
+        return order['norenordno'], events, ''
+
+    def cancel(self, session: Dict[str, str], params: Dict[str, Any]) -> Tuple[Optional[str], List[Dict[str, Any]], str]:
+        """Accept a CancelOrder request"""
+        with self._lock:
+            order, error = self._owned_open(session, params.get('norenordno'))
+            if order is None:
+                return None, [], error
+            events = [self._event(order, 'PendingCancel', status='PENDING')]
+            order['status'] = 'CANCELED'
+            self._open.get(f"{order['exch']}|{order['token']}", {}).pop(order['norenordno'], None)
+            events.append(self._event(order, 'Canceled'))
+        return order['norenordno'], events, ''
+
+    def order_book(self, uid: str) -> List[Dict[str, Any]]:
+        """Orders of a user, newest first"""
+        with self._lock:
+            orders = [dict(order, stat='Ok') for order in self.orders.values() if order['uid'] == uid]
+        return list(reversed(orders))
+
+    def position_book(self, actid: str) -> List[Dict[str, Any]]:
+        """Net positions of an account with realized and unrealized P&L"""
+        rows = []
+        with self._lock:
+            for (owner, exch, tsym, prd), position in self.positions.items():
+                if owner != actid:
+                    continue
+                buyqty, sellqty = position['buyqty'], position['sellqty']
+                buyavg = position['buyamt'] / buyqty if buyqty else 0.0
+                sellavg = position['sellamt'] / sellqty if sellqty else 0.0
+                netqty = buyqty - sellqty
+                lp = self.instruments[f"{exch}|{position['token']}"]['lp']
+                closed = min(buyqty, sellqty)
+                rpnl = closed * (sellavg - buyavg)
+                netavg = buyavg if netqty > 0 else sellavg if netqty < 0 else 0.0
+                urmtom = netqty * (lp - netavg)
+                rows.append({
+                    'stat': 'Ok', 'uid': owner, 'actid': owner, 'exch': exch, 'tsym': tsym, 'token': position['token'],
+                    'prd': prd, 's_prdt_ali': prd, 'netqty': str(netqty), 'netavgprc': _fmt(netavg),
+                    'daybuyqty': str(buyqty), 'daysellqty': str(sellqty), 'daybuyavgprc': _fmt(buyavg),
+                    'daysellavgprc': _fmt(sellavg), 'daybuyamt': _fmt(position['buyamt']),
+                    'daysellamt': _fmt(position['sellamt']), 'lp': _fmt(lp), 'rpnl': _fmt(rpnl),
+                    'urmtom': _fmt(urmtom), 'ls': '1', 'ti': _fmt(TICK_SIZE)
+                })
+        return rows
+
+    def limits(self, actid: str) -> Dict[str, Any]:
+        """Cash and margin of an account; margin is the marked value of its open positions"""
+        used = sum(abs(int(row['netqty'])) * float(row['lp']) for row in self.position_book(actid))
+        return {
+            'stat': 'Ok', 'actid': actid, 'prfname': 'SIM', 'cash': _fmt(STARTING_CASH), 'payin': '0.00',
+            'marginused': _fmt(used), 'request_time': time.strftime('%H:%M:%S %d-%m-%Y')
+        }
@@ -0,0 +1,422 @@
+"""
+Local stand-in for the Noren REST and WebSocket endpoints
+"""
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import secrets
+import struct
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Set
+from config import Config
+from logger import applicationLogger
+from simulator.matching_engine import MatchingEngine
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+def _encode_frame(payload: bytes, opcode: int = OP_TEXT) -> bytes:
+    """Unmasked server-to-client WebSocket frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+def _read_frame(rfile):
+    """Read one (unfragmented) client frame; returns (opcode, payload) or None on EOF"""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+    opcode = head[0] & 0x0F
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', rfile.read(8))[0]
+    mask = rfile.read(4) if head[1] & 0x80 else None
+    payload = rfile.read(length)
+    if mask:
+        key = (mask * (length // 4 + 1))[:length]
+        payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+    return opcode, payload
+
+class _Scheduler:
+    """Single thread running delayed calls in time order"""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="StandInScheduler", daemon=True)
+        self._thread.start()
+
+    def call_at(self, when: float, fn, *args):
+        with self._cond:
+            heapq.heappush(self._heap, (when, next(self._seq), fn, args))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, fn, args = heapq.heappop(self._heap)
+            try:
+                fn(*args)
+            except Exception as e:
+                applicationLogger.error(f"[STANDIN] Scheduled call failed: {e}")
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+class _WsClient:
+    """One WebSocket connection"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.uid: Optional[str] = None
+        self.touchline: Set[str] = set()
+        self.depth: Set[str] = set()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message: Dict[str, Any], opcode: int = OP_TEXT):
+        payload = message if isinstance(message, bytes) else json.dumps(message).encode('utf-8')
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self.handler.wfile.write(_encode_frame(payload, opcode))
+                self.handler.wfile.flush()
+            except OSError:
+                self.closed = True
+
+class NorenStandInHandler(BaseHTTPRequestHandler):
+    """REST routes over HTTP/1.1 keep-alive plus the WebSocket upgrade"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'NorenStandIn/1.0'
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40 ms per call
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def standin(self) -> 'NorenStandIn':
+        return self.server.standin
+
+    def _send_json(self, body, status: int = 200):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        route = self.path.rstrip('/').rsplit('/', 1)[-1]
+
+        token = None
+        if body.startswith('jData='):
+            split = body.rfind('&jKey=')
+            raw, token = (body[6:split], body[split + 6:]) if split >= 0 else (body[6:], None)
+        else:
+            raw = body
+        try:
+            params = json.loads(raw) if raw else {}
+        except ValueError:
+            params = json.loads(urllib.parse.unquote_plus(raw))
+
+        self.standin.rest_delay()
+        self._send_json(self.standin.handle_rest(route, params, token))
+
+    def do_GET(self):
+        if self.headers.get('Upgrade', '').lower() != 'websocket':
+            self._send_json({'stat': 'Not_Ok', 'emsg': 'Use POST'}, status=405)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((self.headers['Sec-WebSocket-Key'] + WS_GUID).encode()).digest())
+        self.send_response_only(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept.decode())
+        self.end_headers()
+        self.wfile.flush()
+
+        client = _WsClient(self)
+        self.standin.add_client(client)
+        try:
+            while True:
+                frame = _read_frame(self.rfile)
+                if frame is None:
+                    break
+                opcode, payload = frame
+                if opcode == OP_CLOSE:
+                    client.send(payload, OP_CLOSE)
+                    break
+                if opcode == OP_PING:
+                    client.send(payload, OP_PONG)
+                elif opcode == OP_TEXT:
+                    self.standin.handle_ws(client, json.loads(payload))
+        except (OSError, ValueError):
+            pass
+        finally:
+            client.closed = True
+            self.standin.remove_client(client)
+            self.close_connection = True
+
+class NorenStandIn:
+    """
+    Noren REST + WebSocket stand-in with a matching engine
+
+    Point ShoonyaApiPy at rest_url/ws_url (or set Config.API_HOST and
+    Config.WEBSOCKET_URL) and any user id/password logs in.
+    """
+
+    def __init__(self, host: str = None, port: int = None, rest_latency_ms: float = None,
+                 ws_latency_ms: float = None, jitter_ms: float = None, tick_interval: float = None,
+                 seed: int = None):
+        self.host = host or Config.SIMULATOR_HOST
+        self.port = Config.SIMULATOR_PORT if port is None else port
+        self.rest_latency = (Config.SIMULATOR_REST_LATENCY_MS if rest_latency_ms is None else rest_latency_ms) / 1000
+        self.ws_latency = (Config.SIMULATOR_WS_LATENCY_MS if ws_latency_ms is None else ws_latency_ms) / 1000
+        self.jitter = (Config.SIMULATOR_JITTER_MS if jitter_ms is None else jitter_ms) / 1000
+        self.tick_interval = Config.SIMULATOR_TICK_INTERVAL if tick_interval is None else tick_interval
+        self.engine = MatchingEngine(seed=seed)
+        self.sessions: Dict[str, str] = {}  # susertoken -> uid
+        self.clients: List[_WsClient] = []
+        self.stats = {'rest_calls': 0, 'orders': 0, 'ws_messages': 0}
+        self._random = random.Random(seed)
+        self._last_delivery: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._scheduler = None
+        self._server = None
+
+    @property
+    def rest_url(self) -> str:
+        return f"http://{self.host}:{self.port}/NorenWClientTP/"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/NorenWSTP/"
+
+    def start(self) -> 'NorenStandIn':
+        """Start serving in background threads"""
+        self._server = ThreadingHTTPServer((self.host, self.port), NorenStandInHandler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self.port = self._server.server_address[1]
+        self._scheduler = _Scheduler()
+        threading.Thread(target=self._server.serve_forever, name="StandInHTTP", daemon=True).start()
+        if self.tick_interval:
+            threading.Thread(target=self._tick_loop, name="StandInTicks", daemon=True).start()
+        applicationLogger.info(f"[STANDIN] Noren stand-in listening on {self.rest_url} and {self.ws_url}")
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._scheduler:
+            self._scheduler.stop()
+
+    def _delay(self, base: float) -> float:
+        return max(0.0, base + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0))
+
+    def rest_delay(self):
+        """Simulated exchange-side processing time for a REST call"""
+        delay = self._delay(self.rest_latency)
+        if delay:
+            time.sleep(delay)
+
+    # ----- REST -----
+
+    def handle_rest(self, route: str, params: Dict[str, Any], token: Optional[str]):
+        """Dispatch one REST call; returns the JSON-able response"""
+        self.stats['rest_calls'] += 1
+        if route == 'QuickAuth':
+            uid = params.get('uid')
+            if not uid:
+                return {'stat': 'Not_Ok', 'emsg': 'Invalid Input : uid'}
+            susertoken = secrets.token_hex(32)
+            with self._lock:
+                self.sessions[susertoken] = uid
+            return {'stat': 'Ok', 'susertoken': susertoken, 'uname': f"SIM {uid}", 'actid': uid,
+                    'request_time': time.strftime('%H:%M:%S %d-%m-%Y'), 'brkname': 'STANDIN'}
+
+        uid = self.sessions.get(token)
+        if uid is None:
+            return {'stat': 'Not_Ok', 'emsg': 'Session Expired :  Invalid Session Key'}
+        session = {'uid': uid}
+        if 'tsym' in params:
+            params['tsym'] = urllib.parse.unquote_plus(params['tsym'])
+
+        if route == 'PlaceOrder':
+            self.stats['orders'] += 1
+            norenordno, events, error = self.engine.place(session, params)
+            self.publish(uid, events)
+            if norenordno is None:
+                return {'stat': 'Not_Ok', 'emsg': error}
+            return {'stat': 'Ok', 'norenordno': norenordno, 'request_time': time.strftime('%H:%M:%S %d-%m-%Y')}
+
+        if route in ('ModifyOrder', 'CancelOrder'):
+            action = self.engine.modify if route == 'ModifyOrder' else self.engine.cancel
+            norenordno, events, error = action(session, params)
+            self.publish(uid, events)
+            if norenordno is None:
+                return {'stat': 'Not_Ok', 'emsg': error}
+            return {'stat': 'Ok', 'result': norenordno, 'request_time': time.strftime('%H:%M:%S %d-%m-%Y')}
+
+        if route == 'GetQuotes':
+            quote = self.engine.quote(self.engine.instrument(params.get('exch', 'NSE'), str(params.get('token'))))
+            return dict(quote, stat='Ok')
+
+        if route == 'OrderBook':
+            return self.engine.order_book(uid) or {'stat': 'Not_Ok', 'emsg': 'no data'}
+
+        if route == 'PositionBook':
+            return self.engine.position_book(params.get('actid') or uid) or {'stat': 'Not_Ok', 'emsg': 'no data'}
+
+        if route == 'Limits':
+            return self.engine.limits(params.get('actid') or uid)
+
+        if route == 'Logout':
+            with self._lock:
+                self.sessions.pop(token, None)
+            return {'stat': 'Ok'}
+
+        return {'stat': 'Not_Ok', 'emsg': f"{route} is not supported by the stand-in"}
+
+    # ----- WebSocket -----
+
+    def add_client(self, client: _WsClient):
+        with self._lock:
+            self.clients.append(client)
+
+    def remove_client(self, client: _WsClient):
+        with self._lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def handle_ws(self, client: _WsClient, message: Dict[str, Any]):
+        """Handle a client WebSocket message"""
+        self.stats['ws_messages'] += 1
+        msg_type = message.get('t')
+        if msg_type == 'c':
+            uid = self.sessions.get(message.get('susertoken'))
+            if uid is None or uid != message.get('uid'):
+                client.send({'t': 'ck', 's': 'NOT_OK', 'uid': message.get('uid')})
+                return
+            client.uid = uid
+            client.send({'t': 'ck', 's': 'OK', 'uid': uid})
+        elif client.uid is None:
+            return
+        elif msg_type in ('t', 'd'):
+            subscriptions = client.touchline if msg_type == 't' else client.depth
+            for key in filter(None, message.get('k', '').split('#')):
+                exchange, _, token = key.partition('|')
+                instrument = self.engine.instrument(exchange, token)
+                subscriptions.add(f"{instrument['exch']}|{instrument['token']}")
+                client.send(dict(self.engine.quote(instrument), t=msg_type + 'k'))
+        elif msg_type in ('u', 'ud'):
+            subscriptions = client.touchline if msg_type == 'u' else client.depth
+            for key in filter(None, message.get('k', '').split('#')):
+                subscriptions.discard(key)
+            client.send({'t': msg_type + 'k', 'k': message.get('k', '')})
+        elif msg_type == 'o':
+            client.send({'t': 'ok'})
+
+    def publish(self, uid: str, events: List[Dict[str, Any]]):
+        """Deliver order events to the user's sockets after the WebSocket latency, in order"""
+        if not events:
+            return
+        with self._lock:
+            when = max(time.monotonic() + self._delay(self.ws_latency), self._last_delivery.get(uid, 0.0))
+            self._last_delivery[uid] = when
+        self._scheduler.call_at(when, self._deliver, uid, events)
+
+    def _deliver(self, uid: str, events: List[Dict[str, Any]]):
+        with self._lock:
+            targets = [client for client in self.clients if client.uid == uid]
+        for event in events:
+            payload = json.dumps(event).encode('utf-8')
+            for client in targets:
+                client.send(payload)
+
+    def _tick_loop(self):
+        """Move subscribed instruments, push touchline updates and match resting orders"""
+        while not self._stop.wait(self.tick_interval):
+            with self._lock:
+                clients = list(self.clients)
+            keys = set()
+            for client in clients:
+                keys |= client.touchline | client.depth
+            ticks, events = self.engine.step(keys)
+
+            for tick in ticks:
+                key = f"{tick['e']}|{tick['tk']}"
+                payload = json.dumps(tick).encode('utf-8')
+                depth_payload = None
+                for client in clients:
+                    if key in client.touchline:
+                        client.send(payload)
+                    if key in client.depth:
+                        depth_payload = depth_payload or json.dumps(dict(tick, t='df')).encode('utf-8')
+                        client.send(depth_payload)
+
+            by_user: Dict[str, List[Dict[str, Any]]] = {}
+            for event in events:
+                by_user.setdefault(event['uid'], []).append(event)
+            for uid, user_events in by_user.items():
+                self.publish(uid, user_events)
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the local Noren stand-in")
+    parser.add_argument('--port', type=int, default=Config.SIMULATOR_PORT)
+    parser.add_argument('--rest-latency-ms', type=float, default=Config.SIMULATOR_REST_LATENCY_MS)
+    parser.add_argument('--ws-latency-ms', type=float, default=Config.SIMULATOR_WS_LATENCY_MS)
+    parser.add_argument('--jitter-ms', type=float, default=Config.SIMULATOR_JITTER_MS)
+    parser.add_argument('--tick-interval', type=float, default=Config.SIMULATOR_TICK_INTERVAL)
+    args = parser.parse_args()
+
+    standin = NorenStandIn(port=args.port, rest_latency_ms=args.rest_latency_ms, ws_latency_ms=args.ws_latency_ms,
+                           jitter_ms=args.jitter_ms, tick_interval=args.tick_interval).start()
+    print(f"REST: {standin.rest_url}\nWebSocket: {standin.ws_url}\nCtrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        standin.stop()
@@ -0,0 +1,62 @@
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from market_data.option_greeks import black76_price, spot_greeks, chain_greeks
+
+#bump-and-reprice check of the spot Greeks the option chain shows (no credentials, no network)
+
+def spot_price(spot, strike, t, sigma, rate, is_call):
+    return black76_price(spot * np.exp(rate * t), strike, t, sigma, rate, is_call)
+
+def main():
+    rng = np.random.default_rng(7)
+    n = 2000
+    spot = np.full(n, 25000.0)
+    strikes = rng.uniform(22000, 28000, n).round(-2)
+    t = rng.uniform(2, 60, n) / 365
+    sigma = rng.uniform(0.1, 0.4, n)
+    rate = 0.065
+    is_call = rng.random(n) < 0.5
+
+    result = spot_greeks(spot, strikes, t, sigma, rate, is_call)
+
+    #delta: central difference in spot (wide enough to sit above the CDF approximation noise)
+    bump = spot * 1e-3
+    delta = (spot_price(spot + bump, strikes, t, sigma, rate, is_call) -
+             spot_price(spot - bump, strikes, t, sigma, rate, is_call)) / (2 * bump)
+
+    #gamma: central difference of the analytic delta (smooth, so a finer bump)
+    fine = spot * 1e-5
+    gamma = (spot_greeks(spot + fine, strikes, t, sigma, rate, is_call)['delta'] -
+             spot_greeks(spot - fine, strikes, t, sigma, rate, is_call)['delta']) / (2 * fine)
+
+    #theta: price change over one calendar day with spot held, per day
+    day = 1 / 365
+    theta = (spot_price(spot, strikes, t - day / 100, sigma, rate, is_call) -
+             spot_price(spot, strikes, t + day / 100, sigma, rate, is_call)) * 50
+
+    #vega: per volatility point
+    vega = (spot_price(spot, strikes, t, sigma + 1e-4, rate, is_call) -
+            spot_price(spot, strikes, t, sigma - 1e-4, rate, is_call)) / 2e-4 / 100
+
+    errors = {
+        'delta': np.max(np.abs(result['delta'] - delta)),
+        'gamma': np.max(np.abs(result['gamma'] - gamma) / np.maximum(np.abs(gamma), 1e-5)),
+        'theta': np.max(np.abs(result['theta'] - theta) / np.maximum(np.abs(theta), 1e-2)),
+        'vega': np.max(np.abs(result['vega'] - vega) / np.maximum(np.abs(vega), 1e-2)),
+    }
+    for name, error in errors.items():
+        print(f'{name}: max error {error:.2e}')
+
+    #chain_greeks recovers the volatility and reports the same spot Greeks
+    prices = np.stack([spot_price(25000.0, strikes[:20], 0.05, 0.2, rate, True),
+                       spot_price(25000.0, strikes[:20], 0.05, 0.2, rate, False)], axis=1)
+    chain = chain_greeks(25000.0, strikes[:20], prices, 0.05, rate)
+    print(f"chain iv max error {np.nanmax(np.abs(chain['iv'] - 0.2)):.2e}, "
+          f"put-call delta gap {np.nanmax(np.abs(chain['delta'][:, 0] - chain['delta'][:, 1] - 1)):.2e}")
+
+    ok = errors['delta'] < 5e-4 and all(errors[name] < 1e-3 for name in ('gamma', 'theta', 'vega'))
+    print('PASS' if ok else 'FAIL')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tempfile
+from trading.order_journal import OrderJournal
+from trading.order_store import OrderStore
+
+#crash-safety check: a torn last record must not swallow the next event appended after restart
+
+def main():
+    folder = tempfile.mkdtemp()
+    journal_path = os.path.join(folder, 'orders.journal')
+    snapshot_path = os.path.join(folder, 'orders.csv')
+
+    journal = OrderJournal(journal_path=journal_path, snapshot_path=snapshot_path)
+    journal.append({'norenordno': '1', 'status': 'OPEN'})
+    journal.close()
+
+    #simulate a crash halfway through writing the second record
+    with open(journal_path, 'a', encoding='utf-8') as file:
+        file.write('{"norenordno":"2","sta')
+
+    journal = OrderJournal(journal_path=journal_path, snapshot_path=snapshot_path)
+    store = OrderStore()
+    print(f'replayed after crash: {journal.replay(store)}')
+    journal.append({'norenordno': '3', 'status': 'OPEN'})
+    journal.close()
+
+    store = OrderStore()
+    journal = OrderJournal(journal_path=journal_path, snapshot_path=snapshot_path)
+    replayed = journal.replay(store)
+    journal.close()
+    print(f'replayed after restart: {replayed}, orders: {sorted(order["norenordno"] for order in store.all())}')
+    print('PASS' if '3' in store and '1' in store and replayed == 2 else 'FAIL')
+
+if __name__ == '__main__':
+    main()
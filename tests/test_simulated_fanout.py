@@ -0,0 +1,69 @@
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import tempfile
+import threading
+import time
+from config import Config
+from api_helper import ShoonyaApiPy
+from simulator.noren_server import NorenStandIn
+from trading.order_manager import OrderManager
+
+#load-test master->child fan-out against the local Noren stand-in (no credentials, no network)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--children', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--rest-latency-ms', type=float, default=2.0)
+    parser.add_argument('--ws-latency-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = NorenStandIn(port=0, rest_latency_ms=args.rest_latency_ms,
+                          ws_latency_ms=args.ws_latency_ms, tick_interval=0.2).start()
+
+    #one master plus N children, each with its own pooled session
+    apis = []
+    order_events = []
+    for i in range(args.children + 1):
+        api = ShoonyaApiPy(host=server.rest_url, websocket=server.ws_url)
+        ret = api.login(userid=f'SIM{i:03d}', password='pwd', twoFA='000000', vendor_code='SIM', api_secret='secret', imei='sim')
+        if not ret:
+            print(f'login failed for SIM{i:03d}')
+            return
+        opened = threading.Event()
+        api.start_websocket(order_update_callback=order_events.append, socket_open_callback=opened.set)
+        opened.wait(5)
+        apis.append(api)
+
+    order_manager = OrderManager(file_path=os.path.join(tempfile.mkdtemp(), 'orders.csv'))
+    trading_symbol = 'NIFTY25SEP25C25000'
+    order_manager.prepare_order_templates(apis, trading_symbol)
+    quantities = [75] * len(apis)
+    active = [True] * len(apis)
+
+    fanout_ms = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        futures = order_manager.submit_buy_orders(apis, quantities, trading_symbol, 1.0, active)
+        order_numbers = order_manager._wait_all(futures)
+        fanout_ms.append((time.perf_counter() - start) * 1000)
+        placed = len([no for no in order_numbers if no])
+        print(f'placed {placed}/{len(apis)} orders in {fanout_ms[-1]:.1f} ms')
+
+        futures = order_manager.submit_cancel_orders(apis, order_numbers, active)
+        order_manager._wait_all(futures)
+
+    time.sleep(0.5)
+    fanout_ms.sort()
+    print(f'accounts={len(apis)} rounds={args.rounds} fan-out p50={fanout_ms[len(fanout_ms) // 2]:.1f} ms max={fanout_ms[-1]:.1f} ms')
+    print(f'order updates received over websocket: {len(order_events)}')
+    print(f'stand-in stats: {server.stats}')
+
+    for api in apis:
+        api.close_websocket()
+        api.close_session()
+    server.stop()
+
+if __name__ == '__main__':
+    main()
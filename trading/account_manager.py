@@ -21,6 +21,7 @@ class AccountManager:
         for account_num, creds in self.credentials.items():
             try:
                 api = ShoonyaApiPy()
+                api.prewarm_connections()
                 twoFA = pyotp.TOTP(creds['factor2']).now()
                 
                 self.accounts[account_num] = {
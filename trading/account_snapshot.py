@@ -0,0 +1,232 @@
+"""
+Concurrent positions, limits and order book snapshot across accounts
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Tuple
+from config import Config
+from logger import applicationLogger
+
+# Snapshot section -> NorenApi read method
+ENDPOINTS = {
+    'positions': 'get_positions',
+    'limits': 'get_limits',
+    'orders': 'get_order_book',
+}
+
+# What an endpoint returns when the broker has nothing (NorenApi gives None for an empty list)
+EMPTY = {
+    'positions': list,
+    'limits': dict,
+    'orders': list,
+}
+
+class AccountSnapshotService:
+    """
+    Read-through TTL cache over the per-account REST books
+
+    Every (account, endpoint) fetch runs on a shared pool, so a snapshot of N
+    accounts costs one round trip of wall time. Concurrent requests for the
+    same account and endpoint share a single in-flight call.
+    """
+
+    def __init__(self, account_manager, ttl: float = None, max_workers: int = None):
+        """
+        Args:
+            account_manager: AccountManager with the logged-in APIs
+            ttl: Seconds a fetched book is served from cache (default Config.ACCOUNT_SNAPSHOT_TTL)
+            max_workers: Fetch threads (default Config.ACCOUNT_SNAPSHOT_WORKERS)
+        """
+        self.account_manager = account_manager
+        self.ttl = Config.ACCOUNT_SNAPSHOT_TTL if ttl is None else ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or Config.ACCOUNT_SNAPSHOT_WORKERS,
+                                            thread_name_prefix="AccountSnapshot")
+        self._cache: Dict[Tuple[int, str], Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple[int, str], Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'fetches': 0, 'coalesced': 0}
+
+    def _call(self, account_num: int, endpoint: str):
+        """One REST read; raises on failure so the error reaches the waiters and is never cached"""
+        try:
+            api = self.account_manager.get_api(account_num)
+            if not api:
+                raise RuntimeError("account not logged in")
+            result = getattr(api, ENDPOINTS[endpoint])()
+            if endpoint == 'limits' and (not isinstance(result, dict) or result.get('stat') != 'Ok'):
+                raise RuntimeError(result.get('emsg', 'limits not available') if isinstance(result, dict)
+                                   else 'limits not available')
+        except Exception as e:
+            applicationLogger.error(f"Error fetching {endpoint} for account {account_num}: {e}")
+            raise
+        expected = EMPTY[endpoint]
+        return result if isinstance(result, expected) else expected()
+
+    def _complete(self, key: Tuple[int, str], future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                if not future.cancelled() and future.exception() is None:
+                    self._cache[key] = (time.monotonic(), future.result())
+
+    def fetch_async(self, account_num: int, endpoint: str, max_age: float = None) -> Future:
+        """
+        Future for one account's book, served from cache when fresh enough
+
+        Args:
+            account_num: Account number
+            endpoint: 'positions', 'limits' or 'orders'
+            max_age: Oldest acceptable cached copy in seconds (default the service TTL, 0 forces a fetch)
+
+        Returns:
+            Future resolving to the book (list, or dict for limits), or raising the fetch error
+        """
+        key = (account_num, endpoint)
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] <= max_age:
+                self.stats['hits'] += 1
+                future = Future()
+                future.set_result(cached[1])
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future
+            self.stats['fetches'] += 1
+            future = self._executor.submit(self._call, account_num, endpoint)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._complete(key, done))
+        return future
+
+    def fetch(self, account_num: int, endpoint: str, max_age: float = None):
+        """Blocking fetch_async; raises if the broker could not be read"""
+        return self.fetch_async(account_num, endpoint, max_age).result()
+
+    def invalidate(self, account_num: int = None, endpoint: str = None):
+        """
+        Drop cached books so the next read goes to the broker
+
+        Args:
+            account_num: Account to drop (default all)
+            endpoint: Endpoint to drop (default all)
+        """
+        def matches(key):
+            return (account_num is None or key[0] == account_num) and (endpoint is None or key[1] == endpoint)
+        
+        with self._lock:
+            for key in [key for key in self._cache if matches(key)]:
+                del self._cache[key]
+            # A call already on the wire may predate the change; let it answer its waiters but not the cache
+            for key in [key for key in self._inflight if matches(key)]:
+                del self._inflight[key]
+
+    def snapshot_async(self, accounts: Iterable[int] = None, endpoints: Iterable[str] = None,
+                       max_age: float = None) -> Future:
+        """
+        Future for snapshot(), completed by the last book to arrive (no thread waits on it)
+
+        Args:
+            accounts: Account numbers (default all logged-in accounts)
+            endpoints: Sections to include (default all of ENDPOINTS)
+            max_age: Oldest acceptable cached copy in seconds (default the service TTL)
+
+        Returns:
+            Future resolving to the snapshot() frame
+        """
+        start = time.perf_counter()
+        accounts = list(self.account_manager.get_all_active_accounts() if accounts is None else accounts)
+        endpoints = list(ENDPOINTS if endpoints is None else endpoints)
+        futures = {(account_num, endpoint): self.fetch_async(account_num, endpoint, max_age)
+                   for account_num in accounts for endpoint in endpoints}
+
+        result = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def assemble():
+            try:
+                result.set_result(self._frame(accounts, endpoints, futures, start))
+            except Exception as e:
+                result.set_exception(e)
+
+        def on_book(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                assemble()
+
+        if not futures:
+            assemble()
+        for future in futures.values():
+            future.add_done_callback(on_book)
+        return result
+
+    def snapshot(self, accounts: Iterable[int] = None, endpoints: Iterable[str] = None,
+                 max_age: float = None) -> Dict[str, Any]:
+        """
+        One consolidated frame for every account, fetched concurrently
+
+        Args:
+            accounts: Account numbers (default all logged-in accounts)
+            endpoints: Sections to include (default all of ENDPOINTS)
+            max_age: Oldest acceptable cached copy in seconds (default the service TTL)
+
+        Returns:
+            Dict with 'accounts' (account_num -> client_name, the requested books, their
+            day_m2m/cash/margin_used/open_orders figures and 'errors' naming sections that
+            failed to load), 'totals' over the sections that loaded and 'elapsed_ms'
+        """
+        return self.snapshot_async(accounts, endpoints, max_age).result()
+
+    def _frame(self, accounts: List[int], endpoints: List[str],
+               futures: Dict[Tuple[int, str], Future], start: float) -> Dict[str, Any]:
+        """Assemble the snapshot frame from finished book futures"""
+        frame = {}
+        for account_num in accounts:
+            books = {}
+            errors = []
+            for endpoint in endpoints:
+                future = futures[(account_num, endpoint)]
+                if future.exception() is None:
+                    books[endpoint] = future.result()
+                else:
+                    errors.append(endpoint)
+            entry = {'client_name': self.account_manager.get_account(account_num).get('client_name'),
+                     'errors': errors}
+            entry.update(books)
+            entry.update(self._figures(books))
+            frame[account_num] = entry
+
+        totals = {}
+        for field in ('day_m2m', 'cash', 'margin_used', 'open_orders'):
+            values = [entry[field] for entry in frame.values() if field in entry]
+            if values:
+                totals[field] = sum(values)
+        return {
+            'accounts': frame,
+            'totals': totals,
+            'elapsed_ms': (time.perf_counter() - start) * 1000
+        }
+
+    @staticmethod
+    def _figures(books: Dict[str, Any]) -> Dict[str, Any]:
+        """Headline numbers of one account's books"""
+        figures = {}
+        if 'positions' in books:
+            figures['day_m2m'] = sum(float(position.get('urmtom', 0)) + float(position.get('rpnl', 0))
+                                     for position in books['positions'])
+        if 'limits' in books:
+            limits = books['limits']
+            figures['cash'] = float(limits.get('cash', 0) or 0) + float(limits.get('payin', 0) or 0)
+            figures['margin_used'] = float(limits.get('marginused', 0) or 0)
+        if 'orders' in books:
+            figures['open_orders'] = sum(1 for order in books['orders']
+                                         if order.get('status') in ('OPEN', 'PENDING', 'TRIGGER_PENDING'))
+        return figures
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,201 @@
+"""
+Order lifecycle latency tracing
+"""
+import json
+import threading
+import time
+from collections import deque, OrderedDict
+from typing import Dict, Any, Optional, List
+from config import Config
+from logger import applicationLogger
+
+# Lifecycle stages in the order they normally happen
+STAGES = ['click', 'payload_ready', 'http_send', 'rest_response', 'ws_newack', 'ws_open', 'ws_fill']
+
+# Histogram segments: (name, from stage, to stage)
+SEGMENTS = [
+    ('click_to_payload', 'click', 'payload_ready'),
+    ('payload_to_send', 'payload_ready', 'http_send'),
+    ('rest_roundtrip', 'http_send', 'rest_response'),
+    ('send_to_newack', 'http_send', 'ws_newack'),
+    ('newack_to_open', 'ws_newack', 'ws_open'),
+    ('open_to_fill', 'ws_open', 'ws_fill'),
+    ('click_to_response', 'click', 'rest_response'),
+    ('click_to_open', 'click', 'ws_open'),
+]
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of pre-sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+class OrderTrace:
+    """Monotonic timestamps for one order on one account"""
+
+    __slots__ = ('account', 'norenordno', 'stamps')
+
+    def __init__(self, account: str, click_ts: float):
+        self.account = account
+        self.norenordno = None
+        self.stamps: Dict[str, float] = {'click': click_ts}
+
+    def timeline(self) -> Dict[str, Any]:
+        """Stage offsets in milliseconds from the click"""
+        origin = self.stamps['click']
+        return {
+            'account': self.account,
+            'norenordno': self.norenordno,
+            'stages': {stage: round((self.stamps[stage] - origin) * 1000, 3)
+                       for stage in STAGES if stage in self.stamps}
+        }
+
+class LatencyTracer:
+    """Collects order traces and per-account latency histograms"""
+
+    def __init__(self, enabled: bool = None, history: int = None):
+        self.enabled = Config.LATENCY_TRACING if enabled is None else enabled
+        self.history = history or Config.LATENCY_TRACE_HISTORY
+        self._traces: "OrderedDict[str, OrderTrace]" = OrderedDict()
+        # WebSocket events that arrived before the REST response named the order
+        self._early_events: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._samples: Dict[str, Dict[str, deque]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, account: str, click_ts: float = None) -> Optional[OrderTrace]:
+        """
+        Start a trace for one account's order
+
+        Args:
+            account: Account label (user id)
+            click_ts: time.perf_counter() of the UI click or triggering event
+
+        Returns:
+            OrderTrace or None when tracing is disabled
+        """
+        if not self.enabled:
+            return None
+        return OrderTrace(account, click_ts if click_ts is not None else time.perf_counter())
+
+    def mark(self, trace: Optional[OrderTrace], stage: str, ts: float = None) -> None:
+        """Stamp a stage on a trace"""
+        if trace is None:
+            return
+        trace.stamps[stage] = ts if ts is not None else time.perf_counter()
+        self._record(trace, stage)
+
+    def bind(self, trace: Optional[OrderTrace], norenordno: str) -> None:
+        """
+        Attach the broker order number from the REST response
+
+        Args:
+            trace: Trace of the order
+            norenordno: Order number returned by PlaceOrder
+        """
+        if trace is None or not norenordno:
+            return
+        with self._lock:
+            trace.norenordno = norenordno
+            self._traces[norenordno] = trace
+            while len(self._traces) > self.history:
+                self._traces.popitem(last=False)
+            early = self._early_events.pop(norenordno, None)
+        if early:
+            for stage, ts in early.items():
+                self.mark(trace, stage, ts)
+
+    def on_order_update(self, tick_data: Dict[str, Any], ts: float = None) -> None:
+        """
+        Stamp WebSocket lifecycle events (NewAck, OPEN, Fill)
+
+        Args:
+            tick_data: Order update from the WebSocket
+            ts: Receive time, defaults to now
+        """
+        if not self.enabled:
+            return
+        ts = ts if ts is not None else time.perf_counter()
+
+        norenordno = tick_data.get('norenordno')
+        report_type = tick_data.get('reporttype')
+        status = tick_data.get('status')
+        if report_type == 'NewAck':
+            stage = 'ws_newack'
+        elif status == 'OPEN' and report_type == 'New':
+            stage = 'ws_open'
+        elif report_type == 'Fill':
+            stage = 'ws_fill'
+        else:
+            return
+
+        with self._lock:
+            trace = self._traces.get(norenordno)
+            if trace is None:
+                early = self._early_events.setdefault(norenordno, {})
+                early.setdefault(stage, ts)
+                while len(self._early_events) > self.history:
+                    self._early_events.popitem(last=False)
+                return
+        if stage not in trace.stamps:
+            self.mark(trace, stage, ts)
+
+    def _record(self, trace: OrderTrace, stage: str) -> None:
+        """Add histogram samples for segments ending at a stage"""
+        with self._lock:
+            account_samples = self._samples.setdefault(trace.account, {})
+            for name, start, end in SEGMENTS:
+                if end == stage and start in trace.stamps:
+                    samples = account_samples.setdefault(name, deque(maxlen=self.history))
+                    samples.append((trace.stamps[end] - trace.stamps[start]) * 1000)
+
+    def histograms(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Per-account latency percentiles
+
+        Returns:
+            {account: {segment: {count, p50_ms, p95_ms, p99_ms, max_ms}}}
+        """
+        with self._lock:
+            snapshot = {account: {name: sorted(samples) for name, samples in segments.items()}
+                        for account, segments in self._samples.items()}
+
+        result = {}
+        for account, segments in snapshot.items():
+            result[account] = {}
+            for name, samples in segments.items():
+                result[account][name] = {
+                    'count': len(samples),
+                    'p50_ms': percentile(samples, 0.50),
+                    'p95_ms': percentile(samples, 0.95),
+                    'p99_ms': percentile(samples, 0.99),
+                    'max_ms': samples[-1] if samples else 0.0
+                }
+        return result
+
+    def timeline(self, norenordno: str) -> Optional[Dict[str, Any]]:
+        """Stage timeline for one order"""
+        trace = self._traces.get(norenordno)
+        return trace.timeline() if trace else None
+
+    def dump_timelines(self, file_path: str = None) -> List[Dict[str, Any]]:
+        """
+        Dump every retained order timeline
+
+        Args:
+            file_path: Optional JSON-lines file to write
+
+        Returns:
+            List of timelines
+        """
+        with self._lock:
+            timelines = [trace.timeline() for trace in self._traces.values()]
+
+        if file_path:
+            try:
+                with open(file_path, 'w') as file:
+                    for timeline in timelines:
+                        file.write(json.dumps(timeline) + '\n')
+                applicationLogger.info(f"Wrote {len(timelines)} order timelines to {file_path}")
+            except Exception as e:
+                applicationLogger.error(f"Error writing order timelines: {e}")
+        return timelines
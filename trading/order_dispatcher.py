@@ -0,0 +1,162 @@
+"""
+Per-account order dispatch workers
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+from config import Config
+from logger import applicationLogger
+from utils.rate_limiter import LANE_NEW, LANE_QUERY
+
+# Shutdown sentinels sort after every lane so queued work drains first
+_STOP_LANE = LANE_QUERY + 1
+
+class AccountWorker:
+    """
+    Long-lived worker thread(s) pinned to a single account session
+
+    Queued calls run by lane (cancel, then modify, then new), and in arrival
+    order within a lane, so a kill-switch cancel never waits behind places
+    already queued for the account.
+    """
+
+    def __init__(self, name: str, num_threads: int = 1):
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads = []
+        for i in range(max(1, num_threads)):
+            thread = threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a call on this account's worker in the new-order lane
+
+        Args:
+            fn: Callable to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future resolving to the return value of fn
+        """
+        return self.submit_lane(LANE_NEW, fn, *args, **kwargs)
+
+    def submit_lane(self, lane: int, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a call on this account's worker ahead of any lower-priority lane
+
+        Args:
+            lane: LANE_CANCEL, LANE_MODIFY, LANE_NEW or LANE_QUERY
+            fn: Callable to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future resolving to the return value of fn
+        """
+        future = Future()
+        self._queue.put((lane, next(self._seq), (future, fn, args, kwargs)))
+        return future
+
+    def pending(self) -> int:
+        """Approximate number of queued calls"""
+        return self._queue.qsize()
+
+    def _run(self):
+        """Worker loop"""
+        while True:
+            item = self._queue.get()[2]
+            if item is None:
+                break
+
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = False):
+        """Stop the worker threads once the queue drains"""
+        for _ in self._threads:
+            self._queue.put((_STOP_LANE, next(self._seq), None))
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+class OrderDispatcher:
+    """Fans out order calls to one pinned worker per account session"""
+
+    def __init__(self, threads_per_account: int = None):
+        self.threads_per_account = threads_per_account or Config.ORDER_WORKERS_PER_ACCOUNT
+        self._workers: Dict[Any, AccountWorker] = {}
+        self._lock = threading.Lock()
+
+    def worker_for(self, api) -> AccountWorker:
+        """
+        Get (or lazily start) the worker pinned to an API session
+
+        Args:
+            api: API instance
+
+        Returns:
+            AccountWorker for the session
+        """
+        worker = self._workers.get(api)
+        if worker is None:
+            with self._lock:
+                worker = self._workers.get(api)
+                if worker is None:
+                    worker = AccountWorker(f"OrderWorker-{len(self._workers) + 1}",
+                                           self.threads_per_account)
+                    self._workers[api] = worker
+                    applicationLogger.info(f"Started {worker.name} for API session {id(api)}")
+        return worker
+
+    def submit(self, api, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a call to the worker owning an API session
+
+        Args:
+            api: API instance the call belongs to
+            fn: Callable to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future for the call
+        """
+        return self.worker_for(api).submit(fn, *args, **kwargs)
+
+    def submit_lane(self, api, lane: int, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a call to the worker owning an API session in a priority lane
+
+        Args:
+            api: API instance the call belongs to
+            lane: LANE_CANCEL, LANE_MODIFY, LANE_NEW or LANE_QUERY
+            fn: Callable to run
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future for the call
+        """
+        return self.worker_for(api).submit_lane(lane, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = False):
+        """Stop all account workers"""
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.shutdown(wait=wait)
@@ -0,0 +1,218 @@
+"""
+Ordered per-account dispatch of WebSocket order updates
+"""
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+from config import Config
+from logger import applicationLogger
+
+TERMINAL_STATUSES = ('COMPLETE', 'CANCELED', 'REJECTED')
+
+def order_version(tick_data: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+    """
+    Version of an order update
+
+    Lifecycle rank first (NewAck < live < terminal), then the broker event
+    time, so a late OPEN after a Fill or an older replay sorts lower. Event
+    times only compare when both updates carry one; see is_older.
+
+    Args:
+        tick_data: Order update from the WebSocket
+
+    Returns:
+        (rank, event time as YYYYMMDDHHMMSS or None when missing or unparseable)
+    """
+    status = tick_data.get('status')
+    if status in TERMINAL_STATUSES:
+        rank = 2
+    elif tick_data.get('reporttype') == 'NewAck':
+        rank = 0
+    else:
+        rank = 1
+
+    event_time = None
+    norentm = tick_data.get('norentm')
+    if norentm:
+        try:
+            event_time = datetime.strptime(norentm, '%H:%M:%S %d-%m-%Y').strftime('%Y%m%d%H%M%S')
+        except ValueError:
+            pass
+    return rank, event_time
+
+def is_older(version: Tuple[int, Optional[str]], last: Tuple[int, Optional[str]]) -> bool:
+    """
+    True if an update's version sorts before the last applied one
+
+    A lower lifecycle rank is always older. At the same rank the event times
+    decide only when both are known; otherwise arrival order stands.
+    """
+    if version[0] != last[0]:
+        return version[0] < last[0]
+    if version[1] is None or last[1] is None:
+        return False
+    return version[1] < last[1]
+
+class AccountEventQueue:
+    """Bounded FIFO of order updates with a single consumer thread"""
+
+    def __init__(self, account_num: int, handler: Callable, maxsize: int):
+        self.account_num = account_num
+        self.handler = handler
+        self._queue = queue.Queue(maxsize=maxsize)
+        # norenordno -> (version, status, reporttype) of the last applied update
+        self._versions: Dict[str, Tuple[Tuple[int, Optional[str]], Optional[str], Optional[str]]] = {}
+        # norenordno -> time.monotonic() it went terminal, oldest first; evicted after the grace period
+        self._terminal_at: Dict[str, float] = {}
+        self.terminal_grace = Config.ORDER_EVENT_TERMINAL_GRACE
+        self._stats = {'enqueued': 0, 'processed': 0, 'stale_dropped': 0, 'blocked': 0,
+                       'blocked_total': 0.0, 'high_watermark': 0, 'lag_total': 0.0, 'lag_max': 0.0}
+        self._thread = threading.Thread(target=self._run, name=f"OrderEvents-{account_num}", daemon=True)
+        self._thread.start()
+
+    def put(self, tick_data: Dict[str, Any]) -> None:
+        """
+        Enqueue an update; blocks the feed thread when the queue is full
+
+        Args:
+            tick_data: Order update from the WebSocket
+        """
+        item = (time.perf_counter(), tick_data)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            start = time.perf_counter()
+            self._queue.put(item)
+            self._stats['blocked'] += 1
+            self._stats['blocked_total'] += time.perf_counter() - start
+            applicationLogger.warning(f"Order event queue full for Account {self.account_num}, feed thread blocked")
+        self._stats['enqueued'] += 1
+        self._stats['high_watermark'] = max(self._stats['high_watermark'], self._queue.qsize())
+
+    def is_stale(self, tick_data: Dict[str, Any]) -> bool:
+        """Check an update against the last applied version of its order (consumer thread only)"""
+        norenordno = tick_data.get('norenordno')
+        if not norenordno:
+            return False
+
+        version = order_version(tick_data)
+        status = tick_data.get('status')
+        report_type = tick_data.get('reporttype')
+        last = self._versions.get(norenordno)
+        if last is not None:
+            last_version, last_status, last_report = last
+            if is_older(version, last_version):
+                return True
+            # Repeated terminal event (e.g. a re-sent Fill after reconnect)
+            if version[0] == 2 and (status, report_type) == (last_status, last_report):
+                return True
+            # Keep the last known time so older replays still compare against it
+            if version[1] is None:
+                version = (version[0], last_version[1])
+        self._versions[norenordno] = (version, status, report_type)
+        if version[0] == 2:
+            self._terminal_at.pop(norenordno, None)
+            self._terminal_at[norenordno] = time.monotonic()
+        self._evict_finished()
+        return False
+
+    def _evict_finished(self):
+        """Forget orders that went terminal more than the grace period ago (consumer thread only)"""
+        cutoff = time.monotonic() - self.terminal_grace
+        terminal_at = self._terminal_at
+        while terminal_at:
+            norenordno = next(iter(terminal_at))
+            if terminal_at[norenordno] > cutoff:
+                break
+            del terminal_at[norenordno]
+            self._versions.pop(norenordno, None)
+
+    def _run(self):
+        """Consumer loop preserving arrival order"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            enqueued_at, tick_data = item
+            lag = time.perf_counter() - enqueued_at
+            self._stats['lag_total'] += lag
+            self._stats['lag_max'] = max(self._stats['lag_max'], lag)
+
+            if self.is_stale(tick_data):
+                self._stats['stale_dropped'] += 1
+                applicationLogger.info(f"Dropping stale update for order {tick_data.get('norenordno')} "
+                                       f"on Account {self.account_num}: {tick_data.get('status')}/{tick_data.get('reporttype')}")
+                continue
+
+            try:
+                self.handler(tick_data, self.account_num)
+            except Exception as e:
+                applicationLogger.error(f"Error handling order event for Account {self.account_num}: {e}")
+            self._stats['processed'] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and backpressure metrics"""
+        stats = self._stats
+        dequeued = stats['processed'] + stats['stale_dropped']
+        return {
+            'queue_depth': self._queue.qsize(),
+            'high_watermark': stats['high_watermark'],
+            'enqueued': stats['enqueued'],
+            'processed': stats['processed'],
+            'stale_dropped': stats['stale_dropped'],
+            'blocked': stats['blocked'],
+            'blocked_ms': stats['blocked_total'] * 1000,
+            'avg_lag_ms': (stats['lag_total'] / dequeued * 1000) if dequeued else 0.0,
+            'max_lag_ms': stats['lag_max'] * 1000
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Stop the consumer once queued updates are handled"""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+class OrderEventDispatcher:
+    """Routes order updates to one ordered queue per account"""
+
+    def __init__(self, handler: Callable, maxsize: int = None):
+        self.handler = handler
+        self.maxsize = maxsize or Config.ORDER_EVENT_QUEUE_SIZE
+        self._queues: Dict[int, AccountEventQueue] = {}
+        self._lock = threading.Lock()
+
+    def queue_for(self, account_num: int) -> AccountEventQueue:
+        """Get (or lazily start) the queue for an account"""
+        event_queue = self._queues.get(account_num)
+        if event_queue is None:
+            with self._lock:
+                event_queue = self._queues.get(account_num)
+                if event_queue is None:
+                    event_queue = AccountEventQueue(account_num, self.handler, self.maxsize)
+                    self._queues[account_num] = event_queue
+        return event_queue
+
+    def dispatch(self, account_num: int, tick_data: Dict[str, Any]) -> None:
+        """
+        Queue an order update for its account
+
+        Args:
+            account_num: Account the update arrived on
+            tick_data: Order update from the WebSocket
+        """
+        self.queue_for(account_num).put(tick_data)
+
+    def metrics(self) -> Dict[int, Dict[str, Any]]:
+        """Per-account queue metrics"""
+        return {account_num: event_queue.metrics() for account_num, event_queue in self._queues.items()}
+
+    def shutdown(self, wait: bool = False):
+        """Stop all account consumers"""
+        with self._lock:
+            queues = list(self._queues.values())
+            self._queues.clear()
+        for event_queue in queues:
+            event_queue.shutdown(wait=wait)
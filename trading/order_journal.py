@@ -0,0 +1,162 @@
+"""
+Append-only order event journal with snapshot compaction
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Dict, Any
+from config import Config
+from logger import applicationLogger
+
+class OrderJournal:
+    """
+    One JSON line per order event, fsynced in batches
+
+    The snapshot is the regular orders CSV. On startup the snapshot is loaded
+    and the journal replayed over it; compaction rewrites the snapshot and
+    truncates the journal. Replays are idempotent upserts, so a crash between
+    the two steps only replays events that are already in the snapshot.
+    """
+
+    def __init__(self, journal_path: str = None, snapshot_path: str = "orders.csv"):
+        self.journal_path = journal_path or Config.ORDER_JOURNAL_FILE
+        self.snapshot_path = snapshot_path
+        self.fsync_interval = Config.JOURNAL_FSYNC_INTERVAL
+        self.fsync_batch = Config.JOURNAL_FSYNC_BATCH
+        self.compact_every = Config.JOURNAL_COMPACT_EVERY
+        self.records_since_compact = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._drop_torn_tail()
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="OrderJournalFlusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _drop_torn_tail(self):
+        """Cut a partial last record left by a crash, so the next append starts on its own line"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb+') as file:
+            size = file.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(end - 4096, 0)
+                file.seek(start)
+                newline = file.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                applicationLogger.warning(f"Dropping torn record ({size - end} bytes) at the end of {self.journal_path}")
+                file.truncate(end)
+                file.flush()
+                os.fsync(file.fileno())
+
+    def append(self, order: Dict[str, Any]) -> None:
+        """
+        Append one order event
+
+        Args:
+            order: Order data dictionary
+        """
+        line = json.dumps(order, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._unsynced += 1
+            self.records_since_compact += 1
+            if self._unsynced >= self.fsync_batch:
+                self._sync_locked()
+
+    def _sync_locked(self):
+        """Flush and fsync pending records (lock held)"""
+        if not self._unsynced:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _flush_loop(self):
+        """Background fsync so a quiet journal is still durable within the interval"""
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                with self._lock:
+                    self._sync_locked()
+            except Exception as e:
+                applicationLogger.error(f"Error syncing order journal: {e}")
+
+    def needs_compaction(self) -> bool:
+        """True once enough events accumulated since the last snapshot"""
+        return self.records_since_compact >= self.compact_every
+
+    def replay(self, store) -> int:
+        """
+        Load the snapshot and replay journal events into an order store
+
+        Args:
+            store: OrderStore to fill
+
+        Returns:
+            Number of journal events replayed
+        """
+        if os.path.exists(self.snapshot_path) and os.path.getsize(self.snapshot_path) > 0:
+            import pandas as pd
+            try:
+                saved = pd.read_csv(self.snapshot_path, dtype=str, keep_default_na=False)
+                store.load(saved.to_dict('records'))
+            except pd.errors.EmptyDataError:
+                pass
+
+        replayed = 0
+        with self._lock:
+            self._file.flush()
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            order = json.loads(line)
+                        except ValueError:
+                            # Torn final write from a crash
+                            applicationLogger.warning(f"Skipping corrupt journal record in {self.journal_path}")
+                            continue
+                        if order.get('norenordno'):
+                            store.upsert(order)
+                            replayed += 1
+            self.records_since_compact = replayed
+
+        applicationLogger.info(f"Restored {len(store)} orders ({replayed} journal events replayed)")
+        return replayed
+
+    def compact(self, store) -> None:
+        """
+        Write a fresh snapshot of the store and truncate the journal
+
+        Args:
+            store: OrderStore to snapshot
+        """
+        with self._lock:
+            tmp_path = self.snapshot_path + '.tmp'
+            store.to_dataframe().to_csv(tmp_path, index=False)
+            with open(tmp_path, 'rb+') as tmp:
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            self._file.close()
+            self._file = open(self.journal_path, 'w', encoding='utf-8')
+            self._unsynced = 0
+            self.records_since_compact = 0
+        applicationLogger.info(f"Compacted order journal into {self.snapshot_path}")
+
+    def close(self) -> None:
+        """Flush pending records and stop the flusher"""
+        self._stop.set()
+        with self._lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
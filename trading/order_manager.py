@@ -1,68 +1,86 @@
 """
 Order management for trading operations
 """
-import threading
 import pandas as pd
 import os
+import time
+from concurrent.futures import Future
 from typing import List, Dict, Any, Optional
 from config import Config
 from logger import applicationLogger
+from trading.order_dispatcher import OrderDispatcher
+from trading.order_templates import OrderTemplateCache
+from trading.latency_tracer import LatencyTracer, OrderTrace
+from trading.order_store import OrderStore
+from trading.order_journal import OrderJournal
+from utils.rate_limiter import LANE_CANCEL, LANE_MODIFY
 
 class OrderManager:
     """Manages order operations and tracking"""
     
-    def __init__(self):
+    def __init__(self, file_path: str = "orders.csv"):
         self.order_data = {}
-        self.file_path = "orders.csv"
+        self.file_path = file_path
+        self.dispatcher = OrderDispatcher()
+        self.templates = OrderTemplateCache()
+        self.tracer = LatencyTracer()
         self._initialize_order_dataframe()
     
     def _initialize_order_dataframe(self):
-        """Initialize order DataFrame"""
-        columns = ['norenordno', 'uid', 'actid', 'exch', 'tsym', 'trantype',
-                  'qty', 'prc', 'pcode', 'remarks', 'status', 'reporttype',
-                  'prctyp', 'ret', 'exchordid', 'dscqty', 'rejreason']
-        
-        if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 0:
-            try:
-                self.df_orders = pd.read_csv(self.file_path)
-            except pd.errors.EmptyDataError:
-                self.df_orders = pd.DataFrame(columns=columns)
-        else:
-            self.df_orders = pd.DataFrame(columns=columns)
+        """Restore the order store from the CSV snapshot and the order journal"""
+        self.order_store = OrderStore()
+        journal_path = os.path.join(os.path.dirname(self.file_path), Config.ORDER_JOURNAL_FILE)
+        self.journal = OrderJournal(journal_path=journal_path, snapshot_path=self.file_path)
+        self.journal.replay(self.order_store)
     
-    def place_buy_orders(self, apis: List, quantities: List[int], 
-                        trading_symbol: str, price: float, 
-                        active_accounts: List[bool]) -> List[Optional[str]]:
+    @property
+    def df_orders(self) -> pd.DataFrame:
+        """Pandas view of all orders, built on demand"""
+        return self.order_store.to_dataframe()
+    
+    def place_order(self, api, buy_or_sell: str, qty, index: int,
+                    trading_symbol: str, price: float,
+                    price_type: str = 'LMT', product_type: str = 'I',
+                    trace: Optional[OrderTrace] = None) -> Optional[str]:
         """
-        Place buy orders across multiple accounts
+        Place a single order on one account
         
         Args:
-            apis: List of API instances
-            quantities: List of quantities for each account
+            api: API instance
+            buy_or_sell: 'B' or 'S'
+            qty: Quantity for the account
+            index: Account position in the fan-out (for logging)
             trading_symbol: Trading symbol
             price: Order price
-            active_accounts: List of active account flags
+            price_type: Price type (LMT, MKT, ...)
+            product_type: Product type (I, M, C)
+            trace: Latency trace for the order
             
         Returns:
-            List of order numbers
+            Order number or None
         """
-        order_numbers = [None] * len(apis)
-        lock = threading.Lock()
-        
-        def place_order(api, qty, index):
+        side = 'buy' if buy_or_sell == 'B' else 'sell'
+        try:
+            # Skip if quantity is empty or invalid
+            if not qty or qty == '' or qty == 0:
+                applicationLogger.warning(f"Skipping {side} order for account {index + 1}: Invalid quantity '{qty}'")
+                return None
+            
+            # Convert quantity to integer
             try:
-                # Skip if quantity is empty or invalid
-                if not qty or qty == '' or qty == 0:
-                    applicationLogger.warning(f"Skipping buy order for account {index + 1}: Invalid quantity '{qty}'")
-                    return
-                
-                # Convert quantity to integer
-                try:
-                    qty = int(qty)
-                except (ValueError, TypeError):
-                    applicationLogger.error(f"Invalid quantity for account {index + 1}: '{qty}'")
-                    return
-                
+                qty = int(qty)
+            except (ValueError, TypeError):
+                applicationLogger.error(f"Invalid quantity for account {index + 1}: '{qty}'")
+                return None
+            
+            # Fast path: splice qty/price into the account's prepared payload
+            template = self.templates.get(api, trading_symbol, buy_or_sell)
+            if template is not None and price_type == 'LMT' and product_type == 'I':
+                payload = template.render(qty, price)
+                self.tracer.mark(trace, 'payload_ready')
+                self.tracer.mark(trace, 'http_send')
+                order_place = api.place_order_payload(payload)
+            else:
                 # Determine correct exchange for options
                 if 'SENSEX' in trading_symbol:
                     exchange = 'BFO'
@@ -71,75 +89,155 @@ class OrderManager:
                 
                 # Log all parameters being sent to API
                 order_params = {
-                    'buy_or_sell': 'B',
-                    'product_type': 'I',
+                    'buy_or_sell': buy_or_sell,
+                    'product_type': product_type,
                     'exchange': exchange,
                     'tradingsymbol': trading_symbol,
                     'quantity': qty,
                     'discloseqty': 0,
-                    'price_type': 'LMT',  # Use LMT for limit orders, MKT for market orders
+                    'price_type': price_type,  # LMT for limit orders, MKT for market orders
                     'price': price,
                     'trigger_price': None,
                     'retention': Config.RETENTION,
                     'amo': 'NO',
                     'remarks': None
                 }
+                self.tracer.mark(trace, 'payload_ready')
                 
-                applicationLogger.info(f"Placing order with parameters: {order_params}")
+                applicationLogger.info(f"Placing {side} order with parameters: {order_params}")
                 
                 # Place order directly as per API documentation
-                order_place = api.place_order(
-                    buy_or_sell=order_params['buy_or_sell'],
-                    product_type=order_params['product_type'],
-                    exchange=order_params['exchange'],
-                    tradingsymbol=order_params['tradingsymbol'],
-                    quantity=order_params['quantity'],
-                    discloseqty=order_params['discloseqty'],
-                    price_type=order_params['price_type'],
-                    price=order_params['price'],
-                    trigger_price=order_params['trigger_price'],
-                    retention=order_params['retention'],
-                    amo=order_params['amo'],
-                    remarks=order_params['remarks']
-                )
-                
-                applicationLogger.info(f"API response: {order_place}")
-                applicationLogger.info(f"API response type: {type(order_place)}")
+                self.tracer.mark(trace, 'http_send')
+                order_place = api.place_order(**order_params)
+            
+            self.tracer.mark(trace, 'rest_response')
+            applicationLogger.info(f"API response: {order_place}")
+            
+            if order_place and 'norenordno' in order_place:
+                norenordno = order_place.get('norenordno')
+                self.tracer.bind(trace, norenordno)
+                applicationLogger.info(f"{side.capitalize()} order placed successfully: {order_place}")
+                return norenordno
+            
+            applicationLogger.error(f"{side.capitalize()} order placement failed: {order_place}")
+            if order_place:
+                applicationLogger.error(f"Response keys: {order_place.keys() if hasattr(order_place, 'keys') else 'No keys'}")
+            return None
                 
-                if order_place and 'norenordno' in order_place:
-                    norenordno = order_place.get('norenordno')
-                    with lock:
-                        order_numbers[index] = norenordno
-                    applicationLogger.info(f"Buy order placed successfully: {order_place}")
-                else:
-                    applicationLogger.error(f"Order placement failed: {order_place}")
-                    if order_place:
-                        applicationLogger.error(f"Response keys: {order_place.keys() if hasattr(order_place, 'keys') else 'No keys'}")
-                    
-            except Exception as e:
-                applicationLogger.error(f"Error placing buy order: {e}")
-                import traceback
-                applicationLogger.error(f"Traceback: {traceback.format_exc()}")
+        except Exception as e:
+            applicationLogger.error(f"Error placing {side} order: {e}")
+            import traceback
+            applicationLogger.error(f"Traceback: {traceback.format_exc()}")
+            return None
+    
+    def prepare_order_templates(self, apis: List, trading_symbol: str) -> int:
+        """
+        Precompute buy/sell payload templates for each account
         
-        # Create and start threads for placing orders
-        threads = []
+        Args:
+            apis: List of API instances
+            trading_symbol: Trading symbol selected in the UI
+            
+        Returns:
+            Number of accounts with ready templates
+        """
+        ready = 0
+        for api in apis:
+            if api is None:
+                continue
+            try:
+                if self.templates.prepare(api, trading_symbol):
+                    ready += 1
+            except Exception as e:
+                applicationLogger.error(f"Error preparing order templates for {trading_symbol}: {e}")
+        return ready
+    
+    def account_label(self, api, index: int) -> str:
+        """Label used for per-account latency histograms"""
+        return getattr(api, 'user_id', None) or f"Account{index + 1}"
+    
+    def _submit_place_orders(self, buy_or_sell: str, apis: List, quantities: List[int],
+                             trading_symbol: str, price: float,
+                             active_accounts: List[bool],
+                             click_ts: float = None) -> List[Optional[Future]]:
+        """Queue one place-order call per active account on its pinned worker"""
+        click_ts = click_ts if click_ts is not None else time.perf_counter()
+        futures = [None] * len(apis)
         for i, (api, qty, is_active) in enumerate(zip(apis, quantities, active_accounts)):
             if is_active:
-                thread = threading.Thread(target=place_order, args=(api, qty, i))
-                threads.append(thread)
-                thread.start()
+                trace = self.tracer.start(self.account_label(api, i), click_ts)
+                futures[i] = self.dispatcher.submit(
+                    api, self.place_order, api, buy_or_sell, qty, i, trading_symbol, price,
+                    trace=trace
+                )
+        return futures
+    
+    def submit_buy_orders(self, apis: List, quantities: List[int], 
+                          trading_symbol: str, price: float, 
+                          active_accounts: List[bool],
+                          click_ts: float = None) -> List[Optional[Future]]:
+        """
+        Submit buy orders across multiple accounts without blocking
         
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        Args:
+            apis: List of API instances
+            quantities: List of quantities for each account
+            trading_symbol: Trading symbol
+            price: Order price
+            active_accounts: List of active account flags
+            click_ts: time.perf_counter() of the UI click, for latency tracing
+            
+        Returns:
+            List of futures resolving to order numbers (None for inactive accounts)
+        """
+        return self._submit_place_orders('B', apis, quantities, trading_symbol, price,
+                                         active_accounts, click_ts)
+    
+    def submit_sell_orders(self, apis: List, quantities: List[int], 
+                           trading_symbol: str, price: float, 
+                           active_accounts: List[bool],
+                           click_ts: float = None) -> List[Optional[Future]]:
+        """
+        Submit sell orders across multiple accounts without blocking
         
-        return order_numbers
+        Args:
+            apis: List of API instances
+            quantities: List of quantities for each account
+            trading_symbol: Trading symbol
+            price: Order price
+            active_accounts: List of active account flags
+            click_ts: time.perf_counter() of the UI click, for latency tracing
+            
+        Returns:
+            List of futures resolving to order numbers (None for inactive accounts)
+        """
+        return self._submit_place_orders('S', apis, quantities, trading_symbol, price,
+                                         active_accounts, click_ts)
+    
+    def place_buy_orders(self, apis: List, quantities: List[int], 
+                        trading_symbol: str, price: float, 
+                        active_accounts: List[bool]) -> List[Optional[str]]:
+        """
+        Place buy orders across multiple accounts and wait for the results
+        
+        Args:
+            apis: List of API instances
+            quantities: List of quantities for each account
+            trading_symbol: Trading symbol
+            price: Order price
+            active_accounts: List of active account flags
+            
+        Returns:
+            List of order numbers
+        """
+        futures = self.submit_buy_orders(apis, quantities, trading_symbol, price, active_accounts)
+        return self._wait_all(futures)
     
     def place_sell_orders(self, apis: List, quantities: List[int], 
                          trading_symbol: str, price: float, 
                          active_accounts: List[bool]) -> List[Optional[str]]:
         """
-        Place sell orders across multiple accounts
+        Place sell orders across multiple accounts and wait for the results
         
         Args:
             apis: List of API instances
@@ -151,101 +249,158 @@ class OrderManager:
         Returns:
             List of order numbers
         """
-        order_numbers = [None] * len(apis)
-        lock = threading.Lock()
+        futures = self.submit_sell_orders(apis, quantities, trading_symbol, price, active_accounts)
+        return self._wait_all(futures)
+    
+    def cancel_order(self, api, order_no: str) -> Optional[Dict[str, Any]]:
+        """Cancel a single order on one account"""
+        try:
+            result = api.cancel_order(orderno=order_no)
+            applicationLogger.info(f"Order {order_no} cancelled successfully")
+            return result
+        except Exception as e:
+            applicationLogger.error(f"Error cancelling order {order_no}: {e}")
+            return None
+    
+    @staticmethod
+    def _after_place(order_no, submit) -> Optional[Future]:
+        """
+        Submit work for an order number, or for the number a pending place resolves to
+        
+        A queued cancel or modify outranks the place on the account worker, so
+        it cannot wait for the place there; it is submitted from the place's
+        done callback instead, once the order number exists.
+        
+        Args:
+            order_no: Order number, or the Future of a place order
+            submit: Callable taking the order number and returning a Future
+            
+        Returns:
+            Future resolving to the submitted task's result (None if the place failed)
+        """
+        if not isinstance(order_no, Future):
+            return submit(order_no) if order_no else None
         
-        def place_order(api, qty, index):
+        chained = Future()
+        
+        def relay(done: Future):
+            if done.exception() is not None:
+                chained.set_exception(done.exception())
+            else:
+                chained.set_result(done.result())
+        
+        def on_placed(place: Future):
             try:
-                # Skip if quantity is empty or invalid
-                if not qty or qty == '' or qty == 0:
-                    applicationLogger.warning(f"Skipping sell order for account {index + 1}: Invalid quantity '{qty}'")
+                number = place.result()
+                if not number:
+                    chained.set_result(None)
                     return
-                
-                # Convert quantity to integer
-                try:
-                    qty = int(qty)
-                except (ValueError, TypeError):
-                    applicationLogger.error(f"Invalid quantity for account {index + 1}: '{qty}'")
-                    return
-                
-                # Determine correct exchange for options
-                if 'SENSEX' in trading_symbol:
-                    exchange = 'BFO'
-                else:
-                    exchange = 'NFO'
-                
-                order_place = api.place_order(
-                    buy_or_sell='S',
-                    product_type='I',
-                    exchange=exchange,
-                    tradingsymbol=trading_symbol,
-                    quantity=qty,
-                    discloseqty=0,
-                    price_type='LMT',  # Use LMT for limit orders, MKT for market orders
-                    price=price,
-                    trigger_price=None,
-                    retention=Config.RETENTION,
-                    amo='NO',
-                    remarks=None
-                )
-                
-                if order_place and 'norenordno' in order_place:
-                    norenordno = order_place.get('norenordno')
-                    with lock:
-                        order_numbers[index] = norenordno
-                    applicationLogger.info(f"Sell order placed successfully: {order_place}")
-                else:
-                    applicationLogger.error(f"Sell order placement failed: {order_place}")
-                    
+                submit(number).add_done_callback(relay)
             except Exception as e:
-                applicationLogger.error(f"Error placing sell order: {e}")
-        
-        # Create and start threads for placing orders
-        threads = []
-        for i, (api, qty, is_active) in enumerate(zip(apis, quantities, active_accounts)):
-            if is_active:
-                thread = threading.Thread(target=place_order, args=(api, qty, i))
-                threads.append(thread)
-                thread.start()
+                applicationLogger.error(f"Order follow-up skipped, place failed: {e}")
+                chained.set_result(None)
         
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        order_no.add_done_callback(on_placed)
+        return chained
+    
+    def submit_cancel_orders(self, apis: List, order_numbers: List, 
+                             active_accounts: List[bool]) -> List[Optional[Future]]:
+        """
+        Submit cancels across multiple accounts without blocking
         
-        return order_numbers
+        Args:
+            apis: List of API instances
+            order_numbers: List of order numbers (or pending place futures) to cancel
+            active_accounts: List of active account flags
+            
+        Returns:
+            List of futures resolving to the cancel responses
+        """
+        futures = [None] * len(apis)
+        for i, (api, order_no, is_active) in enumerate(zip(apis, order_numbers, active_accounts)):
+            if is_active and order_no:
+                futures[i] = self._after_place(order_no, lambda number, api=api: self.dispatcher.submit_lane(
+                    api, LANE_CANCEL, self.cancel_order, api, number))
+        return futures
     
     def cancel_orders(self, apis: List, order_numbers: List[str], 
                      active_accounts: List[bool]) -> None:
         """
-        Cancel orders across multiple accounts
+        Cancel orders across multiple accounts and wait for completion
         
         Args:
             apis: List of API instances
             order_numbers: List of order numbers to cancel
             active_accounts: List of active account flags
         """
-        def cancel_order(api, order_no):
+        self._wait_all(self.submit_cancel_orders(apis, order_numbers, active_accounts))
+    
+    def modify_order(self, api, order_no: str, qty, trading_symbol: str,
+                     price: float, price_type: str = None) -> Optional[Dict[str, Any]]:
+        """Modify a single order on one account"""
+        try:
+            # Skip if quantity is empty or invalid
+            if not qty or qty == '' or qty == 0:
+                applicationLogger.warning(f"Skipping modify order: Invalid quantity '{qty}'")
+                return None
+            
+            # Convert quantity to integer
             try:
-                api.cancel_order(orderno=order_no)
-                applicationLogger.info(f"Order {order_no} cancelled successfully")
-            except Exception as e:
-                applicationLogger.error(f"Error cancelling order {order_no}: {e}")
+                qty = int(qty)
+            except (ValueError, TypeError):
+                applicationLogger.error(f"Invalid quantity for modify order: '{qty}'")
+                return None
+            
+            # Determine correct exchange for options
+            if 'SENSEX' in trading_symbol:
+                exchange = 'BFO'
+            else:
+                exchange = 'NFO'
+            
+            result = api.modify_order(
+                exchange=exchange,
+                tradingsymbol=trading_symbol,
+                orderno=order_no,
+                newquantity=qty,
+                newprice_type=price_type or Config.PRICE_TYPE,
+                newprice=price
+            )
+            applicationLogger.info(f"Order {order_no} modified successfully")
+            return result
+        except Exception as e:
+            applicationLogger.error(f"Error modifying order {order_no}: {e}")
+            return None
+    
+    def submit_modify_orders(self, apis: List, order_numbers: List, 
+                             quantities: List[int], trading_symbol: str, 
+                             price: float, active_accounts: List[bool]) -> List[Optional[Future]]:
+        """
+        Submit modifications across multiple accounts without blocking
         
-        threads = []
-        for i, (api, order_no, is_active) in enumerate(zip(apis, order_numbers, active_accounts)):
+        Args:
+            apis: List of API instances
+            order_numbers: List of order numbers (or pending place futures) to modify
+            quantities: List of new quantities
+            trading_symbol: Trading symbol
+            price: New price
+            active_accounts: List of active account flags
+            
+        Returns:
+            List of futures resolving to the modify responses
+        """
+        futures = [None] * len(apis)
+        for i, (api, order_no, qty, is_active) in enumerate(zip(apis, order_numbers, quantities, active_accounts)):
             if is_active and order_no:
-                thread = threading.Thread(target=cancel_order, args=(api, order_no))
-                threads.append(thread)
-                thread.start()
-        
-        for thread in threads:
-            thread.join()
+                futures[i] = self._after_place(order_no, lambda number, api=api, qty=qty: self.dispatcher.submit_lane(
+                    api, LANE_MODIFY, self.modify_order, api, number, qty, trading_symbol, price
+                ))
+        return futures
     
     def modify_orders(self, apis: List, order_numbers: List[str], 
                      quantities: List[int], trading_symbol: str, 
                      price: float, active_accounts: List[bool]) -> None:
         """
-        Modify orders across multiple accounts
+        Modify orders across multiple accounts and wait for completion
         
         Args:
             apis: List of API instances
@@ -255,70 +410,43 @@ class OrderManager:
             price: New price
             active_accounts: List of active account flags
         """
-        def modify_order(api, order_no, qty):
+        self._wait_all(self.submit_modify_orders(
+            apis, order_numbers, quantities, trading_symbol, price, active_accounts
+        ))
+    
+    def _wait_all(self, futures: List[Optional[Future]]) -> List[Any]:
+        """Block until all futures finish and collect their results"""
+        results = []
+        for future in futures:
+            if future is None:
+                results.append(None)
+                continue
             try:
-                # Skip if quantity is empty or invalid
-                if not qty or qty == '' or qty == 0:
-                    applicationLogger.warning(f"Skipping modify order: Invalid quantity '{qty}'")
-                    return
-                
-                # Convert quantity to integer
-                try:
-                    qty = int(qty)
-                except (ValueError, TypeError):
-                    applicationLogger.error(f"Invalid quantity for modify order: '{qty}'")
-                    return
-                
-                # Determine correct exchange for options
-                if 'SENSEX' in trading_symbol:
-                    exchange = 'BFO'
-                else:
-                    exchange = 'NFO'
-                
-                api.modify_order(
-                    exchange=exchange,
-                    tradingsymbol=trading_symbol,
-                    orderno=order_no,
-                    newquantity=qty,
-                    newprice_type=Config.PRICE_TYPE,
-                    newprice=price
-                )
-                applicationLogger.info(f"Order {order_no} modified successfully")
+                results.append(future.result())
             except Exception as e:
-                applicationLogger.error(f"Error modifying order {order_no}: {e}")
-        
-        threads = []
-        for i, (api, order_no, qty, is_active) in enumerate(zip(apis, order_numbers, quantities, active_accounts)):
-            if is_active and order_no:
-                thread = threading.Thread(target=modify_order, args=(api, order_no, qty))
-                threads.append(thread)
-                thread.start()
-        
-        for thread in threads:
-            thread.join()
+                applicationLogger.error(f"Order task failed: {e}")
+                results.append(None)
+        return results
     
     def handle_order_update(self, order: Dict[str, Any]) -> None:
         """
-        Handle order update and save to CSV
+        Handle order update and record it in the order journal
         
         Args:
             order: Order data dictionary
         """
         order_number = order['norenordno']
         
-        # Check if the order already exists in the DataFrame
-        if order_number in self.df_orders['norenordno'].values:
-            # Update the existing order
-            applicationLogger.info(f"Updating order {order_number}")
-            self.df_orders.loc[self.df_orders['norenordno'] == order_number] = order
-        else:
-            # Add the new order
+        # O(1) upsert into the indexed store
+        if self.order_store.upsert(order):
             applicationLogger.info(f"New order received: {order_number}")
-            self.df_orders = pd.concat([self.df_orders, pd.DataFrame([order])], ignore_index=True)
+        else:
+            applicationLogger.info(f"Updating order {order_number}")
         
-        # Write the updated DataFrame to a CSV file
-        self.df_orders.to_csv(self.file_path, index=False)
-        applicationLogger.info(f"Order data saved to {self.file_path}")
+        # Append the event to the journal; the CSV snapshot is only rewritten on compaction
+        self.journal.append(order)
+        if self.journal.needs_compaction():
+            self.journal.compact(self.order_store)
     
     def get_order_book(self, api) -> List[Dict[str, Any]]:
         """
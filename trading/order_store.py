@@ -0,0 +1,126 @@
+"""
+Indexed in-memory order store
+"""
+import threading
+from typing import Dict, Any, List, Optional, Set
+
+ORDER_COLUMNS = ['norenordno', 'uid', 'actid', 'exch', 'tsym', 'trantype',
+                 'qty', 'prc', 'pcode', 'remarks', 'status', 'reporttype',
+                 'prctyp', 'ret', 'exchordid', 'dscqty', 'rejreason']
+
+class OrderStore:
+    """Orders keyed by norenordno with secondary indexes by account, symbol and status"""
+
+    def __init__(self):
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._by_account: Dict[str, Set[str]] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, norenordno) -> bool:
+        return str(norenordno) in self._orders
+
+    @staticmethod
+    def _index_add(index: Dict[str, Set[str]], key, norenordno: str):
+        if key is not None:
+            index.setdefault(key, set()).add(norenordno)
+
+    @staticmethod
+    def _index_remove(index: Dict[str, Set[str]], key, norenordno: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(norenordno)
+            if not bucket:
+                del index[key]
+
+    def upsert(self, order: Dict[str, Any]) -> bool:
+        """
+        Insert or update an order in O(1)
+
+        Args:
+            order: Order data dictionary (must contain norenordno)
+
+        Returns:
+            bool: True if the order was new
+        """
+        norenordno = str(order['norenordno'])
+        with self._lock:
+            current = self._orders.get(norenordno)
+            if current is None:
+                current = dict(order)
+                current['norenordno'] = norenordno
+                self._orders[norenordno] = current
+                self._index_add(self._by_account, current.get('actid'), norenordno)
+                self._index_add(self._by_symbol, current.get('tsym'), norenordno)
+                self._index_add(self._by_status, current.get('status'), norenordno)
+                return True
+
+            for field, index in (('actid', self._by_account), ('tsym', self._by_symbol),
+                                 ('status', self._by_status)):
+                if field in order and order[field] != current.get(field):
+                    self._index_remove(index, current.get(field), norenordno)
+                    self._index_add(index, order[field], norenordno)
+
+            current.update(order)
+            current['norenordno'] = norenordno
+            return False
+
+    def get(self, norenordno) -> Optional[Dict[str, Any]]:
+        """Get an order by number"""
+        return self._orders.get(str(norenordno))
+
+    def _select(self, index: Dict[str, Set[str]], key) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._orders[num] for num in index.get(key, ())]
+
+    def by_account(self, actid: str) -> List[Dict[str, Any]]:
+        """Orders for an account id"""
+        return self._select(self._by_account, actid)
+
+    def by_symbol(self, tsym: str) -> List[Dict[str, Any]]:
+        """Orders for a trading symbol"""
+        return self._select(self._by_symbol, tsym)
+
+    def by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Orders currently in a status"""
+        return self._select(self._by_status, status)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All orders in insertion order"""
+        with self._lock:
+            return list(self._orders.values())
+
+    def load(self, orders: List[Dict[str, Any]]) -> None:
+        """Bulk upsert orders (e.g. when restoring from disk)"""
+        for order in orders:
+            if order.get('norenordno'):
+                self.upsert(order)
+
+    def clear(self) -> None:
+        """Remove all orders"""
+        with self._lock:
+            self._orders.clear()
+            self._by_account.clear()
+            self._by_symbol.clear()
+            self._by_status.clear()
+
+    def to_dataframe(self):
+        """
+        Build a pandas view of the store on demand
+
+        Returns:
+            DataFrame with the standard order columns first
+        """
+        import pandas as pd
+
+        rows = self.all()
+        columns = list(ORDER_COLUMNS)
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,129 @@
+"""
+Pre-serialized order payload templates
+"""
+import json
+import threading
+import urllib.parse
+from typing import Dict, Any, Optional, Tuple
+from config import Config
+from logger import applicationLogger
+
+_QTY_MARK = '\x00QTY\x00'
+_PRC_MARK = '\x00PRC\x00'
+
+class OrderTemplate:
+    """PlaceOrder request body for one account, symbol and side with qty/price left open"""
+
+    def __init__(self, uid: str, actid: str, session_token: str, buy_or_sell: str,
+                 exchange: str, trading_symbol: str, product_type: str = 'I',
+                 price_type: str = 'LMT', retention: str = None, amo: str = 'NO',
+                 remarks: Optional[str] = None):
+        self.session_token = session_token
+        self.trading_symbol = trading_symbol
+        self.buy_or_sell = buy_or_sell
+
+        # Same field order and encoding as NorenApi.place_order
+        values = {'ordersource': 'API'}
+        values["uid"] = uid
+        values["actid"] = actid
+        values["trantype"] = buy_or_sell
+        values["prd"] = product_type
+        values["exch"] = exchange
+        values["tsym"] = urllib.parse.quote_plus(trading_symbol)
+        values["qty"] = _QTY_MARK
+        values["dscqty"] = "0"
+        values["prctyp"] = price_type
+        values["prc"] = _PRC_MARK
+        values["trgprc"] = "None"
+        values["ret"] = retention or Config.RETENTION
+        values["remarks"] = remarks
+        values["amo"] = amo
+
+        body = 'jData=' + json.dumps(values) + f'&jKey={session_token}'
+        qty_mark = json.dumps(_QTY_MARK)[1:-1]
+        prc_mark = json.dumps(_PRC_MARK)[1:-1]
+        head, rest = body.split(qty_mark)
+        middle, tail = rest.split(prc_mark)
+        self._head = head.encode()
+        self._middle = middle.encode()
+        self._tail = tail.encode()
+
+    def render(self, quantity: int, price: float) -> bytes:
+        """
+        Splice quantity and price into the prepared body
+
+        Args:
+            quantity: Order quantity
+            price: Limit price
+
+        Returns:
+            Request body ready to post
+        """
+        return b''.join((self._head, str(quantity).encode(), self._middle,
+                         str(price).encode(), self._tail))
+
+class OrderTemplateCache:
+    """Per-account, per-symbol template cache rebuilt when a session token changes"""
+
+    def __init__(self):
+        self._templates: Dict[Tuple[Any, str, str], OrderTemplate] = {}
+        self._lock = threading.Lock()
+
+    def prepare(self, api, trading_symbol: str) -> bool:
+        """
+        Build buy and sell templates for an account
+
+        Args:
+            api: API instance (must expose session credentials)
+            trading_symbol: Trading symbol
+
+        Returns:
+            bool: True if templates are ready
+        """
+        if not hasattr(api, 'session_token') or not api.session_token:
+            return False
+
+        # Determine correct exchange for options
+        if 'SENSEX' in trading_symbol:
+            exchange = 'BFO'
+        else:
+            exchange = 'NFO'
+
+        with self._lock:
+            for buy_or_sell in ('B', 'S'):
+                key = (api, trading_symbol, buy_or_sell)
+                current = self._templates.get(key)
+                if current is not None and current.session_token == api.session_token:
+                    continue
+                self._templates[key] = OrderTemplate(
+                    uid=api.user_id,
+                    actid=api.account_id,
+                    session_token=api.session_token,
+                    buy_or_sell=buy_or_sell,
+                    exchange=exchange,
+                    trading_symbol=trading_symbol
+                )
+        applicationLogger.info(f"Order templates ready for {trading_symbol} on API session {id(api)}")
+        return True
+
+    def get(self, api, trading_symbol: str, buy_or_sell: str) -> Optional[OrderTemplate]:
+        """
+        Get a template if it is still valid for the account's session
+
+        Args:
+            api: API instance
+            trading_symbol: Trading symbol
+            buy_or_sell: 'B' or 'S'
+
+        Returns:
+            OrderTemplate or None
+        """
+        template = self._templates.get((api, trading_symbol, buy_or_sell))
+        if template is None or template.session_token != getattr(api, 'session_token', None):
+            return None
+        return template
+
+    def clear(self):
+        """Drop all templates"""
+        with self._lock:
+            self._templates.clear()
@@ -0,0 +1,322 @@
+"""
+Incremental positions and MTM driven by WebSocket fills and ticks
+"""
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from config import Config
+from logger import applicationLogger
+
+MtmListener = Callable[[int, float, float], None]  # (account_num, account MTM, aggregate MTM)
+
+def _float(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+class PositionEngine:
+    """
+    Net positions per account, seeded once from the position book
+
+    After seeding, fills from the order WebSocket update net quantity, average
+    price and realized P&L, and quote ticks re-mark only the positions in the
+    ticking token, so per-account and aggregate MTM are kept current without
+    polling get_positions. Positions are average-cost; day MTM (realized +
+    unrealized) matches the broker's book.
+    """
+
+    def __init__(self, tick_store=None, subscribe: Callable[[Any, List[str]], object] = None, instruments=None):
+        """
+        Args:
+            tick_store: TickStore used for the first mark of new positions
+            subscribe: (api, keys) subscriber shared with other feed consumers (default api.subscribe)
+            instruments: Instrument lookup with by_token(exchange, token), e.g. SymbolManager;
+                         gives the multiplier of positions opened by a fill
+        """
+        self.tick_store = tick_store
+        self.subscriber = subscribe
+        self.instruments = instruments
+        self._positions: Dict[int, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+        self._by_token: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._realized: Dict[int, float] = {}
+        self._unrealized: Dict[int, float] = {}
+        self._subscribe: Dict[int, Callable[[List[str]], object]] = {}
+        self._seeding: Dict[int, List[Tuple[str, str]]] = {}  # Fill ids held back while a book is read
+        self._held: Dict[int, set] = {}  # Keys each account's feed was asked to stream
+        self._fills_seen: set = set()
+        self._listeners: List[MtmListener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: MtmListener):
+        """Call back (account_num, account MTM, aggregate MTM) whenever an account's MTM changes; runs on the feed thread"""
+        self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback: MtmListener):
+        self._listeners = [listener for listener in self._listeners if listener is not callback]
+
+    def is_seeded(self, account_num: int) -> bool:
+        return account_num in self._positions
+
+    def seed(self, account_num: int, api) -> bool:
+        """
+        Load an account's positions from get_positions and subscribe their tokens
+
+        Fills that land while the book is being read may or may not be in it,
+        so they are held back instead of applied. A book requested after a fill
+        was notified already contains that fill, so the read is repeated (up to
+        Config.POSITION_SEED_ATTEMPTS) until one completes with no fill landing
+        mid-read; held-back fills are then marked as seen.
+
+        Args:
+            account_num: Account number
+            api: API instance of the account
+
+        Returns:
+            bool: True if the book was loaded
+        """
+        with self._lock:
+            pending = self._seeding[account_num] = []
+        try:
+            for attempt in range(1, Config.POSITION_SEED_ATTEMPTS + 1):
+                with self._lock:
+                    before = len(pending)
+                # NorenApi answers an empty book with None; transport failures raise
+                rows = api.get_positions() or []
+
+                positions = {}
+                for row in rows if isinstance(rows, list) else []:
+                    if row.get('stat', 'Ok') != 'Ok':
+                        continue
+                    position = self._new_position(row.get('exch'), row.get('token'), row.get('tsym'), row.get('prd'),
+                                                  self._multiplier(row))
+                    position['netqty'] = int(_float(row.get('netqty')))
+                    position['avgprc'] = _float(row.get('netavgprc'))
+                    position['rpnl'] = _float(row.get('rpnl'))
+                    position['lp'] = self._mark(position['key'], _float(row.get('lp'), None))
+                    positions[(position['key'], position['prd'])] = position
+
+                with self._lock:
+                    raced = len(pending) > before
+                    if raced and attempt < Config.POSITION_SEED_ATTEMPTS:
+                        continue
+                    if self._seeding.get(account_num) is pending:
+                        del self._seeding[account_num]
+                    self._fills_seen.update(pending)
+                    for key, entries in list(self._by_token.items()):
+                        self._by_token[key] = [entry for entry in entries if entry[0] != account_num]
+                    self._positions[account_num] = positions
+                    for position in positions.values():
+                        self._by_token.setdefault(position['key'], []).append((account_num, position))
+                        self._revalue(position)
+                    self._subscribe[account_num] = self._subscriber_for(api)
+                    self._retotal(account_num)
+                    held = self._held.setdefault(account_num, set())
+                    keys = sorted({position['key'] for position in positions.values()} - held)
+                    held.update(keys)
+                break
+
+            if raced:
+                applicationLogger.warning(f"Fills kept landing while reading account {account_num}'s positions; "
+                                          f"using the last book as is")
+            if keys:
+                self._subscribe[account_num](keys)
+            applicationLogger.info(f"Position engine seeded account {account_num} with {len(positions)} positions")
+            self._publish(account_num)
+            return True
+
+        except Exception as e:
+            applicationLogger.error(f"Error seeding positions for account {account_num}: {e}")
+            return False
+        finally:
+            with self._lock:
+                if self._seeding.get(account_num) is pending:
+                    del self._seeding[account_num]
+
+    @staticmethod
+    def _multiplier(row: Dict[str, Any]) -> float:
+        """Rupees per point per unit of quantity of a position book row"""
+        return _float(row.get('mult'), 1.0) * _float(row.get('prcftr'), 1.0)
+
+    def _fill_multiplier(self, exchange: str, token: str) -> float:
+        """Multiplier of a position opened by a fill (fills do not carry mult/prcftr), from the instrument index"""
+        instrument = self.instruments.by_token(exchange, token) if self.instruments is not None else None
+        if instrument is None:
+            applicationLogger.warning(f"No instrument for {exchange}|{token}, valuing its fills at a multiplier of 1")
+            return 1.0
+        return instrument.multiplier
+
+    def _subscriber_for(self, api) -> Callable[[List[str]], object]:
+        if self.subscriber is None:
+            return api.subscribe
+        return lambda keys: self.subscriber(api, keys)
+
+    @staticmethod
+    def _new_position(exchange: str, token: str, tsym: str, product: str, multiplier: float = 1.0) -> Dict[str, Any]:
+        return {
+            'key': f"{exchange}|{token}", 'exch': exchange, 'token': token, 'tsym': tsym, 'prd': product,
+            'netqty': 0, 'avgprc': 0.0, 'rpnl': 0.0, 'urmtom': 0.0, 'lp': None, 'mult': multiplier
+        }
+
+    def _mark(self, key: str, fallback: Optional[float]) -> Optional[float]:
+        price = self.tick_store.last_price(key) if self.tick_store else None
+        return price if price is not None else fallback
+
+    @staticmethod
+    def _revalue(position: Dict[str, Any]) -> float:
+        """Recompute unrealized MTM; returns the change"""
+        old = position['urmtom']
+        if position['lp'] is not None and position['netqty']:
+            position['urmtom'] = position['netqty'] * (position['lp'] - position['avgprc']) * position['mult']
+        else:
+            position['urmtom'] = 0.0
+        return position['urmtom'] - old
+
+    def _retotal(self, account_num: int):
+        positions = self._positions.get(account_num, {}).values()
+        self._realized[account_num] = sum(position['rpnl'] for position in positions)
+        self._unrealized[account_num] = sum(position['urmtom'] for position in positions)
+
+    def on_fill(self, account_num: int, tick_data: Dict[str, Any]) -> bool:
+        """
+        Apply a Fill order update to the account's position
+
+        Args:
+            account_num: Account number
+            tick_data: Order update (reporttype Fill with flqty/flprc)
+
+        Returns:
+            bool: True if a position changed
+        """
+        if tick_data.get('reporttype') != 'Fill':
+            return False
+        try:
+            # Partial fills of one order differ by fill id, or by cumulative fillshares when there is none
+            fill_id = (tick_data.get('norenordno'), tick_data.get('flid') or tick_data.get('fillshares'))
+            qty = int(_float(tick_data.get('flqty') or tick_data.get('fillshares')))
+            price = _float(tick_data.get('flprc'))
+            if not qty:
+                return False
+            signed = qty if tick_data.get('trantype') == 'B' else -qty
+            key = f"{tick_data.get('exch')}|{tick_data.get('token')}"
+            new_token = False
+
+            with self._lock:
+                pending = self._seeding.get(account_num)
+                if pending is not None:
+                    # The book being read may already hold this fill
+                    pending.append(fill_id)
+                    return False
+                if account_num not in self._positions or fill_id in self._fills_seen:
+                    return False
+                self._fills_seen.add(fill_id)
+                positions = self._positions[account_num]
+                position = positions.get((key, tick_data.get('pcode')))
+                if position is None:
+                    position = self._new_position(tick_data.get('exch'), tick_data.get('token'),
+                                                  tick_data.get('tsym'), tick_data.get('pcode'),
+                                                  self._fill_multiplier(tick_data.get('exch'), tick_data.get('token')))
+                    position['lp'] = self._mark(key, price)
+                    positions[(key, position['prd'])] = position
+                    held = self._held.setdefault(account_num, set())
+                    new_token = key not in held
+                    held.add(key)
+                    self._by_token.setdefault(key, []).append((account_num, position))
+
+                netqty, avgprc = position['netqty'], position['avgprc']
+                if netqty == 0 or (netqty > 0) == (signed > 0):
+                    # Opening or adding: blend the average price
+                    position['avgprc'] = (abs(netqty) * avgprc + qty * price) / (abs(netqty) + qty)
+                else:
+                    # Reducing, closing or flipping: realize against the average price
+                    closed = min(qty, abs(netqty))
+                    direction = 1 if netqty > 0 else -1
+                    position['rpnl'] += closed * (price - avgprc) * direction * position['mult']
+                    if qty > abs(netqty):
+                        position['avgprc'] = price
+                    elif qty == abs(netqty):
+                        position['avgprc'] = 0.0
+                position['netqty'] = netqty + signed
+                self._revalue(position)
+                self._retotal(account_num)
+                subscribe = self._subscribe.get(account_num)
+
+            if new_token and subscribe:
+                subscribe([key])
+            self._publish(account_num)
+            return True
+
+        except Exception as e:
+            applicationLogger.error(f"Error applying fill for account {account_num}: {e}")
+            return False
+
+    def on_tick(self, tick_data: Dict[str, Any]) -> bool:
+        """
+        Re-mark the positions in a ticking token
+
+        Args:
+            tick_data: WebSocket touchline tick
+
+        Returns:
+            bool: True if any account's MTM changed
+        """
+        key = f"{tick_data.get('e')}|{tick_data.get('tk')}"
+        entries = self._by_token.get(key)
+        price = tick_data.get('lp')
+        if not entries or not price:
+            return False
+        try:
+            price = float(price)
+        except ValueError:
+            return False
+
+        changed = set()
+        with self._lock:
+            for account_num, position in entries:
+                position['lp'] = price
+                delta = self._revalue(position)
+                if delta:
+                    self._unrealized[account_num] += delta
+                    changed.add(account_num)
+        for account_num in changed:
+            self._publish(account_num)
+        return bool(changed)
+
+    def _publish(self, account_num: int):
+        listeners = self._listeners
+        if not listeners:
+            return
+        account_mtm, total = self.mtm(account_num), self.total_mtm()
+        for listener in listeners:
+            try:
+                listener(account_num, account_mtm, total)
+            except Exception as e:
+                applicationLogger.error(f"Error in MTM listener: {e}")
+
+    def mtm(self, account_num: int) -> float:
+        """Day MTM (realized + unrealized) of an account"""
+        return self._realized.get(account_num, 0.0) + self._unrealized.get(account_num, 0.0)
+
+    def total_mtm(self) -> float:
+        """Day MTM across all seeded accounts"""
+        return sum(self._realized.values()) + sum(self._unrealized.values())
+
+    def summary(self, account_num: int) -> Dict[str, Any]:
+        """
+        Position summary for an account
+
+        Returns:
+            Dict with total_mtm (unrealized), total_pnl (realized), day_m2m and position_count
+        """
+        total_mtm = self._unrealized.get(account_num, 0.0)
+        total_pnl = self._realized.get(account_num, 0.0)
+        return {
+            'total_mtm': total_mtm,
+            'total_pnl': total_pnl,
+            'day_m2m': total_mtm + total_pnl,
+            'position_count': len(self._positions.get(account_num, {}))
+        }
+
+    def positions(self, account_num: int) -> List[Dict[str, Any]]:
+        """Copies of an account's positions"""
+        with self._lock:
+            return [dict(position) for position in self._positions.get(account_num, {}).values()]
@@ -7,8 +7,21 @@ from logger import applicationLogger
 class PositionManager:
     """Manages positions and MTM calculations"""
     
-    def __init__(self):
-        pass
+    def __init__(self, position_engine=None):
+        """
+        Args:
+            position_engine: PositionEngine fed by the WebSocket; when an account
+                is seeded its MTM is read from the engine instead of the REST book
+        """
+        self.position_engine = position_engine
+    
+    def _engine_for(self, api, account_num: Optional[int]):
+        """Engine to answer from for this account, seeding it on first use"""
+        if self.position_engine is None or account_num is None:
+            return None
+        if self.position_engine.is_seeded(account_num) or self.position_engine.seed(account_num, api):
+            return self.position_engine
+        return None
     
     def get_positions(self, api) -> list:
         """
@@ -26,17 +39,22 @@ class PositionManager:
             applicationLogger.error(f"Error fetching positions: {e}")
             return []
     
-    def calculate_mtm(self, api) -> float:
+    def calculate_mtm(self, api, account_num: int = None) -> float:
         """
         Calculate MTM for an account
         
         Args:
             api: API instance
+            account_num: Account number, to read the streaming MTM from the position engine
             
         Returns:
             MTM value
         """
         try:
+            engine = self._engine_for(api, account_num)
+            if engine:
+                return engine.mtm(account_num)
+            
             positions = self.get_positions(api)
             if not positions:
                 return 0.0
@@ -55,17 +73,22 @@ class PositionManager:
             applicationLogger.error(f"Error calculating MTM: {e}")
             return 0.0
     
-    def get_position_summary(self, api) -> Dict[str, Any]:
+    def get_position_summary(self, api, account_num: int = None) -> Dict[str, Any]:
         """
         Get position summary for an account
         
         Args:
             api: API instance
+            account_num: Account number, to read the streaming summary from the position engine
             
         Returns:
             Position summary dictionary
         """
         try:
+            engine = self._engine_for(api, account_num)
+            if engine:
+                return engine.summary(account_num)
+            
             positions = self.get_positions(api)
             if not positions:
                 return {
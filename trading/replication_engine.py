@@ -0,0 +1,218 @@
+"""
+Automatic master-to-child order replication
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, List
+from config import Config
+from logger import applicationLogger
+from trading.latency_tracer import percentile
+from utils.rate_limiter import LANE_CANCEL
+
+MASTER_ACCOUNT = 1
+
+class ReplicationEngine:
+    """Mirrors master order events (new/modify/cancel) to all active child accounts"""
+
+    def __init__(self, account_manager, order_manager, enabled: bool = None):
+        self.account_manager = account_manager
+        self.order_manager = order_manager
+        self.enabled = Config.REPLICATION_ENABLED if enabled is None else enabled
+        # master norenordno -> {child account number: child norenordno or None while in flight}
+        self.order_map: Dict[str, Dict[int, Optional[str]]] = {}
+        self.master_state: Dict[str, str] = {}
+        # Master orders cancelled or rejected; a child placed after this is cancelled at once
+        self.closed_masters: set = set()
+        self._cancelled_children: set = set()
+        self.copy_latencies = deque(maxlen=Config.REPLICATION_LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def on_master_order(self, tick_data: Dict[str, Any]) -> None:
+        """
+        Handle an order update from the master account feed
+
+        Args:
+            tick_data: Order update from the master WebSocket
+        """
+        if not self.enabled:
+            return
+
+        received = time.perf_counter()
+        if tick_data.get('exch') not in ['NFO', 'BFO']:
+            return
+
+        master_no = tick_data.get('norenordno')
+        if not master_no:
+            return
+
+        status = tick_data.get('status')
+        report_type = tick_data.get('reporttype')
+
+        try:
+            if report_type in ('NewAck', 'New') and master_no not in self.order_map:
+                self._replicate_new(tick_data, master_no, received)
+            elif report_type == 'Replaced' and status == 'OPEN':
+                self._replicate_modify(tick_data, master_no, received)
+            elif report_type == 'Canceled':
+                self._replicate_cancel(master_no, received)
+            elif report_type == 'Rejected' or status == 'REJECTED':
+                # Children are placed on the master's ack, before the exchange accepts it
+                applicationLogger.warning(f"[REPL] Master order {master_no} rejected ({tick_data.get('rejreason')}), "
+                                          f"cancelling children")
+                self._replicate_cancel(master_no, received)
+            elif report_type == 'Fill':
+                applicationLogger.info(f"[REPL] Master order {master_no} filled, children: {self.get_child_orders(master_no)}")
+
+            if status:
+                self.master_state[master_no] = status
+        except Exception as e:
+            applicationLogger.error(f"[REPL] Error replicating master order {master_no}: {e}")
+            import traceback
+            applicationLogger.error(f"[REPL] Traceback: {traceback.format_exc()}")
+
+    def _child_accounts(self) -> List[int]:
+        """Active child account numbers"""
+        return [num for num in self.account_manager.get_all_active_accounts() if num != MASTER_ACCOUNT]
+
+    def _child_quantity(self, account_num: int, master_qty) -> int:
+        """Scale the master quantity for a child account"""
+        return int(int(master_qty) * Config.get_replication_multiplier(account_num))
+
+    def _record_latency(self, received: float, account_num: int, action: str, master_no: str):
+        """Record master-event to child-submission latency (runs on the child's worker)"""
+        latency_ms = (time.perf_counter() - received) * 1000
+        self.copy_latencies.append(latency_ms)
+        applicationLogger.info(f"[REPL] {action} {master_no} -> Account {account_num} submitted after {latency_ms:.3f} ms")
+
+    def _replicate_new(self, tick_data: Dict[str, Any], master_no: str, received: float):
+        """Place a mirror of a new master order on every child"""
+        trading_symbol = tick_data.get('tsym')
+        buy_or_sell = tick_data.get('trantype')
+        price = float(tick_data.get('prc') or 0)
+        price_type = tick_data.get('prctyp') or 'LMT'
+        product_type = tick_data.get('pcode') or tick_data.get('prd') or 'I'
+
+        with self._lock:
+            if master_no in self.order_map:
+                return
+            self.order_map[master_no] = {}
+
+        for account_num in self._child_accounts():
+            api = self.account_manager.get_api(account_num)
+            if not api:
+                continue
+            qty = self._child_quantity(account_num, tick_data.get('qty', 0))
+            with self._lock:
+                self.order_map[master_no][account_num] = None
+
+            def place(api=api, account_num=account_num, qty=qty):
+                self._record_latency(received, account_num, "NEW", master_no)
+                trace = self.order_manager.tracer.start(
+                    self.order_manager.account_label(api, account_num - 1), received
+                )
+                child_no = self.order_manager.place_order(
+                    api, buy_or_sell, qty, account_num - 1, trading_symbol, price,
+                    price_type=price_type, product_type=product_type, trace=trace
+                )
+                # Recorded and checked under the lock so a concurrent master cancel sees one or the other
+                with self._lock:
+                    self.order_map[master_no][account_num] = child_no
+                    closed = master_no in self.closed_masters
+                if child_no and closed:
+                    # The master was cancelled or rejected while this place was in flight
+                    applicationLogger.warning(f"[REPL] Master order {master_no} closed, cancelling {child_no} on Account {account_num}")
+                    self._cancel_child(api, child_no)
+                return child_no
+
+            self.order_manager.dispatcher.submit(api, place)
+
+        applicationLogger.info(f"[REPL] Replicating master order {master_no} ({buy_or_sell} {trading_symbol} @ {price})")
+
+    def _replicate_modify(self, tick_data: Dict[str, Any], master_no: str, received: float):
+        """Mirror a master modification to every mapped child order"""
+        with self._lock:
+            children = self.order_map.get(master_no)
+            accounts = list(children or ())
+        if not accounts:
+            return
+
+        trading_symbol = tick_data.get('tsym')
+        price = float(tick_data.get('prc') or 0)
+        price_type = tick_data.get('prctyp')
+
+        for account_num in accounts:
+            api = self.account_manager.get_api(account_num)
+            if not api:
+                continue
+            qty = self._child_quantity(account_num, tick_data.get('qty', 0))
+
+            def modify(api=api, account_num=account_num, qty=qty):
+                # Runs after the child's place call on the same worker, so the number is known
+                with self._lock:
+                    child_no = children.get(account_num)
+                if not child_no:
+                    applicationLogger.warning(f"[REPL] No child order for {master_no} on Account {account_num}, skipping modify")
+                    return None
+                self._record_latency(received, account_num, "MODIFY", master_no)
+                return self.order_manager.modify_order(api, child_no, qty, trading_symbol, price, price_type=price_type)
+
+            # Kept in the new-order lane so it runs after the child's place call
+            self.order_manager.dispatcher.submit(api, modify)
+
+    def _replicate_cancel(self, master_no: str, received: float):
+        """Cancel every mapped child order of a cancelled or rejected master order"""
+        with self._lock:
+            self.closed_masters.add(master_no)
+            children = self.order_map.get(master_no)
+            accounts = list(children or ())
+        if not accounts:
+            return
+
+        for account_num in accounts:
+            api = self.account_manager.get_api(account_num)
+            if not api:
+                continue
+
+            def cancel(api=api, account_num=account_num):
+                with self._lock:
+                    child_no = children.get(account_num)
+                if not child_no:
+                    return None  # Still being placed; the place call cancels it on return
+                self._record_latency(received, account_num, "CANCEL", master_no)
+                return self._cancel_child(api, child_no)
+
+            # Jumps queued places; a child still being placed is cancelled when its place returns
+            self.order_manager.dispatcher.submit_lane(api, LANE_CANCEL, cancel)
+
+    def _cancel_child(self, api, child_no: str):
+        """Cancel a child order once, whichever of the place or cancel paths gets there first"""
+        with self._lock:
+            if child_no in self._cancelled_children:
+                return None
+            self._cancelled_children.add(child_no)
+        return self.order_manager.cancel_order(api, child_no)
+
+    def get_child_orders(self, master_no: str) -> Dict[int, Optional[str]]:
+        """Get child order numbers mapped to a master order"""
+        with self._lock:
+            return dict(self.order_map.get(master_no, {}))
+
+    def latency_stats(self) -> Dict[str, float]:
+        """
+        Summarize master-event to child-submission latency
+
+        Returns:
+            Dictionary with count, mean, p50, p99 and max in milliseconds
+        """
+        samples = sorted(self.copy_latencies)
+        if not samples:
+            return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+
+        return {
+            'count': len(samples),
+            'mean_ms': sum(samples) / len(samples),
+            'p50_ms': percentile(samples, 0.50),
+            'p99_ms': percentile(samples, 0.99),
+            'max_ms': samples[-1]
+        }
@@ -2,61 +2,141 @@
 WebSocket management for real-time data feeds
 """
 import threading
-from typing import Callable, Dict, Any
-from logger import child2WSLogger, master1WSLogger, applicationLogger
+from typing import Callable, Dict, Any, List, Optional
+from config import Config
+from logger import child2WSLogger, master1WSLogger, applicationLogger, TICK, TickLine
 from utils.telegram_notifications import send_sos_message
+from trading.order_event_dispatcher import OrderEventDispatcher
+from trading.position_engine import PositionEngine
+from market_data.tick_store import TickStore, tick_key
+from market_data.option_chain import OptionChain
 
 class WebSocketManager:
     """Manages WebSocket connections for all accounts"""
     
-    def __init__(self, account_manager, order_manager, main_window=None):
+    def __init__(self, account_manager, order_manager, main_window=None, replication_engine=None,
+                 snapshot_service=None):
         self.account_manager = account_manager
         self.order_manager = order_manager
         self.main_window = main_window  # Reference to main window for button updates
+        self.replication_engine = replication_engine  # Mirrors master orders to children
+        self.snapshot_service = snapshot_service  # Cached account books, invalidated by order updates
         self.loggers = {
             1: master1WSLogger,
             2: child2WSLogger
         }
+        # One ordered consumer per account instead of a thread per update
+        self.event_dispatcher = OrderEventDispatcher(self._process_order_update)
+        # Latest quote and recent history per exchange|token, shared by all feeds
+        self.tick_store = TickStore()
+        # Live chains fed from the quote callback; replaced, never mutated, so the feed thread can iterate freely
+        self.option_chains = []
+        # Subscriptions per API session, reference-counted so one consumer never drops another's feed
+        self._subscriptions: Dict[Any, Dict[str, int]] = {}
+        self._subscription_lock = threading.Lock()
+        # Positions and MTM kept current from fills and ticks once each account is seeded
+        self.position_engine = PositionEngine(self.tick_store, subscribe=self.subscribe_keys)
+    
+    def subscribe_keys(self, api, keys: List[str]) -> bool:
+        """
+        Take a reference on exchange|token keys, subscribing those not already streamed
+        
+        Args:
+            api: API instance whose WebSocket carries the feed
+            keys: exchange|token keys
+            
+        Returns:
+            bool: True if the subscription was sent (or not needed)
+        """
+        with self._subscription_lock:
+            counts = self._subscriptions.setdefault(api, {})
+            added = []
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+                if counts[key] == 1:
+                    added.append(key)
+        try:
+            if added:
+                api.subscribe(added)
+            return True
+        except Exception as e:
+            applicationLogger.error(f"Error subscribing {added}: {e}")
+            return False
+    
+    def unsubscribe_keys(self, api, keys: List[str]) -> bool:
+        """
+        Release references on keys, unsubscribing those no one else still holds
+        
+        Args:
+            api: API instance whose WebSocket carries the feed
+            keys: exchange|token keys
+            
+        Returns:
+            bool: True if the unsubscription was sent (or not needed)
+        """
+        with self._subscription_lock:
+            counts = self._subscriptions.get(api, {})
+            removed = []
+            for key in keys:
+                count = counts.get(key, 0) - 1
+                if count > 0:
+                    counts[key] = count
+                elif key in counts:
+                    del counts[key]
+                    removed.append(key)
+        try:
+            if removed:
+                api.unsubscribe(removed)
+            return True
+        except Exception as e:
+            applicationLogger.error(f"Error unsubscribing {removed}: {e}")
+            return False
+    
+    def subscription_count(self, api, key: str) -> int:
+        """References held on a key"""
+        return self._subscriptions.get(api, {}).get(key, 0)
+    
+    def handle_quote(self, tick_data: Dict[str, Any]):
+        """
+        Apply a quote tick to the tick store, position engine and option chains
+        
+        Args:
+            tick_data: WebSocket touchline tick
+            
+        Returns:
+            TokenTicks for the token, or None
+        """
+        ticks = self.tick_store.update(tick_data)
+        self.position_engine.on_tick(tick_data)
+        for chain in self.option_chains:
+            chain.on_tick(tick_data)
+        return ticks
     
     def setup_websocket_callbacks(self, account_num: int):
         """Setup WebSocket callbacks for a specific account"""
         
         def order_update_callback(tick_data):
             """Handle order updates"""
+            # Stamp NewAck/OPEN/Fill for latency tracing as soon as the message lands
+            self.order_manager.tracer.on_order_update(tick_data)
+            
+            # Mirror master orders first; the engine only queues work on child workers
+            if account_num == 1 and self.replication_engine:
+                self.replication_engine.on_master_order(tick_data)
+            
             logger = self.loggers.get(account_num, applicationLogger)
             logger.info(tick_data)
             
-            # Process order update in a separate thread
-            thread = threading.Thread(target=self._process_order_update, args=(tick_data, account_num))
-            thread.start()
+            # Process in arrival order on the account's consumer thread
+            self.event_dispatcher.dispatch(account_num, tick_data)
         
         def quote_update_callback(tick_data):
             """Handle quote updates"""
-            logger = self.loggers.get(account_num, applicationLogger)
-            
-            # Log the raw quote data
-            logger.info(f"[QUOTE] WebSocket Quote Response for Account {account_num}: {tick_data}")
-            logger.info(f"[QUOTE] Quote Data Type: {type(tick_data)}")
-            
+            # One sampled line per tick; formatting happens on the log writer thread
             if isinstance(tick_data, dict):
-                # Log specific quote fields for better debugging
-                logger.info(f"[QUOTE] Symbol (tsym): {tick_data.get('tsym', 'N/A')}")
-                logger.info(f"[QUOTE] Exchange (e): {tick_data.get('e', 'N/A')}")
-                logger.info(f"[QUOTE] Token (tk): {tick_data.get('tk', 'N/A')}")
-                logger.info(f"[QUOTE] Last Price (lp): {tick_data.get('lp', 'N/A')}")
-                logger.info(f"[QUOTE] Open Price (o): {tick_data.get('o', 'N/A')}")
-                logger.info(f"[QUOTE] High Price (h): {tick_data.get('h', 'N/A')}")
-                logger.info(f"[QUOTE] Low Price (l): {tick_data.get('l', 'N/A')}")
-                logger.info(f"[QUOTE] Close Price (c): {tick_data.get('c', 'N/A')}")
-                logger.info(f"[QUOTE] Volume (v): {tick_data.get('v', 'N/A')}")
-                logger.info(f"[QUOTE] Percentage Change (pc): {tick_data.get('pc', 'N/A')}")
-                logger.info(f"[QUOTE] Average Price (ap): {tick_data.get('ap', 'N/A')}")
-                logger.info(f"[QUOTE] Message Type (t): {tick_data.get('t', 'N/A')}")
-            else:
-                logger.warning(f"[QUOTE] Quote data is not a dictionary: {tick_data}")
-            
-            # Also print to console for immediate feedback
-            print(f"Quote Received for Account {account_num}: {tick_data}")
+                self.handle_quote(tick_data)
+            logger = self.loggers.get(account_num, applicationLogger)
+            logger.info("%s", TickLine(tick_data, account_num), extra=TICK)
         
         def socket_open_callback():
             """Handle socket open"""
@@ -66,12 +146,75 @@ class WebSocketManager:
         
         return order_update_callback, quote_update_callback, socket_open_callback
     
+    def open_option_chain(self, account_num: int, symbol_manager, underlying: str, expiry,
+                          width: int = None) -> Optional[OptionChain]:
+        """
+        Stream a live option chain over an account's quote WebSocket
+        
+        Args:
+            account_num: Account whose WebSocket carries the subscriptions
+            symbol_manager: SymbolManager with the instrument index
+            underlying: Index name (NIFTY, BANKNIFTY, SENSEX...)
+            expiry: Expiry date
+            width: Strikes on each side of ATM (default Config.OPTION_CHAIN_WIDTH)
+            
+        Returns:
+            OptionChain or None
+        """
+        try:
+            api = self.account_manager.get_api(account_num)
+            strikes = symbol_manager.get_strike_ladder().strikes(underlying, expiry)
+            if not api or not strikes:
+                applicationLogger.error(f"Cannot open {underlying} {expiry} chain: "
+                                        f"{'no listed strikes' if api else 'account not logged in'}")
+                return None
+            
+            index_info = Config.get_index_info(underlying)
+            spot_key = tick_key(index_info['exchange'], index_info['token']) if index_info else None
+            chain = OptionChain(
+                underlying, expiry, strikes,
+                resolve=lambda strike, option_type: symbol_manager.resolve_option(underlying, expiry, strike, option_type),
+                subscribe=lambda keys: self.subscribe_keys(api, keys),
+                unsubscribe=lambda keys: self.unsubscribe_keys(api, keys),
+                spot_key=spot_key,
+                width=width
+            )
+            self.option_chains = self.option_chains + [chain]
+            chain.start(self.tick_store.last_price(spot_key) if spot_key else None)
+            return chain
+            
+        except Exception as e:
+            applicationLogger.error(f"Error opening {underlying} {expiry} option chain: {e}")
+            return None
+    
+    def close_option_chain(self, chain: OptionChain):
+        """Stop feeding a chain and unsubscribe its tokens"""
+        try:
+            self.option_chains = [c for c in self.option_chains if c is not chain]
+            chain.stop()
+        except Exception as e:
+            applicationLogger.error(f"Error closing option chain: {e}")
+    
+    def get_order_event_metrics(self) -> Dict[int, Dict[str, Any]]:
+        """Queue depth, backpressure and stale-drop counts per account"""
+        return self.event_dispatcher.metrics()
+    
     def _process_order_update(self, tick_data: Dict[str, Any], account_num: int):
         """Process order update data"""
         try:
             # Handle order update
             self.order_manager.handle_order_update(tick_data)
             
+            # Fills move net quantity and realized P&L
+            self.position_engine.on_fill(account_num, tick_data)
+            
+            # The cached order book is stale now; positions and limits too once something fills
+            if self.snapshot_service:
+                self.snapshot_service.invalidate(account_num, 'orders')
+                if tick_data.get('reporttype') == 'Fill':
+                    self.snapshot_service.invalidate(account_num, 'positions')
+                    self.snapshot_service.invalidate(account_num, 'limits')
+            
             # Process order status updates
             self._process_order_status(tick_data, account_num)
             
@@ -129,6 +272,10 @@ class WebSocketManager:
                 socket_open_callback=open_callback
             )
             
+            # One position book fetch, off the caller's (UI) thread; fills and ticks keep it current from here on
+            threading.Thread(target=self.position_engine.seed, args=(account_num, api),
+                             name=f"PositionSeed{account_num}", daemon=True).start()
+            
             return True
             
         except Exception as e:
@@ -156,7 +303,7 @@ class WebSocketManager:
             applicationLogger.info(f"[SUBSCRIBE] API Type: {type(api)}")
             
             # Perform subscription
-            result = api.subscribe(websocket_token)
+            result = self.subscribe_keys(api, [websocket_token])
             
             # Log subscription result
             applicationLogger.info(f"[SUBSCRIBE] Subscription result: {result}")
@@ -195,7 +342,7 @@ class WebSocketManager:
             applicationLogger.info(f"[WS] Attempting to unsubscribe from: {websocket_token}")
             
             # Perform unsubscription
-            result = api.unsubscribe(websocket_token)
+            result = self.unsubscribe_keys(api, [websocket_token])
             
             # Log unsubscription result
             applicationLogger.info(f"[WS] Unsubscription result: {result}")
@@ -354,7 +501,7 @@ class WebSocketManager:
             
             # Subscribe to touchline data
             applicationLogger.info(f"[WS] Calling api.subscribe('{instrument}')")
-            success = api.subscribe(instrument)
+            success = self.subscribe_keys(api, [instrument])
             
             applicationLogger.info(f"[WS] Subscribe result: {success}")
             applicationLogger.info(f"[WS] Subscribe result type: {type(success)}")
@@ -379,7 +526,7 @@ class WebSocketManager:
             instrument = f"{exchange}|{token}"
             
             applicationLogger.info(f"[WS] WebSocket Unsubscribe - Instrument: {instrument}")
-            success = api.unsubscribe(instrument)
+            success = self.unsubscribe_keys(api, [instrument])
             
             applicationLogger.info(f"[WS] Unsubscribe result: {success}")
             
@@ -0,0 +1,176 @@
+"""
+Binary capture and replay of raw WebSocket feed messages
+"""
+import json
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+from config import Config
+from logger import applicationLogger
+
+MAGIC = b'MCFEED1\n'
+
+# Frame header: payload length (uint32), receive time (int64 epoch nanoseconds)
+FRAME_HEADER = struct.Struct('<Iq')
+
+def default_capture_path(user_id: str = None) -> str:
+    """Capture file for an account session, e.g. captures/feed_FA12345_2025-09-11_091500.bin"""
+    os.makedirs(Config.FEED_CAPTURE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y-%m-%d_%H%M%S')
+    return os.path.join(Config.FEED_CAPTURE_DIR, f"feed_{user_id or 'unknown'}_{stamp}.bin")
+
+class FeedRecorder:
+    """
+    Appends raw messages as length-prefixed frames with receive timestamps
+
+    Frames are flushed every FEED_CAPTURE_FLUSH_FRAMES frames and by a
+    background thread every FEED_CAPTURE_FLUSH_INTERVAL seconds, so a crash
+    loses at most that much of the tail.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.frames = 0
+        self.flush_frames = Config.FEED_CAPTURE_FLUSH_FRAMES
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        new_file = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        self._file = open(file_path, 'ab', buffering=1 << 16)
+        if new_file:
+            self._file.write(MAGIC)
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="FeedCaptureFlusher", daemon=True)
+        self._flusher.start()
+
+    def record(self, message, recv_ns: int = None) -> None:
+        """
+        Write one raw message
+
+        Args:
+            message: Raw text or bytes as received from the socket
+            recv_ns: Receive time in epoch nanoseconds, defaults to now
+        """
+        if recv_ns is None:
+            recv_ns = time.time_ns()
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(FRAME_HEADER.pack(len(message), recv_ns))
+            self._file.write(message)
+            self.frames += 1
+            self._unflushed += 1
+            if self._unflushed >= self.flush_frames:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._unflushed and not self._file.closed:
+            self._file.flush()
+            self._unflushed = 0
+
+    def _flush_loop(self):
+        """Background flush so the tail of a quiet feed still reaches the file"""
+        while not self._stop.wait(Config.FEED_CAPTURE_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as e:
+                applicationLogger.error(f"Feed capture flush failed: {e}")
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+class FeedReplayer:
+    """Feeds a capture file back into NorenApi-style WebSocket callbacks"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def frames(self) -> Iterator[Tuple[int, bytes]]:
+        """
+        Read frames from the capture
+
+        Returns:
+            Iterator of (receive time ns, raw message bytes); stops at a truncated frame
+        """
+        with open(self.file_path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.file_path} is not a feed capture")
+            while True:
+                header = file.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    return
+                length, recv_ns = FRAME_HEADER.unpack(header)
+                message = file.read(length)
+                if len(message) < length:
+                    return
+                yield recv_ns, message
+
+    @staticmethod
+    def dispatch(message: dict, subscribe_callback: Callable = None,
+                 order_update_callback: Callable = None,
+                 socket_open_callback: Callable = None) -> None:
+        """Route a parsed message the same way NorenApi's data callback does"""
+        msg_type = message.get('t')
+        if msg_type in ('tk', 'tf', 'dk', 'df'):
+            if subscribe_callback:
+                subscribe_callback(message)
+        elif msg_type == 'om':
+            if order_update_callback:
+                order_update_callback(message)
+        elif msg_type == 'ck' and message.get('s') == 'OK':
+            if socket_open_callback:
+                socket_open_callback()
+
+    def replay(self, subscribe_callback: Callable = None, order_update_callback: Callable = None,
+               socket_open_callback: Callable = None, speed: Optional[float] = 1.0) -> int:
+        """
+        Replay the capture on the calling thread
+
+        Args:
+            subscribe_callback: Quote callback
+            order_update_callback: Order update callback
+            socket_open_callback: Socket open callback
+            speed: 1.0 for original pacing, N for N times faster, None or 0 for as fast as possible
+
+        Returns:
+            Number of messages replayed
+        """
+        count = 0
+        first_ns = None
+        start = time.perf_counter()
+        for recv_ns, raw in self.frames():
+            if speed:
+                if first_ns is None:
+                    first_ns = recv_ns
+                delay = (recv_ns - first_ns) / 1e9 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.dispatch(json.loads(raw), subscribe_callback, order_update_callback, socket_open_callback)
+            count += 1
+        return count
+
+    def replay_into(self, websocket_manager, account_num: int, speed: Optional[float] = 1.0) -> int:
+        """
+        Replay the capture through a WebSocketManager's callbacks for an account
+
+        Args:
+            websocket_manager: WebSocketManager to drive
+            account_num: Account whose callbacks receive the messages
+            speed: See replay()
+
+        Returns:
+            Number of messages replayed
+        """
+        order_callback, quote_callback, open_callback = websocket_manager.setup_websocket_callbacks(account_num)
+        return self.replay(quote_callback, order_callback, open_callback, speed=speed)
@@ -0,0 +1,83 @@
+"""
+Pooled keep-alive HTTP sessions for broker REST calls
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+_local = threading.local()
+
+def create_session(pool_size: int = None, keepalive: bool = None) -> requests.Session:
+    """
+    Create a requests Session with a dedicated connection pool
+
+    Args:
+        pool_size: Maximum pooled connections per host
+        keepalive: Keep connections open between requests
+
+    Returns:
+        Configured requests Session
+    """
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+    keepalive = Config.HTTP_KEEPALIVE if keepalive is None else keepalive
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                          max_retries=0, pool_block=False)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive' if keepalive else 'close'
+    return session
+
+class SessionRouter:
+    """
+    Stand-in for the requests module inside NorenRestApiPy
+
+    NorenApi calls the module-level requests.post for every endpoint. This
+    router sends those calls through the session bound to the calling thread
+    and falls back to plain requests otherwise.
+    """
+
+    def post(self, url, data=None, **kwargs):
+        kwargs.setdefault('timeout', Config.API_TIMEOUT)
+        session = getattr(_local, 'session', None)
+        if session is not None:
+            return session.post(url, data=data, **kwargs)
+        return requests.post(url, data=data, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+class bound_session:
+    """Context manager binding a session to the current thread"""
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'session', None)
+        _local.session = self.session
+        return self.session
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.session = self.previous
+        return False
+
+_installed = False
+_install_lock = threading.Lock()
+
+def install_session_router(module) -> None:
+    """
+    Replace the requests reference of a module with the session router
+
+    Args:
+        module: Module whose global `requests` should be routed
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        module.requests = SessionRouter()
+        _installed = True
@@ -0,0 +1,117 @@
+"""
+Token-bucket rate limiting with priority lanes
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Any
+from config import Config
+
+# Lower number = higher priority
+LANE_CANCEL = 0
+LANE_MODIFY = 1
+LANE_NEW = 2
+LANE_QUERY = 3
+
+LANE_NAMES = {
+    LANE_CANCEL: 'cancel',
+    LANE_MODIFY: 'modify',
+    LANE_NEW: 'new',
+    LANE_QUERY: 'query'
+}
+
+class PriorityRateLimiter:
+    """
+    Token bucket shared by one account session
+
+    Waiting callers are served strictly by lane, then arrival order, so a
+    cancel never waits behind a queued quote poll. Query calls also leave a
+    few tokens in reserve for order traffic.
+    """
+
+    def __init__(self, rate: float = None, burst: int = None, reserved: int = None,
+                 enabled: bool = None):
+        self.rate = rate or Config.RATE_LIMIT_PER_SECOND
+        self.capacity = burst or Config.RATE_LIMIT_BURST
+        self.reserved = Config.RATE_LIMIT_RESERVED_TOKENS if reserved is None else reserved
+        self.enabled = Config.RATE_LIMIT_ENABLED if enabled is None else enabled
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._stats = {lane: {'waiting': 0, 'acquired': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+                       for lane in LANE_NAMES}
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, lane: int = LANE_QUERY) -> float:
+        """
+        Block until a token is available for a lane
+
+        Args:
+            lane: Priority lane (LANE_CANCEL, LANE_MODIFY, LANE_NEW, LANE_QUERY)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not self.enabled:
+            return 0.0
+
+        start = time.monotonic()
+        needed = 1 + (self.reserved if lane >= LANE_QUERY else 0)
+        stats = self._stats[lane]
+
+        with self._cond:
+            entry = (lane, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            stats['waiting'] += 1
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == entry and self.tokens >= needed:
+                        self.tokens -= 1
+                        break
+                    deficit = needed - self.tokens
+                    self._cond.wait(deficit / self.rate if deficit > 0 else None)
+            finally:
+                if self._waiters and self._waiters[0] == entry:
+                    heapq.heappop(self._waiters)
+                else:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                stats['waiting'] -= 1
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            stats['acquired'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+
+        return waited
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue depth and wait-time metrics per lane
+
+        Returns:
+            {lane name: {queue_depth, acquired, avg_wait_ms, max_wait_ms}}
+        """
+        with self._cond:
+            self._refill()
+            result = {}
+            for lane, stats in self._stats.items():
+                acquired = stats['acquired']
+                result[LANE_NAMES[lane]] = {
+                    'queue_depth': stats['waiting'],
+                    'acquired': acquired,
+                    'avg_wait_ms': (stats['wait_total'] / acquired * 1000) if acquired else 0.0,
+                    'max_wait_ms': stats['wait_max'] * 1000
+                }
+            result['tokens_available'] = round(self.tokens, 3)
+        return result